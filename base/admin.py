@@ -8,6 +8,7 @@ from .models import (
     CommunalCouncil,
     Department,
     Gender,
+    OutgoingEmail,
     Relationship,
     Ubch,
     VoteType,
@@ -142,6 +143,34 @@ class GenderAdmin(admin.ModelAdmin):
     list_display = ('name',)
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """!
+    Clase que agrega modelo OutgoingEmail al panel administrativo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    # Mostrar los campos
+    list_display = (
+        'to', 'subject', 'status', 'attempts', 'next_attempt', 'created',
+        'sent',
+    )
+
+    # Filtrar por campos
+    list_filter = ('status',)
+
+    # Buscar por campos
+    search_fields = (
+        'to', 'subject',
+    )
+
+    # Ocultar el contenido, que puede tener datos de la cuenta del
+    # destinatario
+    exclude = ('body',)
+
+
 admin.site.register(Ubch, UbchAdmin)
 admin.site.register(CommunalCouncil, CommunalCouncilAdmin)
 admin.site.register(Block, BlockAdmin)
@@ -151,3 +180,4 @@ admin.site.register(Department, DepartmentAdmin)
 admin.site.register(VoteType, VoteTypeAdmin)
 admin.site.register(Relationship, RelationshipAdmin)
 admin.site.register(Gender, GenderAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -1,85 +1,70 @@
-import json
-
-from django.apps import apps
-from django.http import HttpResponse
+from django.http import JsonResponse
 from django.views import View
 
-# Mensaje de error para peticiones AJAX
-MSG_NOT_AJAX = 'No se puede procesar la petición. Verifique que posea las \
-    opciones javascript habilitadas e intente nuevamente.'
-
-
-class ComboUpdateView(View):
-
-    def get(self, request, *args, **kwargs):
-        try:
-            if request.headers.get('x-requested-with') != 'XMLHttpRequest':
-                return HttpResponse(json.dumps(
-                    {'resultado': False, 'error': str(MSG_NOT_AJAX)})
-                )
-
-            # Valor del campo que ejecuta la acción
-            cod = request.GET.get('option')
-
-            # Nombre de la aplicación del modelo en donde buscar los datos
-            app = request.GET.get('app')
-
-            # Nombre del modelo en el cual se va a buscar la información a
-            # mostrar
-            mod = request.GET.get('mod')
-
-            # Atributo por el cual se va a filtrar la información
-            field = request.GET.get('field')
+from .cascades import CASCADES, cascade_response
+from .territory import territory_response
 
-            # Atributo del cual se va a obtener el valor a registrar en las
-            # opciones del combo resultante
-            n_value = request.GET.get('n_value')
 
-            # Atributo del cual se va a obtener el texto a registrar en las
-            # opciones del combo resultante
-            n_text = request.GET.get('n_text')
+class CascadeView(View):
+    """!
+    Clase que retorna en formato json las opciones de un campo dependiente
+    a partir del objeto seleccionado en el campo del que depende. Solo
+    responde las listas declaradas en CASCADES
 
-            # Nombre de la base de datos en donde buscar la información,
-            # si no se obtiene el valor por defecto es default
-            bd = request.GET.get('bd', 'default')
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
 
-            filter = {}
-
-            if app and mod and field and n_value and n_text and bd:
-                model = apps.get_model(app, mod)
-
-                if cod:
-                    filter = {field: cod}
-
-                out = "<option value=''>%s...</option>" % str("Seleccione")
-
-                combo_disabled = "false"
-
-                if cod != "" and cod != "0":
-                    for o in model.objects.using(bd).filter(
-                        **filter
-                    ).order_by(n_text):
-                        out = "%s<option value='%s'>%s</option>" \
-                              % (out, str(o.__getattribute__(n_value)),
-                                 o.__getattribute__(n_text))
-                else:
-                    combo_disabled = "true"
-
-                return HttpResponse(
-                    json.dumps({
-                        'result': True,
-                        'combo_disabled': combo_disabled,
-                        'combo_html': out
-                    })
-                )
-
-            else:
-                return HttpResponse(
-                    json.dumps({
-                        'result': False,
-                        'error': str('No se ha especificado el registro')
-                    })
-                )
+    def get(self, request, *args, **kwargs):
+        """!
+        Función que retorna las opciones de un campo dependiente
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param request <b>{object}</b> Objeto que contiene la petición
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **kwargs <b>{dict}</b> Diccionario de datos
+        @return Retorna un objeto HttpResponse con la lista en json
+        """
+
+        name = kwargs['name']
+        if name not in CASCADES:
+            return JsonResponse(
+                {'status': False, 'message': 'Lista no encontrada'},
+                status=404
+            )
+        parent = request.GET.get('parent', '')
+        if not parent.isdigit():
+            return JsonResponse(
+                {'status': False, 'message': 'Debe indicar parent'},
+                status=422
+            )
+        return cascade_response(request, name, int(parent))
+
+
+class TerritoryView(View):
+    """!
+    Clase que retorna en formato json la división territorial completa, para
+    que los campos dependientes se filtren en el navegador sin consultar al
+    servidor en cada cambio
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
 
-        except Exception as e:
-            return HttpResponse(json.dumps({'result': False, 'error': e}))
+    def get(self, request, *args, **kwargs):
+        """!
+        Función que retorna la división territorial completa
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param request <b>{object}</b> Objeto que contiene la petición
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **kwargs <b>{dict}</b> Diccionario de datos
+        @return Retorna un objeto HttpResponse con la división territorial en
+            json
+        """
+
+        return territory_response(request)
@@ -0,0 +1,63 @@
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .territory import children, territory
+
+# Campos dependientes permitidos: nombre de la lista de opciones y nivel de
+# la división territorial del objeto del que dependen. Solo se responden
+# las listas declaradas aquí
+CASCADES = {
+    'estates': 'countries',
+    'municipalities': 'estates',
+    'parishes': 'municipalities',
+    'ubchs': 'parishes',
+    'bridges': 'blocks',
+    'buildings': 'bridges',
+    'departments': 'buildings',
+}
+
+
+def build_cascade_list(name, parent_id):
+    """!
+    Función que serializa las opciones de un campo dependiente con el
+    formato de las listas de referencia, a partir del índice de la división
+    territorial
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre de la lista en CASCADES
+    @param parent_id <b>{int}</b> Identificador del objeto seleccionado
+    @return Retorna el contenido json de la lista
+    """
+
+    record_list = [{'id': '', 'text': 'Seleccione...'}]
+    record_list.extend(
+        {'id': pk, 'text': text}
+        for pk, text in children(CASCADES[name], parent_id)
+    )
+    return JsonResponse(
+        {'status': 'true', 'list': record_list}, status=200
+    ).content
+
+
+def cascade_response(request, name, parent_id):
+    """!
+    Función que retorna las opciones de un campo dependiente, o una
+    respuesta 304 si el navegador ya tiene la versión actual
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param request <b>{object}</b> Objeto que contiene la petición
+    @param name <b>{string}</b> Nombre de la lista en CASCADES
+    @param parent_id <b>{int}</b> Identificador del objeto seleccionado
+    @return Retorna un objeto HttpResponse
+    """
+
+    etag = '"%s-%d-%d"' % (name, parent_id, territory().version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(
+            build_cascade_list(name, parent_id),
+            content_type='application/json'
+        )
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
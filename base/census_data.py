@@ -0,0 +1,150 @@
+from collections import namedtuple
+from itertools import groupby
+from operator import attrgetter
+
+from user.models import Person, calculate_age
+
+# Campos de cada fila del censo, en el mismo orden de CENSUS_FIELDS
+CensusPerson = namedtuple('CensusPerson', [
+    'street_leader_id',
+    'family_group_id',
+    'id_number',
+    'first_name',
+    'last_name',
+    'phone',
+    'email',
+    'vote_type',
+    'relationship',
+    'family_head',
+    'birthdate',
+    'department',
+    'building',
+    'bridge',
+    'block',
+])
+
+# Campos consultados a la base de datos en una sola consulta con joins
+CENSUS_FIELDS = (
+    'family_group__street_leader_id',
+    'family_group_id',
+    'id_number',
+    'first_name',
+    'last_name',
+    'phone',
+    'email',
+    'vote_type__name',
+    'relationship__name',
+    'family_head',
+    'birthdate',
+    'family_group__department__name',
+    'family_group__department__building__name',
+    'family_group__department__building__bridge__name',
+    'family_group__department__building__bridge__block__name',
+)
+
+# Orden de las filas: por líder de calle y luego por ubicación del grupo
+# familiar, manteniendo juntos a los integrantes de cada grupo
+CENSUS_ORDERING = (
+    'family_group__street_leader_id',
+    'family_group__department__building__bridge__block__name',
+    'family_group__department__building__name',
+    'family_group__department__name',
+    'family_group_id',
+    'id',
+)
+
+
+def full_name(person):
+    """!
+    Función que retorna los nombres y apellidos de una fila del censo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param person <b>{object}</b> Fila del censo
+    @return Retorna una cadena con los nombres y apellidos
+    """
+
+    return person.first_name + ' ' + person.last_name
+
+
+def address(person):
+    """!
+    Función que retorna la dirección de una fila del censo, igual a la
+    representación del modelo Department
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param person <b>{object}</b> Fila del censo
+    @return Retorna una cadena con departamento, edificio, puente y bloque
+    """
+
+    if person.department is None:
+        return str(None)
+    bridge = str(None)
+    if person.bridge is not None:
+        bridge = person.bridge + ' | ' + person.block
+    return person.department + ' | ' + person.building + ' | ' + bridge
+
+
+def age(person):
+    """!
+    Función que calcula la edad de una fila del censo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param person <b>{object}</b> Fila del censo
+    @return Retorna un número entero que representa la edad
+    """
+
+    return calculate_age(person.birthdate)
+
+
+def census_people(**filters):
+    """!
+    Función que obtiene en una sola consulta las personas del censo con los
+    datos de sus relaciones
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param **filters <b>{dict}</b> Filtros aplicados al modelo Person
+    @return Retorna un iterador de filas CensusPerson
+    """
+
+    queryset = Person.objects.filter(**filters).order_by(
+        *CENSUS_ORDERING
+    ).values_list(*CENSUS_FIELDS)
+    for row in queryset.iterator(chunk_size=2000):
+        yield CensusPerson._make(row)
+
+
+def census_families(people):
+    """!
+    Función que agrupa las filas del censo por grupo familiar
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param people <b>{object}</b> Iterador de filas ordenadas por grupo
+    @return Retorna un iterador de listas de filas, una por grupo familiar
+    """
+
+    for _, family in groupby(people, key=attrgetter('family_group_id')):
+        yield list(family)
+
+
+def census_by_street_leader(street_leaders, people):
+    """!
+    Función que agrupa las filas del censo por líder de calle y grupo
+    familiar. Los líderes de calle y las filas deben estar ordenados por id
+    del líder de calle
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param street_leaders <b>{object}</b> Líderes de calle ordenados por id
+    @param people <b>{object}</b> Iterador de filas de census_people
+    @return Retorna un iterador de tuplas (líder de calle, grupos familiares)
+    """
+
+    people = groupby(people, key=attrgetter('street_leader_id'))
+    current = next(people, None)
+    for street_leader in street_leaders:
+        while current and current[0] < street_leader.id:
+            current = next(people, None)
+        if current and current[0] == street_leader.id:
+            yield street_leader, census_families(current[1])
+            current = next(people, None)
+        else:
+            yield street_leader, iter(())
@@ -0,0 +1,298 @@
+import datetime
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from user.models import CensusStats, Person, age_q
+
+from .models import Block
+
+# Identificadores de los registros del modelo Gender
+MALE = 1
+FEMALE = 2
+
+# Ruta desde el modelo Person hasta el bloque donde vive
+BLOCK_PATH = 'family_group__department__building__bridge__block'
+
+# Rango de edad con nombre, sexo opcional y edades mínima y máxima incluidas.
+# None indica que no se limita el sexo o la edad
+AgeBracket = namedtuple(
+    'AgeBracket', ['name', 'gender', 'age1', 'age2'],
+    defaults=[None, None, None]
+)
+
+# Rangos del censo demográfico
+DEMOGRAPHIC_BRACKETS = (
+    # Hembras mayores a 15 años
+    AgeBracket('females_gt_15', FEMALE, age1=16),
+    # Hembras menores a 15 años
+    AgeBracket('females_lt_15', FEMALE, age2=14),
+    # Varones mayores a 15 años
+    AgeBracket('males_gt_15', MALE, age1=16),
+    # Varones menores a 15 años
+    AgeBracket('males_lt_15', MALE, age2=14),
+)
+
+# Rangos del censo sociodemográfico
+SOCIODEMOGRAPHIC_BRACKETS = (
+    # Niños
+    AgeBracket('male_children', MALE, 0, 12),
+    # Adolescentes varones
+    AgeBracket('male_teen', MALE, 13, 17),
+    # Hombres mayores o iguales a 18 años
+    AgeBracket('male_gte_18', MALE, age1=18),
+    # Adulto mayor hombres
+    AgeBracket('male_elderly', MALE, age1=60),
+    # Niñas
+    AgeBracket('female_children', FEMALE, 0, 12),
+    # Adolescentes hembras
+    AgeBracket('female_teen', FEMALE, 13, 17),
+    # Mujeres mayores o iguales a 18 años
+    AgeBracket('female_gte_18', FEMALE, age1=18),
+    # Adulto mayor hembras
+    AgeBracket('female_elderly', FEMALE, age1=55),
+)
+
+# Campos del censo demográfico, en el orden en que se muestran
+DEMOGRAPHIC_FIELDS = ('families', 'people', 'departments') + tuple(
+    bracket.name for bracket in DEMOGRAPHIC_BRACKETS
+)
+
+# Campos del censo sociodemográfico
+SOCIODEMOGRAPHIC_FIELDS = ('departments', 'families') + tuple(
+    bracket.name for bracket in SOCIODEMOGRAPHIC_BRACKETS
+)
+
+
+def bracket_count(bracket):
+    """!
+    Función que construye el conteo condicional de un rango de edad
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param bracket <b>{object}</b> Rango de edad AgeBracket
+    @return Retorna una expresión Count
+    """
+
+    condition = age_q(bracket.age1, bracket.age2)
+    if bracket.gender is not None:
+        condition &= Q(gender_id=bracket.gender)
+    return Count('id', filter=condition or None)
+
+
+def bracket_counts(brackets):
+    """!
+    Función que construye los conteos condicionales de varios rangos de edad.
+    Las condiciones de edad dependen de la fecha actual, por eso se
+    construyen en cada llamada
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param brackets <b>{tuple}</b> Rangos de edad AgeBracket
+    @return Retorna un diccionario de expresiones Count por nombre de rango
+    """
+
+    return {bracket.name: bracket_count(bracket) for bracket in brackets}
+
+
+def household_counts():
+    """!
+    Función que construye los conteos de familias y viviendas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna un diccionario de expresiones Count
+    """
+
+    return {
+        # Total de familias
+        'families': Count('id', filter=Q(family_head=True)),
+        # Total de viviendas
+        'departments': Count(
+            'family_group__department', filter=Q(family_head=True),
+            distinct=True
+        ),
+    }
+
+
+def count_brackets(queryset, brackets):
+    """!
+    Función que evalúa los rangos de edad sobre un queryset de personas en
+    una sola consulta, junto a los totales de familias y viviendas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param queryset <b>{object}</b> Queryset del modelo Person
+    @param brackets <b>{tuple}</b> Rangos de edad AgeBracket
+    @return Retorna un diccionario con los conteos por nombre
+    """
+
+    return queryset.order_by().aggregate(
+        **household_counts(), **bracket_counts(brackets)
+    )
+
+
+def stats_counts():
+    """!
+    Función que construye los conteos guardados en el modelo CensusStats
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna un diccionario de expresiones Count
+    """
+
+    return {
+        **household_counts(),
+        # Total de personas
+        'people': Count('id'),
+        **bracket_counts(DEMOGRAPHIC_BRACKETS + SOCIODEMOGRAPHIC_BRACKETS),
+    }
+
+
+@transaction.atomic
+def refresh_census_stats(block_ids):
+    """!
+    Función que recalcula los totales de algunos bloques con una sola
+    consulta agrupada, y luego los totales de sus consejos comunales sumando
+    los registros de sus bloques. Los demás bloques de esos consejos
+    comunales cuyos totales son de otro día también se recalculan, para que
+    el total del consejo comunal quede al día
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param block_ids <b>{list}</b> Identificadores de los bloques
+    """
+
+    today = datetime.date.today()
+    communal_councils = set(Block.objects.filter(
+        id__in=block_ids
+    ).values_list('communal_council', flat=True))
+    fresh = CensusStats.objects.filter(
+        communal_council__in=communal_councils, block__isnull=False,
+        date=today
+    ).values_list('block', flat=True)
+    block_ids = set(block_ids) | set(Block.objects.filter(
+        communal_council__in=communal_councils
+    ).exclude(id__in=fresh).values_list('id', flat=True))
+    counts = stats_counts()
+    rows = {
+        row.pop(BLOCK_PATH): row
+        for row in Person.objects.filter(
+            **{BLOCK_PATH + '__in': block_ids}
+        ).order_by().values(BLOCK_PATH).annotate(**counts)
+    }
+    empty = dict.fromkeys(counts, 0)
+    for block in Block.objects.filter(id__in=block_ids):
+        CensusStats.objects.update_or_create(
+            communal_council_id=block.communal_council_id, block=block,
+            defaults={'date': today, **rows.get(block.id, empty)}
+        )
+    for communal_council_id in communal_councils:
+        totals = CensusStats.objects.filter(
+            communal_council_id=communal_council_id, block__isnull=False
+        ).aggregate(**{field: Sum(field) for field in counts})
+        CensusStats.objects.update_or_create(
+            communal_council_id=communal_council_id, block=None,
+            defaults={
+                'date': today,
+                **{field: value or 0 for field, value in totals.items()}
+            }
+        )
+
+
+@transaction.atomic
+def rebuild_census_stats():
+    """!
+    Función que borra y recalcula los totales de todos los bloques y
+    consejos comunales
+
+    @author William Páez (paez.william8 at gmail.com)
+    """
+
+    CensusStats.objects.all().delete()
+    refresh_census_stats(list(Block.objects.values_list('id', flat=True)))
+
+
+def block_stats(blocks):
+    """!
+    Función que obtiene los totales de varios bloques. Los totales que no
+    existen o que se calcularon otro día se recalculan, ya que las edades
+    cambian con la fecha
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param blocks <b>{list}</b> Bloques
+    @return Retorna un diccionario de registros CensusStats por bloque
+    """
+
+    today = datetime.date.today()
+    stats = {
+        census_stats.block_id: census_stats
+        for census_stats in CensusStats.objects.filter(
+            block__in=blocks, date=today
+        )
+    }
+    missing = [block.id for block in blocks if block.id not in stats]
+    if missing:
+        refresh_census_stats(missing)
+        stats.update({
+            census_stats.block_id: census_stats
+            for census_stats in CensusStats.objects.filter(block__in=missing)
+        })
+    return stats
+
+
+def communal_council_stats(communal_council):
+    """!
+    Función que obtiene los totales de un consejo comunal, recalculándolos
+    si no existen o si se calcularon otro día
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param communal_council <b>{object}</b> Consejo comunal
+    @return Retorna un registro CensusStats
+    """
+
+    filters = {'communal_council': communal_council, 'block': None}
+    census_stats = CensusStats.objects.filter(
+        date=datetime.date.today(), **filters
+    ).first()
+    if census_stats is None:
+        refresh_census_stats(list(
+            communal_council.block_set.values_list('id', flat=True)
+        ))
+        census_stats = CensusStats.objects.filter(**filters).first()
+    # Consejo comunal sin bloques
+    if census_stats is None:
+        census_stats = CensusStats(**filters)
+    return census_stats
+
+
+def demographic_census():
+    """!
+    Función que obtiene el censo demográfico de todos los bloques a partir
+    de los totales guardados
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna una lista de diccionarios con los conteos de cada bloque
+    """
+
+    blocks = list(Block.objects.all())
+    stats = block_stats(blocks)
+    census = []
+    for block in blocks:
+        census.append({'block': block.name, **{
+            field: getattr(stats[block.id], field)
+            for field in DEMOGRAPHIC_FIELDS
+        }})
+    return census
+
+
+def sociodemographic_census(communal_council):
+    """!
+    Función que obtiene el censo sociodemográfico de un consejo comunal a
+    partir de los totales guardados
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param communal_council <b>{object}</b> Consejo comunal del censo
+    @return Retorna un diccionario con los conteos del consejo comunal
+    """
+
+    census_stats = communal_council_stats(communal_council)
+    return {
+        field: getattr(census_stats, field)
+        for field in SOCIODEMOGRAPHIC_FIELDS
+    }
@@ -0,0 +1,195 @@
+import datetime
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+
+# Tipo de contenido con el que se descargan los archivos excel
+EXCEL_CONTENT_TYPE = 'application/ms-excel'
+
+# Títulos que encabezan todas las hojas del censo
+CENSUS_TITLES = (
+    'VICEPRESIDENCIA TERRITORIAL PSUV ESTADOS MÉRIDA - TRUJILLO',
+    'EQUIPO POLÍTICO ESTADAL PSUV MÉRIDA',
+    'COMISIÓN DE ORGANIZACIÓN PSUV MÉRIDA',
+)
+
+# Nota que acompaña a la tabla del censo registrado
+CENSUS_NOTE = 'NOTA: TIPO DE VOTOS PERMITIDOS: DURO, BLANDO, \
+                OPOSITOR | ESTATUS DE CONTACTADO: SI O NO | JEFE DE FAMILIA: \
+                SI O NO | RECIBIÓ CLAP EN LOS ÚLTIMOS TRES MESES: SI O NO'
+
+# Estilos compartidos por todas las hojas del libro. Se registran una sola vez
+# como estilos con nombre en lugar de crear objetos Font/PatternFill por celda
+NAMED_STYLES = {
+    'census_title': {'font': Font(color='FF0000')},
+    'census_center': {'alignment': Alignment(horizontal='center')},
+    'census_header': {
+        'font': Font(color='FFFFFF'),
+        'fill': PatternFill(start_color='FF0000', fill_type='solid'),
+        'alignment': Alignment(horizontal='center'),
+    },
+    'census_header_bold': {
+        'font': Font(color='FFFFFF', bold=True),
+        'fill': PatternFill(start_color='FF0000', fill_type='solid'),
+        'alignment': Alignment(
+            horizontal='center', vertical='center', wrap_text=True
+        ),
+    },
+}
+
+
+class StreamingWorkbook:
+    """!
+    Clase que genera libros excel en modo de solo escritura. Las filas se
+    escriben en disco a medida que se agregan, por lo que la memoria usada no
+    depende de la cantidad de registros exportados
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-3.0.html'>
+        GNU Public License versión 3 (GPLv3)</a>
+    """
+
+    def __init__(self):
+        """!
+        Función que crea el libro y registra los estilos con nombre
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.workbook = Workbook(write_only=True)
+        for name, attrs in NAMED_STYLES.items():
+            self.workbook.add_named_style(NamedStyle(name=name, **attrs))
+
+    def create_sheet(self, title, widths=None, merged=None, heights=None):
+        """!
+        Función que crea una hoja. Las dimensiones y celdas combinadas deben
+        definirse antes de escribir cualquier fila
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param title <b>{string}</b> Nombre de la hoja
+        @param widths <b>{dict}</b> Ancho de las columnas, por letra
+        @param merged <b>{list}</b> Rangos de celdas combinadas
+        @param heights <b>{dict}</b> Alto de las filas, por número de fila
+        @return Retorna la hoja creada
+        """
+
+        worksheet = self.workbook.create_sheet(title=title)
+        for column, width in (widths or {}).items():
+            worksheet.column_dimensions[column].width = width
+        for row, height in (heights or {}).items():
+            worksheet.row_dimensions[row].height = height
+        for cell_range in merged or []:
+            worksheet.merged_cells.add(cell_range)
+        return worksheet
+
+    def cell(self, worksheet, value, style):
+        """!
+        Función que crea una celda con un estilo con nombre
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param worksheet <b>{object}</b> Hoja a la que pertenece la celda
+        @param value <b>{object}</b> Valor de la celda
+        @param style <b>{string}</b> Nombre del estilo registrado
+        @return Retorna la celda de solo escritura
+        """
+
+        cell = WriteOnlyCell(worksheet, value=value)
+        cell.style = style
+        return cell
+
+    def write_rows(self, worksheet, rows, start=1):
+        """!
+        Función que escribe filas numeradas en orden, rellenando con filas
+        vacías los saltos entre una y otra
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param worksheet <b>{object}</b> Hoja en la que se escribe
+        @param rows <b>{list}</b> Lista de tuplas (número de fila, valores)
+        @param start <b>{int}</b> Número de la próxima fila libre de la hoja
+        @return Retorna el número de la próxima fila libre
+        """
+
+        for number, values in rows:
+            while start < number:
+                worksheet.append([])
+                start = start + 1
+            worksheet.append(values)
+            start = start + 1
+        return start
+
+    def write_census_header(
+        self, worksheet, title, communal_council, street_leader=None
+    ):
+        """!
+        Función que escribe el encabezado de una hoja del censo con los datos
+        del consejo comunal y, si se indica, del líder de calle
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param worksheet <b>{object}</b> Hoja en la que se escribe
+        @param title <b>{string}</b> Título del censo
+        @param communal_council <b>{object}</b> Consejo comunal del censo
+        @param street_leader <b>{object}</b> Líder de calle del censo
+        @return Retorna el número de la próxima fila libre
+        """
+
+        ubch = communal_council.ubch
+        date = datetime.datetime.now()
+        rows = [
+            (number, [self.cell(worksheet, text, 'census_title')])
+            for number, text in enumerate(CENSUS_TITLES, 1)
+        ]
+        rows = rows + [
+            (6, [title]),
+            (8, [
+                'FECHA DE ACTUALIZACIÓN: ' + '%s-%s-%s %s-%s Hrs' %
+                (date.day, date.month, date.year, date.hour, date.minute)
+            ]),
+            (10, ['Municipio:', str(ubch.parish.municipality)]),
+            (11, ['Parroquia:', str(ubch.parish)]),
+            (12, ['Código UBCH:', ubch.code]),
+            (13, ['Nombre UBCH:', ubch.name]),
+            (14, ['Código Comunidad:']),
+            (15, ['Nombre Comunidad:', communal_council.name]),
+        ]
+        if street_leader:
+            rows.append((16, ['Lider de Calle:', str(street_leader.profile)]))
+        return self.write_rows(worksheet, rows)
+
+    def write_census_table_header(self, worksheet, headers, start):
+        """!
+        Función que escribe el título, la nota y las columnas de la tabla del
+        censo registrado a partir de la fila 19
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param worksheet <b>{object}</b> Hoja en la que se escribe
+        @param headers <b>{list}</b> Nombres de las columnas
+        @param start <b>{int}</b> Número de la próxima fila libre de la hoja
+        @return Retorna el número de la próxima fila libre
+        """
+
+        return self.write_rows(worksheet, [
+            (19, [self.cell(worksheet, 'CENSO REGISTRADO', 'census_center')]),
+            (20, [CENSUS_NOTE]),
+            (21, [
+                self.cell(worksheet, header, 'census_header')
+                for header in headers
+            ]),
+        ], start)
+
+    def save(self, output):
+        """!
+        Función que guarda el libro en un archivo
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param output <b>{object}</b> Archivo donde se guarda el libro
+        """
+
+        self.workbook.save(output)
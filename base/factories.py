@@ -0,0 +1,127 @@
+import datetime
+
+from django.contrib.auth.models import Group, User
+
+from user.models import (
+    CommunityLeader,
+    FamilyGroup,
+    Person,
+    Profile,
+    StreetLeader,
+)
+
+from .models import Bridge, Department
+
+# Datos de referencia y división territorial de las pruebas
+CENSUS_FIXTURES = [
+    'auth_group', '1_country', '2_estate', '3_municipality', '4_parish',
+    '1_ubch', '2_communal_council', '3_block', '4_bridge', '5_building',
+    '6_department', 'gender', 'relationship', 'vote_type',
+]
+
+
+def create_profile(username, group):
+    """!
+    Función que registra un usuario con su perfil en un grupo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param username <b>{string}</b> Nombre del usuario
+    @param group <b>{string}</b> Nombre del grupo
+    @return Retorna el objeto Profile registrado
+    """
+
+    user = User.objects.create_user(username)
+    user.groups.add(Group.objects.get(name=group))
+    return Profile.objects.create(user=user)
+
+
+def create_leaders(count):
+    """!
+    Función que registra un líder de comunidad del primer consejo comunal
+    con un líder de calle en cada uno de los primeros puentes
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param count <b>{int}</b> Cantidad de líderes de calle
+    @return Retorna una tupla con el objeto CommunityLeader y la lista de
+        objetos StreetLeader
+    """
+
+    community_leader = CommunityLeader.objects.create(
+        communal_council_id=1,
+        profile=create_profile('community', 'Líder de Comunidad'),
+    )
+    street_leaders = [
+        StreetLeader.objects.create(
+            community_leader=community_leader,
+            profile=create_profile('street%s' % bridge.id, 'Líder de Calle'),
+            bridge=bridge,
+        ) for bridge in Bridge.objects.order_by('id')[:count]
+    ]
+    return community_leader, street_leaders
+
+
+def create_family_group(street_leader, department, people, username=None):
+    """!
+    Función que registra un grupo familiar con sus personas. Las personas se
+    registran una a una para que se ejecuten las señales del censo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param street_leader <b>{object}</b> Líder de calle del grupo familiar
+    @param department <b>{object}</b> Departamento del grupo familiar
+    @param people <b>{list}</b> Lista de diccionarios con los campos de cada
+        persona. Los campos que faltan toman un valor por defecto
+    @param username <b>{string}</b> Usuario del grupo familiar, por defecto
+        family seguido de la cédula de la primera persona
+    @return Retorna el objeto FamilyGroup registrado
+    """
+
+    family_group = FamilyGroup.objects.create(
+        street_leader=street_leader,
+        profile=create_profile(
+            username or 'family%s' % people[0]['id_number'],
+            'Grupo Familiar'
+        ),
+        department=department,
+    )
+    for person in people:
+        Person.objects.create(**{
+            'birthdate': datetime.date(1980, 1, 1),
+            'admission_date': datetime.date(2020, 1, 1), 'family_head': False,
+            'gender_id': 1, 'vote_type_id': 1, 'relationship_id': 1,
+            'family_group': family_group, **person,
+        })
+    return family_group
+
+
+def create_families(street_leaders, count, start=0):
+    """!
+    Función que registra grupos familiares de cuatro personas, repartidos
+    entre los líderes de calle y los departamentos de sus puentes, con
+    personas de todas las edades
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param street_leaders <b>{list}</b> Lista de objetos StreetLeader
+    @param count <b>{int}</b> Cantidad de grupos familiares
+    @param start <b>{int}</b> Número del primer grupo familiar
+    """
+
+    today = datetime.date.today()
+    for number in range(start, start + count):
+        street_leader = street_leaders[number % len(street_leaders)]
+        departments = Department.objects.filter(
+            building__bridge=street_leader.bridge
+        ).order_by('id')
+        create_family_group(
+            street_leader, departments[number % departments.count()], [
+                {
+                    'first_name': 'Persona %s' % member,
+                    'last_name': 'Familia %s' % number,
+                    'id_number': str(30000000 + number * 10 + member),
+                    'birthdate': today - datetime.timedelta(
+                        days=(number * 7 + member * 25) % 90 * 365
+                    ),
+                    'family_head': member == 0,
+                    'gender_id': member % 2 + 1,
+                } for member in range(4)
+            ], username='family%s' % number
+        )
@@ -1,13 +1,31 @@
-import smtplib
-
-from django.conf import settings
-from django.core.mail import send_mail
+from django.db.models import F
 from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import DataVersion
+from .outbox import queue_email
+
+# Conjunto de datos del censo del que dependen los reportes
+CENSUS_DATA = 'census'
+
+# Conjunto de datos de los roles de los usuarios
+ROLES_DATA = 'roles'
+
+# Conjunto de datos de referencia de los formularios
+REFERENCE_DATA = 'reference'
+
+# Conjunto de datos de la división territorial de los campos dependientes
+TERRITORY_DATA = 'territory'
+
+# Conjunto de datos de los nombres de las personas de la búsqueda
+PEOPLE_DATA = 'people'
 
 
 def send_email(email, template, subject, vars=None):
     """!
-    Función que envía correos electrónicos
+    Función que registra un correo electrónico en la bandeja de salida. El
+    correo lo envía el comando send_queued_mail, por lo que la petición no
+    espera la conexión con el servidor de correo
 
     @author Ing. Roldan Vargas (rvargas at cenditel.gob.ve)
     @author William Páez (paez.william8 at gmail.com)
@@ -21,22 +39,45 @@ def send_email(email, template, subject, vars=None):
         electrónico.
     @param vars     <b>{object}</b> Diccionario de variables que serán pasadas
         a la plantilla de correo. El valor por defecto es Ninguno.
-    @return Devuelve verdadero si el correo fue enviado, en caso contrario,
-        devuelve falso
+    @return Devuelve verdadero si el correo quedó en la bandeja de salida, en
+        caso contrario, devuelve falso
     """
 
     if not vars:
         vars = {}
 
-    try:
-        # Obtiene la plantilla de correo a implementar
-        t = get_template(template).render(vars)
-        send_mail(
-            subject, t, settings.EMAIL_HOST_USER, [email], fail_silently=False
-        )
-        # logger.info('Correo enviado a %s usando la plantilla %s' %
-        #   (email, template))
-        return True
-    except smtplib.SMTPException as e:
-        print('Error', e)
+    if not email:
         return False
+    # Obtiene la plantilla de correo a implementar
+    t = get_template(template).render(vars)
+    queue_email(email, subject, t)
+    return True
+
+
+def data_version(name=CENSUS_DATA):
+    """!
+    Función que obtiene la versión actual de un conjunto de datos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre del conjunto de datos
+    @return Retorna un número entero con la versión
+    """
+
+    version = DataVersion.objects.filter(name=name).values_list(
+        'version', flat=True
+    ).first()
+    return version or 0
+
+
+def bump_data_version(name=CENSUS_DATA):
+    """!
+    Función que aumenta la versión de un conjunto de datos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre del conjunto de datos
+    """
+
+    if not DataVersion.objects.filter(name=name).update(
+        version=F('version') + 1, modified=timezone.now()
+    ):
+        DataVersion.objects.get_or_create(name=name, defaults={'version': 1})
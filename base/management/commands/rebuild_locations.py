@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from base.territory import refresh_locations
+from user.ordering import refresh_location_keys
+
+
+class Command(BaseCommand):
+    """!
+    Clase que recalcula la dirección completa y la posición guardadas en los
+    puentes, edificios y departamentos, y la posición de orden copiada en
+    los grupos familiares, personas, pagos y jefes familiares
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    help = 'Recalcula la dirección completa de los puentes, edificios y ' \
+        'departamentos y la posición de orden de los modelos que se ' \
+        'ordenan por ubicación'
+
+    def handle(self, *args, **options):
+        """!
+        Función que ejecuta el comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **options <b>{dict}</b> Opciones del comando
+        """
+
+        updated = refresh_locations()
+        self.stdout.write(self.style.SUCCESS(
+            'Direcciones actualizadas: %s' % sum(
+                len(ids) for ids in updated.values()
+            )
+        ))
+        self.stdout.write(self.style.SUCCESS(
+            'Posiciones de orden actualizadas: %s' % refresh_location_keys()
+        ))
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from base.reports import (
+    claim_report_job,
+    delete_expired_report_jobs,
+    release_stale_report_jobs,
+    run_report_job,
+)
+
+
+class Command(BaseCommand):
+    """!
+    Clase que genera en segundo plano los reportes solicitados, tomándolos
+    de la base de datos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    help = 'Genera en segundo plano los reportes solicitados'
+
+    def add_arguments(self, parser):
+        """!
+        Función que agrega los argumentos del comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param parser <b>{object}</b> Objeto que procesa los argumentos
+        """
+
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Genera los reportes pendientes y termina'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=2,
+            help='Segundos de espera cuando no hay reportes pendientes'
+        )
+
+    def handle(self, *args, **options):
+        """!
+        Función que ejecuta el comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **options <b>{dict}</b> Opciones del comando
+        """
+
+        while True:
+            close_old_connections()
+            delete_expired_report_jobs()
+            release_stale_report_jobs()
+            job = claim_report_job()
+            if job:
+                run_report_job(job)
+                self.stdout.write(str(job))
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['sleep'])
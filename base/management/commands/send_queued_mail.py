@@ -0,0 +1,72 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from base.outbox import (
+    delete_expired_emails,
+    release_stale_emails,
+    send_queued_emails,
+)
+
+
+class Command(BaseCommand):
+    """!
+    Clase que envía en segundo plano los correos de la bandeja de salida,
+    por lotes que comparten una conexión con el servidor de correo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    help = 'Envía los correos de la bandeja de salida'
+
+    def add_arguments(self, parser):
+        """!
+        Función que agrega los argumentos del comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param parser <b>{object}</b> Objeto que procesa los argumentos
+        """
+
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Envía los correos pendientes y termina'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=5,
+            help='Segundos de espera cuando no hay correos pendientes'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Correos enviados con cada conexión'
+        )
+
+    def handle(self, *args, **options):
+        """!
+        Función que ejecuta el comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **options <b>{dict}</b> Opciones del comando
+        """
+
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+        while True:
+            close_old_connections()
+            delete_expired_emails()
+            release_stale_emails()
+            result = send_queued_emails(options['batch_size'])
+            if result['sent'] or result['failed']:
+                self.stdout.write(
+                    'Correos enviados: %(sent)s, fallidos: %(failed)s'
+                    % result
+                )
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['sleep'])
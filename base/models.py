@@ -1,4 +1,8 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import FileSystemStorage
 from django.db import models
+from django.utils import timezone
 
 
 class Country(models.Model):
@@ -276,6 +280,13 @@ class Block(models.Model):
 
         verbose_name = 'Bloque'
         verbose_name_plural = 'Bloques'
+        indexes = [
+            # Bloques de un consejo comunal ordenados por nombre
+            models.Index(
+                fields=['communal_council', 'name'],
+                name='block_council_name_idx'
+            ),
+        ]
 
 
 class Bridge(models.Model):
@@ -296,6 +307,19 @@ class Bridge(models.Model):
         verbose_name='bloque'
     )
 
+    # Dirección completa, desde el objeto hasta el bloque. Se actualiza al
+    # cambiar cualquier objeto de la división territorial
+    full_path = models.CharField(
+        'dirección completa', max_length=255, blank=True, editable=False
+    )
+
+    # Posición del objeto en la división territorial ordenada por nombre.
+    # Las posiciones dejan espacio entre sí para que registrar o renombrar
+    # otro objeto no cambie las demás
+    sort_key = models.PositiveIntegerField(
+        'orden', default=0, db_index=True, editable=False
+    )
+
     def __str__(self):
         """!
         Función para representar la clase de forma amigable
@@ -305,7 +329,7 @@ class Bridge(models.Model):
         @return string <b>{object}</b> Objeto con el nombre
         """
 
-        return self.name + ' | ' + str(self.block)
+        return self.full_path or self.name + ' | ' + str(self.block)
 
     class Meta:
         """!
@@ -317,6 +341,12 @@ class Bridge(models.Model):
         verbose_name = 'Puente'
         verbose_name_plural = 'Puentes'
         unique_together = [('name', 'block')]
+        indexes = [
+            # Puentes de un bloque ordenados por nombre
+            models.Index(
+                fields=['block', 'name'], name='bridge_block_name_idx'
+            ),
+        ]
 
 
 class Building(models.Model):
@@ -336,6 +366,19 @@ class Building(models.Model):
         Bridge, on_delete=models.CASCADE, verbose_name='puente', null=True
     )
 
+    # Dirección completa, desde el objeto hasta el bloque. Se actualiza al
+    # cambiar cualquier objeto de la división territorial
+    full_path = models.CharField(
+        'dirección completa', max_length=255, blank=True, editable=False
+    )
+
+    # Posición del objeto en la división territorial ordenada por nombre.
+    # Las posiciones dejan espacio entre sí para que registrar o renombrar
+    # otro objeto no cambie las demás
+    sort_key = models.PositiveIntegerField(
+        'orden', default=0, db_index=True, editable=False
+    )
+
     def __str__(self):
         """!
         Función para representar la clase de forma amigable
@@ -345,7 +388,7 @@ class Building(models.Model):
         @return string <b>{object}</b> Objeto con el nombre
         """
 
-        return self.name + ' | ' + str(self.bridge)
+        return self.full_path or self.name + ' | ' + str(self.bridge)
 
     class Meta:
         """!
@@ -357,6 +400,12 @@ class Building(models.Model):
         verbose_name = 'Edificio'
         verbose_name_plural = 'Edificios'
         unique_together = [('name', 'bridge')]
+        indexes = [
+            # Edificios de un puente ordenados por nombre
+            models.Index(
+                fields=['bridge', 'name'], name='building_bridge_name_idx'
+            ),
+        ]
 
 
 class Department(models.Model):
@@ -376,6 +425,19 @@ class Department(models.Model):
         Building, on_delete=models.CASCADE, verbose_name='edificio'
     )
 
+    # Dirección completa, desde el objeto hasta el bloque. Se actualiza al
+    # cambiar cualquier objeto de la división territorial
+    full_path = models.CharField(
+        'dirección completa', max_length=255, blank=True, editable=False
+    )
+
+    # Posición del objeto en la división territorial ordenada por nombre.
+    # Las posiciones dejan espacio entre sí para que registrar o renombrar
+    # otro objeto no cambie las demás
+    sort_key = models.PositiveIntegerField(
+        'orden', default=0, db_index=True, editable=False
+    )
+
     def __str__(self):
         """!
         Función para representar la clase de forma amigable
@@ -385,7 +447,7 @@ class Department(models.Model):
         @return string <b>{object}</b> Objeto con el nombre
         """
 
-        return self.name + ' | ' + str(self.building)
+        return self.full_path or self.name + ' | ' + str(self.building)
 
     class Meta:
         """!
@@ -398,6 +460,13 @@ class Department(models.Model):
         verbose_name = 'Departamento'
         verbose_name_plural = 'Departamentos'
         unique_together = [('name', 'building')]
+        indexes = [
+            # Departamentos de un edificio ordenados por nombre
+            models.Index(
+                fields=['building', 'name'],
+                name='department_building_name_idx'
+            ),
+        ]
 
 
 class VoteType(models.Model):
@@ -500,3 +569,237 @@ class Gender(models.Model):
 
         verbose_name = 'Género'
         verbose_name_plural = 'Géneros'
+
+
+def report_storage():
+    """!
+    Función que retorna el almacenamiento de los reportes generados en
+    segundo plano. Se guardan fuera de MEDIA_ROOT para que solo se descarguen
+    a través de la vista que valida el usuario
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna un objeto FileSystemStorage
+    """
+
+    return FileSystemStorage(location=settings.REPORT_ROOT)
+
+
+class ReportJob(models.Model):
+    """!
+    Clase que contiene los reportes solicitados para generarse en segundo
+    plano
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (RUNNING, 'En proceso'),
+        (DONE, 'Terminado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    # Nombre del reporte
+    report = models.CharField('reporte', max_length=50)
+
+    # Parámetros del reporte
+    params = models.JSONField('parámetros', default=dict, blank=True)
+
+    # Estatus
+    status = models.CharField(
+        'estatus', max_length=10, choices=STATUS_CHOICES, default=PENDING
+    )
+
+    # Archivo generado
+    file = models.FileField(
+        'archivo', storage=report_storage, upload_to='%Y/%m/%d', blank=True
+    )
+
+    # Mensaje de error
+    error = models.TextField('error', blank=True)
+
+    # Fecha de creación
+    created = models.DateTimeField('creado', auto_now_add=True)
+
+    # Fecha de inicio
+    started = models.DateTimeField('iniciado', null=True, blank=True)
+
+    # Fecha de finalización
+    finished = models.DateTimeField('finalizado', null=True, blank=True)
+
+    # Fecha de expiración del archivo generado
+    expires = models.DateTimeField('expira', null=True, blank=True)
+
+    # Relación con el modelo User
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, verbose_name='usuario'
+    )
+
+    def __str__(self):
+        """!
+        Función para representar la clase de forma amigable
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return string <b>{object}</b> Objeto con el reporte y el estatus
+        """
+
+        return self.report + ' | ' + self.get_status_display()
+
+    class Meta:
+        """!
+        Meta clase del modelo que establece algunas propiedades
+
+        @author William Páez (paez.william8 at gmail.com)
+        """
+
+        ordering = ['created']
+        verbose_name = 'Reporte en segundo plano'
+        verbose_name_plural = 'Reportes en segundo plano'
+        indexes = [
+            # Reportes pendientes más antiguos
+            models.Index(
+                fields=['status', 'created'],
+                name='reportjob_status_created_idx'
+            ),
+            # Reportes expirados
+            models.Index(
+                fields=['expires'], name='reportjob_expires_idx'
+            ),
+        ]
+
+
+class DataVersion(models.Model):
+    """!
+    Clase que contiene contadores que aumentan con cada cambio de un conjunto
+    de datos, usados para invalidar los datos guardados en caché
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    # Nombre del conjunto de datos
+    name = models.CharField('nombre', max_length=50, unique=True)
+
+    # Versión de los datos
+    version = models.PositiveBigIntegerField('versión', default=0)
+
+    # Fecha y hora del último cambio de los datos
+    modified = models.DateTimeField('modificado', auto_now=True)
+
+    def __str__(self):
+        """!
+        Función para representar la clase de forma amigable
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return string <b>{object}</b> Objeto con el nombre y la versión
+        """
+
+        return self.name + ' | ' + str(self.version)
+
+    class Meta:
+        """!
+        Meta clase del modelo que establece algunas propiedades
+
+        @author William Páez (paez.william8 at gmail.com)
+        """
+
+        verbose_name = 'Versión de datos'
+        verbose_name_plural = 'Versiones de datos'
+
+
+class OutgoingEmail(models.Model):
+    """!
+    Clase que contiene los correos electrónicos pendientes por enviar. Se
+    registran en la misma transacción que los datos que los generan y los
+    envía el comando send_queued_mail
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pendiente'),
+        (SENDING, 'Enviando'),
+        (SENT, 'Enviado'),
+        (FAILED, 'Fallido'),
+    ]
+
+    # Destinatario
+    to = models.EmailField('destinatario')
+
+    # Remitente
+    from_email = models.CharField('remitente', max_length=254)
+
+    # Asunto
+    subject = models.CharField('asunto', max_length=255)
+
+    # Contenido del correo
+    body = models.TextField('contenido')
+
+    # Estatus
+    status = models.CharField(
+        'estatus', max_length=10, choices=STATUS_CHOICES, default=PENDING
+    )
+
+    # Intentos de envío realizados
+    attempts = models.PositiveSmallIntegerField('intentos', default=0)
+
+    # Fecha a partir de la cual se puede intentar el envío
+    next_attempt = models.DateTimeField(
+        'próximo intento', default=timezone.now
+    )
+
+    # Fecha en la que un proceso tomó el correo para enviarlo
+    claimed = models.DateTimeField('tomado', null=True, blank=True)
+
+    # Mensaje de error del último intento
+    error = models.TextField('error', blank=True)
+
+    # Fecha de creación
+    created = models.DateTimeField('creado', auto_now_add=True)
+
+    # Fecha de envío
+    sent = models.DateTimeField('enviado', null=True, blank=True)
+
+    def __str__(self):
+        """!
+        Función para representar la clase de forma amigable
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return string <b>{object}</b> Objeto con el destinatario y el estatus
+        """
+
+        return self.to + ' | ' + self.get_status_display()
+
+    class Meta:
+        """!
+        Meta clase del modelo que establece algunas propiedades
+
+        @author William Páez (paez.william8 at gmail.com)
+        """
+
+        ordering = ['created']
+        verbose_name = 'Correo por enviar'
+        verbose_name_plural = 'Correos por enviar'
+        indexes = [
+            # Correos pendientes cuyo próximo intento ya llegó
+            models.Index(
+                fields=['status', 'next_attempt'],
+                name='outgoingemail_status_next_idx'
+            ),
+        ]
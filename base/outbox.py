@@ -0,0 +1,194 @@
+import datetime
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger('base')
+
+# Máximo de segundos de espera entre dos intentos de envío
+MAX_RETRY_DELAY = 60 * 60
+
+
+def queue_email(to, subject, body, from_email=None):
+    """!
+    Función que registra un correo en la bandeja de salida. Si se llama
+    dentro de una transacción, el correo solo queda registrado si la
+    transacción se confirma
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param to <b>{string}</b> Dirección de correo del destinatario
+    @param subject <b>{string}</b> Asunto del correo
+    @param body <b>{string}</b> Contenido del correo
+    @param from_email <b>{string}</b> Remitente, por defecto EMAIL_HOST_USER
+    @return Retorna el objeto OutgoingEmail registrado
+    """
+
+    return OutgoingEmail.objects.create(
+        to=to, subject=subject, body=body,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+    )
+
+
+def retry_delay(attempts):
+    """!
+    Función que calcula la espera antes del siguiente intento de envío, que
+    se duplica con cada intento fallido
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param attempts <b>{int}</b> Intentos realizados
+    @return Retorna un objeto timedelta
+    """
+
+    seconds = settings.OUTGOING_EMAIL_RETRY_DELAY * 2 ** (attempts - 1)
+    return datetime.timedelta(seconds=min(seconds, MAX_RETRY_DELAY))
+
+
+def release_stale_emails():
+    """!
+    Función que devuelve a pendientes los correos tomados por un proceso que
+    no terminó de enviarlos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna la cantidad de correos liberados
+    """
+
+    limit = timezone.now() - datetime.timedelta(
+        seconds=settings.OUTGOING_EMAIL_CLAIM_TIMEOUT
+    )
+    return OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENDING, claimed__lt=limit
+    ).update(status=OutgoingEmail.PENDING, claimed=None)
+
+
+def claim_emails(limit):
+    """!
+    Función que toma los correos pendientes más antiguos cuyo próximo
+    intento ya llegó. Igual que los reportes, el cambio de estatus se hace
+    con una actualización condicional, por lo que varios procesos pueden
+    tomar correos al mismo tiempo sin repetirlos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param limit <b>{int}</b> Máximo de correos que se toman
+    @return Retorna una lista de objetos OutgoingEmail
+    """
+
+    now = timezone.now()
+    ids = [
+        email_id for email_id in OutgoingEmail.objects.filter(
+            status=OutgoingEmail.PENDING, next_attempt__lte=now
+        ).order_by('next_attempt', 'id').values_list('id', flat=True)[:limit]
+        if OutgoingEmail.objects.filter(
+            id=email_id, status=OutgoingEmail.PENDING
+        ).update(status=OutgoingEmail.SENDING, claimed=now)
+    ]
+    return list(OutgoingEmail.objects.filter(id__in=ids).order_by('id'))
+
+
+def record_failure(email, error):
+    """!
+    Función que registra un intento de envío fallido. El correo se vuelve a
+    intentar más tarde, o queda fallido si alcanzó el máximo de intentos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param email <b>{object}</b> Objeto OutgoingEmail
+    @param error <b>{object}</b> Excepción del intento
+    """
+
+    email.attempts = email.attempts + 1
+    email.error = str(error) or error.__class__.__name__
+    email.claimed = None
+    if email.attempts >= settings.OUTGOING_EMAIL_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.FAILED
+        logger.error('No se pudo enviar el correo %s a %s: %s' % (
+            email.id, email.to, email.error
+        ))
+    else:
+        email.status = OutgoingEmail.PENDING
+        email.next_attempt = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=[
+        'attempts', 'error', 'claimed', 'status', 'next_attempt'
+    ])
+
+
+def send_queued_emails(limit=50):
+    """!
+    Función que envía un lote de correos de la bandeja de salida usando una
+    sola conexión con el servidor de correo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param limit <b>{int}</b> Máximo de correos del lote
+    @return Retorna un diccionario con la cantidad de correos enviados y
+        fallidos
+    """
+
+    result = {'sent': 0, 'failed': 0}
+    emails = claim_emails(limit)
+    if not emails:
+        return result
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            record_failure(email, error)
+        result['failed'] = len(emails)
+        return result
+    try:
+        for email in emails:
+            # Cualquier error de un correo, incluso al armar el mensaje con
+            # datos inválidos, se registra como un intento fallido para que
+            # el correo no quede tomado y el resto del lote se envíe
+            try:
+                EmailMessage(
+                    email.subject, email.body, email.from_email, [email.to],
+                    connection=connection,
+                ).send()
+            except Exception as error:
+                record_failure(email, error)
+                result['failed'] = result['failed'] + 1
+                # La conexión puede quedar inutilizable después de un error,
+                # por eso se abre una nueva para el resto del lote
+                try:
+                    connection.close()
+                    connection.open()
+                except Exception:
+                    pass
+                continue
+            # El contenido enviado no se conserva, porque puede tener datos
+            # de la cuenta del destinatario
+            email.status = OutgoingEmail.SENT
+            email.attempts = email.attempts + 1
+            email.sent = timezone.now()
+            email.claimed = None
+            email.error = ''
+            email.body = ''
+            email.save(update_fields=[
+                'status', 'attempts', 'sent', 'claimed', 'error', 'body'
+            ])
+            result['sent'] = result['sent'] + 1
+    finally:
+        connection.close()
+    return result
+
+
+def delete_expired_emails():
+    """!
+    Función que elimina los correos enviados o fallidos registrados hace más
+    de OUTGOING_EMAIL_EXPIRATION segundos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna la cantidad de correos eliminados
+    """
+
+    limit = timezone.now() - datetime.timedelta(
+        seconds=settings.OUTGOING_EMAIL_EXPIRATION
+    )
+    deleted, rows = OutgoingEmail.objects.filter(
+        status__in=[OutgoingEmail.SENT, OutgoingEmail.FAILED],
+        created__lt=limit,
+    ).delete()
+    return deleted
@@ -0,0 +1,104 @@
+from collections import namedtuple
+
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .functions import REFERENCE_DATA
+from .models import DataVersion, Department, Gender, Relationship, VoteType
+
+# Modelos de las listas de referencia, por nombre de la lista
+REFERENCE_MODELS = {
+    'vote-types': VoteType,
+    'relationships': Relationship,
+    'genders': Gender,
+    'departments': Department,
+}
+
+# Lista de referencia serializada, con la versión de los datos con la que se
+# construyó, su etiqueta y la fecha de su último cambio
+ReferenceList = namedtuple(
+    'ReferenceList', ['version', 'etag', 'last_modified', 'content']
+)
+
+# Listas de referencia construidas por este proceso
+_reference_lists = {}
+
+
+def build_reference_list(name):
+    """!
+    Función que consulta y serializa una lista de referencia con el formato
+    de los campos select de los formularios
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre de la lista en REFERENCE_MODELS
+    @return Retorna el contenido json de la lista
+    """
+
+    record_list = []
+    record_list.append({
+        'id': '', 'text': 'Seleccione...'
+    })
+    model = REFERENCE_MODELS[name]
+    for pk, text in model.objects.values_list('id', 'name'):
+        record_list.append({
+            'id': pk, 'text': text
+        })
+    return JsonResponse(
+        {'status': 'true', 'list': record_list}, status=200
+    ).content
+
+
+def reference_list(name):
+    """!
+    Función que obtiene una lista de referencia. Se construye una sola vez
+    por proceso y se vuelve a construir solo cuando cambia la versión de los
+    datos de referencia
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre de la lista en REFERENCE_MODELS
+    @return Retorna un objeto ReferenceList
+    """
+
+    version, modified = DataVersion.objects.filter(
+        name=REFERENCE_DATA
+    ).values_list('version', 'modified').first() or (0, None)
+    current = _reference_lists.get(name)
+    if current is not None and current.version == version:
+        return current
+    current = ReferenceList(
+        version=version,
+        etag='"%s-%d"' % (name, version),
+        last_modified=modified.timestamp() if modified else None,
+        content=build_reference_list(name),
+    )
+    _reference_lists[name] = current
+    return current
+
+
+def reference_response(request, name):
+    """!
+    Función que retorna una lista de referencia, o una respuesta 304 si el
+    navegador ya tiene la versión actual
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param request <b>{object}</b> Objeto que contiene la petición
+    @param name <b>{string}</b> Nombre de la lista en REFERENCE_MODELS
+    @return Retorna un objeto HttpResponse
+    """
+
+    current = reference_list(name)
+    response = get_conditional_response(
+        request, etag=current.etag, last_modified=current.last_modified
+    )
+    if response is None:
+        response = HttpResponse(
+            current.content, content_type='application/json'
+        )
+    response['ETag'] = current.etag
+    if current.last_modified:
+        response['Last-Modified'] = http_date(current.last_modified)
+    # Los datos dependen del inicio de sesión, por eso el caché es privado y
+    # el navegador debe validar la versión en cada uso
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
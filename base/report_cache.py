@@ -0,0 +1,100 @@
+import datetime
+import hashlib
+import json
+import os
+from tempfile import NamedTemporaryFile
+
+from django.conf import settings
+
+from .functions import (
+    CENSUS_DATA,
+    REFERENCE_DATA,
+    TERRITORY_DATA,
+    data_version,
+)
+
+
+def report_key(name, scope, params):
+    """!
+    Función que calcula la llave de un reporte a partir de su nombre, su
+    alcance, sus parámetros, la versión del censo, la de las listas de
+    referencia y la de la división territorial, cuyos nombres aparecen en
+    los reportes, y la fecha, ya que las edades cambian con ella
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre del reporte
+    @param scope <b>{string}</b> Alcance del reporte
+    @param params <b>{dict}</b> Parámetros del reporte
+    @return Retorna una cadena hexadecimal
+    """
+
+    data = json.dumps([
+        name, scope, params, data_version(CENSUS_DATA),
+        data_version(REFERENCE_DATA), data_version(TERRITORY_DATA),
+        datetime.date.today().isoformat(),
+    ], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def cached_report(key, build):
+    """!
+    Función que abre un reporte guardado en caché. Si no existe lo genera y
+    lo guarda, eliminando los reportes usados hace más tiempo cuando la
+    caché supera REPORT_CACHE_MAX_SIZE
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param key <b>{string}</b> Llave del reporte
+    @param build <b>{object}</b> Función que escribe el reporte en un archivo
+    @return Retorna el archivo del reporte abierto para lectura
+    """
+
+    root = settings.REPORT_CACHE_ROOT
+    path = os.path.join(root, key)
+    try:
+        output = open(path, 'rb')
+    except FileNotFoundError:
+        pass
+    else:
+        # Marca el reporte como usado recientemente
+        os.utime(path)
+        return output
+    os.makedirs(root, exist_ok=True)
+    with NamedTemporaryFile(dir=root, prefix='.', delete=False) as tmp:
+        try:
+            build(tmp)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+    os.replace(tmp.name, path)
+    output = open(path, 'rb')
+    evict_reports(root, settings.REPORT_CACHE_MAX_SIZE)
+    return output
+
+
+def evict_reports(root, max_size):
+    """!
+    Función que elimina los reportes usados hace más tiempo hasta que la
+    caché ocupe como máximo el tamaño indicado
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param root <b>{string}</b> Directorio de la caché
+    @param max_size <b>{int}</b> Tamaño máximo en bytes
+    """
+
+    entries = []
+    size = 0
+    with os.scandir(root) as files:
+        for entry in files:
+            if entry.name.startswith('.') or not entry.is_file():
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            size = size + stat.st_size
+    for _, file_size, path in sorted(entries):
+        if size <= max_size:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        size = size - file_size
@@ -0,0 +1,633 @@
+import datetime
+import logging
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.files import File
+from django.http import FileResponse
+from django.template.loader import render_to_string
+from django.utils import timezone
+from weasyprint import HTML
+from weasyprint.text.fonts import FontConfiguration
+
+from user.models import (
+    CommunityLeader,
+    Person,
+    StreetLeader,
+)
+
+from .census_data import (
+    address,
+    age,
+    census_by_street_leader,
+    census_families,
+    census_people,
+    full_name,
+)
+from .demographics import demographic_census, sociodemographic_census
+from .excel import EXCEL_CONTENT_TYPE, StreamingWorkbook
+from .models import ReportJob
+from .report_cache import cached_report, report_key
+
+logger = logging.getLogger('base')
+
+# Tipo de contenido con el que se muestran los archivos pdf
+PDF_CONTENT_TYPE = 'application/pdf'
+
+# Reporte con la función que lo genera, el nombre y tipo de contenido del
+# archivo, los grupos de usuarios que pueden generarlo, la función que
+# obtiene su alcance, es decir, de qué datos del usuario depende, y los
+# parámetros de edad que requiere
+Report = namedtuple(
+    'Report',
+    ['build', 'filename', 'content_type', 'groups', 'scope', 'params'],
+    defaults=[()]
+)
+
+
+def global_scope(user):
+    """!
+    Función que retorna el alcance de los reportes que no dependen del
+    usuario
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @return Retorna una cadena con el alcance
+    """
+
+    return 'all'
+
+
+def leader_scope(user):
+    """!
+    Función que retorna el alcance de los reportes que dependen del líder de
+    comunidad o líder de calle que los solicita
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @return Retorna una cadena con el alcance
+    """
+
+    community_leader = CommunityLeader.objects.filter(
+        profile__user=user
+    ).values_list('id', flat=True).first()
+    if community_leader:
+        return 'community_leader:%s' % community_leader
+    street_leader = StreetLeader.objects.filter(
+        profile__user=user
+    ).values_list('id', flat=True).first()
+    return 'street_leader:%s' % street_leader
+
+
+def communal_council_scope(user):
+    """!
+    Función que retorna el alcance de los reportes que dependen del consejo
+    comunal del líder de comunidad que los solicita
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @return Retorna una cadena con el alcance
+    """
+
+    return 'communal_council:%s' % CommunityLeader.objects.filter(
+        profile__user=user
+    ).values_list('communal_council', flat=True).first()
+
+
+def write_pdf(template_name, context, output):
+    """!
+    Función que genera un archivo pdf a partir de una plantilla
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param template_name <b>{string}</b> Nombre de la plantilla
+    @param context <b>{dict}</b> Contexto de la plantilla
+    @param output <b>{object}</b> Archivo donde se escribe el pdf
+    """
+
+    html = render_to_string(template_name, context)
+    HTML(string=html).write_pdf(
+        output,
+        font_config=FontConfiguration(),
+    )
+
+
+def family_heads(people):
+    """!
+    Función que relaciona cada persona con el jefe de su grupo familiar
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param people <b>{object}</b> Queryset del modelo Person
+    @return Retorna una lista de diccionarios con el jefe familiar y la
+        persona
+    """
+
+    childrens = []
+    for person in people.select_related(
+        'family_group__department__building__bridge__block'
+    ).prefetch_related('family_group__person_set'):
+        for person2 in person.family_group.person_set.all():
+            if person2.family_head:
+                childrens.append({
+                    'family_head': person2,
+                    'children': person
+                })
+    return childrens
+
+
+def census_report(user, params, output):
+    """!
+    Función que genera el censo en excel de un líder de comunidad, con una
+    hoja por cada líder de calle
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte
+    @param output <b>{object}</b> Archivo donde se escribe el reporte
+    """
+
+    workbook = StreamingWorkbook()
+    community_leader = CommunityLeader.objects.select_related(
+        'communal_council__ubch__parish__municipality'
+    ).get(profile=user.profile)
+    communal_council = community_leader.communal_council
+    street_leaders = StreetLeader.objects.filter(
+        community_leader=community_leader
+    ).select_related('profile__user').order_by('id')
+
+    worksheet1 = workbook.create_sheet(
+        'Hoja 1', widths={'A': 20}, merged=['A1:H1', 'A2:H2', 'A3:H3']
+    )
+    start = workbook.write_census_header(
+        worksheet1, 'CENSO RAAS', communal_council
+    )
+    workbook.write_rows(worksheet1, [
+        (17, ['Calles Registradas:', str(len(street_leaders))]),
+    ], start)
+
+    # Hojas con los censos
+    i = 2
+    for street_leader, families in census_by_street_leader(
+        street_leaders, census_people(
+            family_group__street_leader__community_leader=community_leader
+        )
+    ):
+        worksheet = workbook.create_sheet(
+            'Hoja ' + str(i),
+            widths={
+                'A': 16, 'B': 30, 'C': 16, 'D': 25, 'E': 20, 'F': 20,
+                'G': 20, 'H': 15, 'I': 10, 'J': 10,
+            },
+            merged=['A1:J1', 'A2:J2', 'A3:J3', 'A19:J19', 'A20:J20'],
+        )
+        start = workbook.write_census_header(
+            worksheet, 'CENSO CALLE RAAS', communal_council, street_leader
+        )
+        workbook.write_census_table_header(worksheet, [
+            'CÉDULA', 'NOMBRES Y APELLIDOS', 'TELÉFONO', 'Correo',
+            'TIPO DE VOTO', 'PARENTESCO', 'ES JEFE DE FAMILIA',
+            'Apartamento', 'Edificio', 'Bloque',
+        ], start)
+        for family in families:
+            for person in family:
+                row = [
+                    person.id_number,
+                    full_name(person),
+                    person.phone,
+                    person.email,
+                    str(person.vote_type),
+                    str(person.relationship),
+                ]
+                if person.family_head:
+                    row = row + [
+                        'SI',
+                        person.department,
+                        person.building,
+                        person.block,
+                    ]
+                else:
+                    row.append('No')
+                worksheet.append(row)
+            worksheet.append([' '])
+
+        i = i + 1
+
+    workbook.save(output)
+
+
+def street_leader_census_report(user, params, output):
+    """!
+    Función que genera el censo en excel de los jefes familiares de un líder
+    de calle
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte
+    @param output <b>{object}</b> Archivo donde se escribe el reporte
+    """
+
+    workbook = StreamingWorkbook()
+    street_leader = StreetLeader.objects.select_related(
+        'profile__user',
+        'community_leader__communal_council__ubch__parish__municipality',
+    ).get(profile=user.profile)
+    community_leader = street_leader.community_leader
+    worksheet = workbook.create_sheet(
+        'Hoja 1',
+        widths={
+            'A': 16, 'B': 25, 'C': 16, 'D': 25, 'E': 20, 'F': 20, 'G': 20,
+        },
+        merged=['A1:H1', 'A2:H2', 'A3:H3', 'A19:H19', 'A20:H20'],
+    )
+    start = workbook.write_census_header(
+        worksheet, 'CENSO CALLE RAAS', community_leader.communal_council,
+        street_leader
+    )
+    workbook.write_census_table_header(worksheet, [
+        'CÉDULA', 'NOMBRES Y APELLIDOS', 'TELÉFONO', 'Correo',
+        'TIPO DE VOTO', 'PARENTESCO', 'ES JEFE DE FAMILIA',
+    ], start)
+    # Solo jefes familiares
+    for family in census_families(census_people(
+        family_group__street_leader=street_leader, family_head=True
+    )):
+        for person in family:
+            worksheet.append([
+                person.id_number,
+                full_name(person),
+                person.phone,
+                person.email,
+                str(person.vote_type),
+                str(person.relationship),
+                'SI',
+            ])
+        worksheet.append([' '])
+
+    workbook.save(output)
+
+
+def older_adult_report(user, params, output):
+    """!
+    Función que genera en excel los grupos familiares con adultos mayores de
+    un líder de comunidad
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte
+    @param output <b>{object}</b> Archivo donde se escribe el reporte
+    """
+
+    workbook = StreamingWorkbook()
+    community_leader = CommunityLeader.objects.select_related(
+        'communal_council__ubch__parish__municipality'
+    ).get(profile=user.profile)
+    worksheet = workbook.create_sheet(
+        'Hoja 1',
+        widths={
+            'A': 30, 'B': 30, 'C': 30, 'D': 30, 'E': 50, 'F': 50,
+            'G': 50, 'H': 30, 'I': 50, 'J': 50, 'K': 30, 'L': 30,
+            'M': 30, 'N': 30, 'O': 30, 'P': 30, 'Q': 30, 'R': 30,
+            'S': 30, 'T': 30,
+        },
+        heights={1: 60},
+    )
+    worksheet.append([
+        workbook.cell(worksheet, header, 'census_header_bold')
+        for header in [
+            'Municipio',
+            'Parroquia',
+            'Nombre del CLAP',
+            'Comunidades Asociadas al CLAP',
+            'Jefe de Calle',
+            'Cédula de Identidad del Jefe de Familia (Solo números)',
+            'Nombres y Apellidos del Jefe de Familia',
+            'Teléfono',
+            'Dirección Exacta (Calle/Edif/Avenida,numero)',
+            'Cantidad de Carga Familiar (incluyendo del Jefe de Familia)',
+        ] + [
+            'Cédula Carga Familiar ' + str(i) for i in range(1, 11)
+        ]
+    ])
+    parish = community_leader.communal_council.ubch.parish
+    street_leaders = StreetLeader.objects.filter(
+        community_leader=community_leader
+    ).select_related('profile__user').order_by('id')
+    for street_leader, families in census_by_street_leader(
+        street_leaders, census_people(
+            family_group__street_leader__community_leader=community_leader,
+            # Solo grupos familiares con al menos un adulto mayor
+            family_group__in=Person.objects.age_at_least(45).values(
+                'family_group'
+            ),
+        )
+    ):
+        for family in families:
+            family_head = [
+                person for person in family if person.family_head
+            ]
+            members = [person.id_number for person in family]
+            for person in family:
+                if age(person) >= 45:
+                    worksheet.append([
+                        str(parish.municipality),
+                        str(parish),
+                        'Domingo Salazar Rojas',
+                        None,
+                        str(street_leader.profile),
+                        str(family_head[0].id_number),
+                        full_name(family_head[0]),
+                        family_head[0].phone,
+                        address(family_head[0]),
+                        len(members),
+                    ] + members[:10])
+    workbook.save(output)
+
+
+def voter_report(user, params, output):
+    """!
+    Función que genera en pdf los votantes mayores o iguales a una edad
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte, con la edad en age
+    @param output <b>{object}</b> Archivo donde se escribe el reporte
+    """
+
+    age = int(params.get('age'))
+    if CommunityLeader.objects.filter(profile__user=user):
+        community_leader = CommunityLeader.objects.get(profile__user=user)
+        people = Person.objects.filter(
+            family_group__street_leader__community_leader=community_leader
+        )
+    elif StreetLeader.objects.filter(profile__user=user):
+        street_leader = StreetLeader.objects.get(profile__user=user)
+        people = Person.objects.filter(
+            family_group__street_leader=street_leader
+        )
+    else:
+        people = Person.objects.none()
+    context = {}
+    context['people'] = people.age_at_least(age).select_related(
+        'vote_type', 'family_group__department__building__bridge__block'
+    )
+    write_pdf('base/voter.html', context, output)
+
+
+def demographic_census_report(user, params, output):
+    """!
+    Función que genera en pdf el censo demográfico
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte
+    @param output <b>{object}</b> Archivo donde se escribe el reporte
+    """
+
+    context = {}
+    context['census'] = demographic_census()
+    write_pdf('base/demographic_census.html', context, output)
+
+
+def vacation_plan_report(user, params, output):
+    """!
+    Función que genera en pdf los niños entre 7 y 12 años de edad
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte
+    @param output <b>{object}</b> Archivo donde se escribe el reporte
+    """
+
+    context = {}
+    context['people'] = family_heads(Person.objects.age_between(7, 12))
+    write_pdf('base/vacation_plan.html', context, output)
+
+
+def filter_age_report(user, params, output):
+    """!
+    Función que genera en pdf las personas entre 2 edades
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte, con las edades en
+        age1 y age2
+    @param output <b>{object}</b> Archivo donde se escribe el reporte
+    """
+
+    age1 = int(params.get('age1'))
+    age2 = int(params.get('age2'))
+    if CommunityLeader.objects.filter(profile__user=user):
+        community_leader = CommunityLeader.objects.get(profile__user=user)
+        communal_council = community_leader.communal_council
+        people = Person.objects.filter(**{
+            'family_group__street_leader__community_leader__'
+            'communal_council': communal_council
+        })
+    elif StreetLeader.objects.filter(profile__user=user):
+        street_leader = StreetLeader.objects.get(profile__user=user)
+        people = Person.objects.filter(
+            family_group__street_leader=street_leader
+        )
+    else:
+        people = Person.objects.none()
+    context = {}
+    context['people'] = family_heads(people.age_between(age1, age2))
+    write_pdf('base/filter_age.html', context, output)
+
+
+def sociodemographic_report(user, params, output):
+    """!
+    Función que genera en pdf el censo sociodemográfico del consejo comunal
+    de un líder de comunidad
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte
+    @param output <b>{object}</b> Archivo donde se escribe el reporte
+    """
+
+    community_leader = CommunityLeader.objects.get(profile__user=user)
+    communal_council = community_leader.communal_council
+    context = {}
+    context['census'] = [sociodemographic_census(communal_council)]
+    write_pdf('base/sociodemographic.html', context, output)
+
+
+# Reportes que se pueden generar, por nombre
+REPORTS = {
+    'census': Report(
+        census_report, 'censo.xlsx', EXCEL_CONTENT_TYPE,
+        ['Líder de Comunidad'], leader_scope
+    ),
+    'street-leader-census': Report(
+        street_leader_census_report, 'censo.xlsx', EXCEL_CONTENT_TYPE,
+        ['Líder de Calle'], leader_scope
+    ),
+    'older-adult': Report(
+        older_adult_report, 'censo_estado_mayor.xlsx', EXCEL_CONTENT_TYPE,
+        ['Líder de Comunidad'], leader_scope
+    ),
+    'voter': Report(
+        voter_report, 'votantes.pdf', PDF_CONTENT_TYPE,
+        ['Líder de Comunidad', 'Líder de Calle'], leader_scope, ['age']
+    ),
+    'demographic-census': Report(
+        demographic_census_report, 'censo-demografico.pdf', PDF_CONTENT_TYPE,
+        ['Líder de Comunidad'], global_scope
+    ),
+    'vacation-plan': Report(
+        vacation_plan_report, 'plan-vacacional.pdf', PDF_CONTENT_TYPE,
+        ['Líder de Comunidad'], global_scope
+    ),
+    'filter-age': Report(
+        filter_age_report, 'edades.pdf', PDF_CONTENT_TYPE,
+        ['Líder de Comunidad', 'Líder de Calle'], leader_scope,
+        ['age1', 'age2']
+    ),
+    'sociodemographic': Report(
+        sociodemographic_report, 'sociodemografico.pdf', PDF_CONTENT_TYPE,
+        ['Líder de Comunidad'], communal_council_scope
+    ),
+}
+
+
+def report_params(name, data):
+    """!
+    Función que valida los parámetros de edad de un reporte antes de
+    solicitarlo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre del reporte en REPORTS
+    @param data <b>{dict}</b> Datos recibidos en la petición
+    @return Retorna una tupla con los parámetros convertidos a enteros y un
+        diccionario con los errores de cada parámetro
+    """
+
+    params, errors = {}, {}
+    for field in REPORTS[name].params:
+        value = data.get(field, '').strip()
+        if value.isdigit():
+            params[field] = int(value)
+        else:
+            errors[field] = ['Indique una edad válida']
+    return params, errors
+
+
+def build_report(name, user, params):
+    """!
+    Función que obtiene el archivo de un reporte desde la caché, o lo genera
+    si los datos cambiaron desde la última vez
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre del reporte en REPORTS
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte
+    @return Retorna el archivo del reporte abierto para lectura
+    """
+
+    report = REPORTS[name]
+    # Solo los parámetros del reporte forman parte de la llave, para que
+    # otros parámetros de la dirección no generen copias del mismo reporte
+    params = {
+        field: str(params[field]) for field in report.params
+        if field in params
+    }
+    key = report_key(name, report.scope(user), params)
+    return cached_report(
+        key, lambda output: report.build(user, params, output)
+    )
+
+
+def report_response(name, user, params):
+    """!
+    Función que envía por partes al cliente el archivo de un reporte. Los pdf
+    se muestran en el navegador y los excel se descargan
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre del reporte en REPORTS
+    @param user <b>{object}</b> Usuario que solicita el reporte
+    @param params <b>{dict}</b> Parámetros del reporte
+    @return Retorna la respuesta con el archivo del reporte
+    """
+
+    report = REPORTS[name]
+    return FileResponse(
+        build_report(name, user, params),
+        as_attachment=report.content_type != PDF_CONTENT_TYPE,
+        filename=report.filename, content_type=report.content_type
+    )
+
+
+def run_report_job(job):
+    """!
+    Función que genera el archivo de un reporte solicitado en segundo plano y
+    registra el resultado
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param job <b>{object}</b> Objeto ReportJob en proceso
+    """
+
+    report = REPORTS[job.report]
+    try:
+        with build_report(job.report, job.user, job.params) as output:
+            job.file.save(report.filename, File(output), save=False)
+        job.status = ReportJob.DONE
+    except Exception as e:
+        logger.error('Error al generar el reporte %s: %s' % (job.id, e))
+        job.status = ReportJob.FAILED
+        job.error = str(e)
+    job.finished = timezone.now()
+    job.expires = job.finished + datetime.timedelta(
+        seconds=settings.REPORT_JOB_EXPIRATION
+    )
+    job.save()
+
+
+def claim_report_job():
+    """!
+    Función que toma el reporte pendiente más antiguo. El cambio de estatus
+    se hace con una actualización condicional, por lo que varios procesos
+    pueden tomar reportes al mismo tiempo sin repetirlos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna el objeto ReportJob tomado o None si no hay pendientes
+    """
+
+    for job_id in ReportJob.objects.filter(
+        status=ReportJob.PENDING
+    ).values_list('id', flat=True)[:10]:
+        if ReportJob.objects.filter(
+            id=job_id, status=ReportJob.PENDING
+        ).update(status=ReportJob.RUNNING, started=timezone.now()):
+            return ReportJob.objects.select_related('user').get(id=job_id)
+    return None
+
+
+def release_stale_report_jobs():
+    """!
+    Función que devuelve a pendientes los reportes tomados por un proceso
+    que no terminó de generarlos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna la cantidad de reportes liberados
+    """
+
+    limit = timezone.now() - datetime.timedelta(
+        seconds=settings.REPORT_JOB_TIMEOUT
+    )
+    return ReportJob.objects.filter(
+        status=ReportJob.RUNNING, started__lt=limit
+    ).update(status=ReportJob.PENDING, started=None)
+
+
+def delete_expired_report_jobs():
+    """!
+    Función que elimina los reportes expirados junto a sus archivos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna la cantidad de reportes eliminados
+    """
+
+    jobs = ReportJob.objects.filter(expires__lt=timezone.now())
+    for job in jobs:
+        job.file.delete(save=False)
+    return jobs.delete()[0]
@@ -1,10 +1,10 @@
 from django import template
-from django.contrib.auth.models import Group
+
+from user.roles import user_groups
 
 register = template.Library()
 
 
 @register.filter(name='has_group')
 def has_group(user, group_name):
-    group = Group.objects.get(name=group_name)
-    return True if group in user.groups.all() else False
+    return group_name in user_groups(user)
@@ -0,0 +1,409 @@
+import gzip
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+from django.db import transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+
+from .functions import TERRITORY_DATA, data_version
+from .models import (
+    Block,
+    Bridge,
+    Building,
+    CommunalCouncil,
+    Country,
+    Department,
+    Estate,
+    Municipality,
+    Parish,
+    Ubch,
+)
+
+# Niveles de la división territorial, de mayor a menor: nombre del nivel,
+# modelo y campo que lo relaciona con el nivel anterior
+LEVELS = (
+    ('countries', Country, None),
+    ('estates', Estate, 'country'),
+    ('municipalities', Municipality, 'estate'),
+    ('parishes', Parish, 'municipality'),
+    ('ubchs', Ubch, 'parish'),
+    ('communal_councils', CommunalCouncil, 'ubch'),
+    ('blocks', Block, 'communal_council'),
+    ('bridges', Bridge, 'block'),
+    ('buildings', Building, 'bridge'),
+    ('departments', Department, 'building'),
+)
+
+# Posición de cada nivel en LEVELS
+LEVEL_POSITIONS = {name: depth for depth, (name, *_) in enumerate(LEVELS)}
+
+# Arreglos paralelos de un nivel: identificadores, identificadores de los
+# padres, nombres, posición del padre en el nivel anterior y posición de
+# cada identificador
+Level = namedtuple(
+    'Level', ['ids', 'parents', 'names', 'parent_positions', 'positions']
+)
+
+# Índice de la división territorial y su versión comprimida en json
+Territory = namedtuple(
+    'Territory', ['version', 'etag', 'levels', 'content', 'compressed']
+)
+
+# Niveles que guardan su dirección completa y su posición, desde el nivel
+# de los bloques
+LOCATION_LEVELS = ('blocks', 'bridges', 'buildings', 'departments')
+
+# Mayor posición que se puede guardar en un PositiveIntegerField
+MAX_SORT_KEY = 2 ** 31 - 1
+
+# Separación entre las posiciones nuevas que se agregan al final de un
+# nivel, para que los objetos que se registren después quepan entre ellas
+SORT_KEY_GAP = 2 ** 12
+
+# Índice construido por este proceso para la versión actual de la división
+# territorial
+_territory = {'current': None}
+
+
+def build_levels():
+    """!
+    Función que consulta la división territorial con una consulta por nivel
+    y la ordena de forma que los hijos de cada objeto, y todos sus
+    descendientes en cada nivel inferior, queden contiguos y ordenados por
+    nombre
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna una lista de objetos Level, uno por cada nivel de LEVELS
+    """
+
+    levels = []
+    previous = None
+    for name, model, parent in LEVELS:
+        fields = ('id', parent, 'name') if parent else ('id', 'name')
+        rows = model.objects.order_by().values_list(*fields)
+        if parent is None:
+            rows = [(pk, None, text) for pk, text in rows]
+        # Los objetos sin padre quedan al final, fuera de los rangos de
+        # descendientes
+        missing = len(previous.ids) if previous else 0
+        rows = sorted(
+            (
+                previous.positions.get(parent_id, missing)
+                if previous else 0,
+                text, pk, parent_id,
+            )
+            for pk, parent_id, text in rows
+        )
+        ids = [row[2] for row in rows]
+        previous = Level(
+            ids=ids,
+            parents=[row[3] for row in rows],
+            names=[row[1] for row in rows],
+            parent_positions=[row[0] for row in rows],
+            positions={pk: position for position, pk in enumerate(ids)},
+        )
+        levels.append(previous)
+    return levels
+
+
+def kept_keys(keys):
+    """!
+    Función que obtiene las posiciones actuales que se pueden conservar: la
+    mayor cantidad de posiciones que ya están en orden creciente. Se usa la
+    búsqueda de la subsecuencia creciente más larga
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param keys <b>{list}</b> Posiciones actuales en el orden nuevo, 0 si el
+        objeto no tiene posición
+    @return Retorna un conjunto con los índices de las posiciones que se
+        conservan
+    """
+
+    # tails[length] es el índice del menor final de una subsecuencia de
+    # largo length + 1, y previous el índice anterior de cada subsecuencia
+    tails, tail_keys, previous = [], [], {}
+    for index, key in enumerate(keys):
+        if key <= 0:
+            continue
+        length = bisect_left(tail_keys, key)
+        previous[index] = tails[length - 1] if length else None
+        if length == len(tails):
+            tails.append(index)
+            tail_keys.append(key)
+        else:
+            tails[length] = index
+            tail_keys[length] = key
+    kept = set()
+    index = tails[-1] if tails else None
+    while index is not None:
+        kept.add(index)
+        index = previous[index]
+    return kept
+
+
+def stable_keys(keys):
+    """!
+    Función que calcula las posiciones de un nivel en su orden nuevo
+    conservando las posiciones que ya estaban en orden. Los objetos nuevos,
+    renombrados o movidos toman posiciones libres entre sus vecinos, y solo
+    si no hay espacio se vuelven a repartir las posiciones de algunos
+    vecinos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param keys <b>{list}</b> Posiciones actuales en el orden nuevo, 0 si el
+        objeto no tiene posición
+    @return Retorna una lista de posiciones crecientes mayores que 0
+    """
+
+    kept = kept_keys(keys)
+    result = [
+        key if index in kept else None for index, key in enumerate(keys)
+    ]
+    total = len(result)
+    index = 0
+    while index < total:
+        if result[index] is not None:
+            index = index + 1
+            continue
+        start = end = index
+        while end < total and result[end] is None:
+            end = end + 1
+        while True:
+            low = result[start - 1] if start else 0
+            high = result[end] if end < total else MAX_SORT_KEY + 1
+            if high - low > end - start:
+                break
+            # No hay espacio entre los vecinos, se toma también el vecino
+            # de cada lado para repartir sus posiciones
+            start = max(start - 1, 0)
+            end = min(end + 1, total)
+            while end < total and result[end] is None:
+                end = end + 1
+        step = (high - low) // (end - start + 1)
+        if end == total:
+            step = min(step, SORT_KEY_GAP)
+        for offset in range(end - start):
+            result[start + offset] = low + (offset + 1) * step
+        index = end
+    return result
+
+
+def refresh_locations(levels=None):
+    """!
+    Función que actualiza la dirección completa y la posición guardadas en
+    los puentes, edificios y departamentos. Las posiciones que siguen en
+    orden se conservan, por lo que registrar o renombrar un objeto solo
+    cambia su posición y la de sus descendientes. Solo se escriben los
+    objetos que cambiaron, con bulk_update para no volver a disparar las
+    señales
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param levels <b>{list}</b> Lista de objetos Level, por defecto se
+        consulta la división territorial actual
+    @return Retorna un diccionario con la lista de identificadores de los
+        objetos actualizados de cada nivel, sin los niveles que no cambiaron
+    """
+
+    if levels is None:
+        levels = build_levels()
+    depth = LEVEL_POSITIONS[LOCATION_LEVELS[0]]
+    paths = levels[depth].names
+    updated = {}
+    with transaction.atomic():
+        for name in LOCATION_LEVELS[1:]:
+            depth = depth + 1
+            level = levels[depth]
+            model = LEVELS[depth][1]
+            # Igual que en __str__, un objeto sin padre se muestra con None
+            paths = [
+                text + ' | ' + (
+                    paths[position] if position < len(paths) else 'None'
+                )
+                for text, position in zip(level.names, level.parent_positions)
+            ]
+            current = {
+                pk: (full_path, sort_key)
+                for pk, full_path, sort_key in model.objects.order_by(
+                ).values_list('id', 'full_path', 'sort_key')
+            }
+            sort_keys = stable_keys([
+                current.get(pk, ('', 0))[1] for pk in level.ids
+            ])
+            changed = [
+                model(id=pk, full_path=full_path, sort_key=sort_key)
+                for pk, full_path, sort_key in zip(level.ids, paths, sort_keys)
+                if current.get(pk) != (full_path, sort_key)
+            ]
+            model.objects.bulk_update(
+                changed, ['full_path', 'sort_key'], batch_size=1000
+            )
+            if changed:
+                updated[name] = [obj.id for obj in changed]
+    return updated
+
+
+def build_snapshot(version, levels):
+    """!
+    Función que serializa la división territorial en json con un arreglo de
+    identificadores, uno de padres y uno de nombres por nivel
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param version <b>{int}</b> Versión de la división territorial
+    @param levels <b>{list}</b> Lista de objetos Level
+    @return Retorna el contenido json
+    """
+
+    return JsonResponse({
+        'version': version,
+        'levels': [name for name, *_ in LEVELS],
+        'ids': {
+            name: level.ids for (name, *_), level in zip(LEVELS, levels)
+        },
+        'parents': {
+            name: level.parents for (name, *_), level in zip(LEVELS, levels)
+        },
+        'names': {
+            name: level.names for (name, *_), level in zip(LEVELS, levels)
+        },
+    }, json_dumps_params={'separators': (',', ':')}).content
+
+
+def territory():
+    """!
+    Función que obtiene el índice de la división territorial. Se construye
+    la primera vez que se usa en el proceso y se vuelve a construir solo
+    cuando cambia la versión de la división territorial
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna un objeto Territory
+    """
+
+    version = data_version(TERRITORY_DATA)
+    current = _territory['current']
+    if current is not None and current.version == version:
+        return current
+    levels = build_levels()
+    content = build_snapshot(version, levels)
+    current = Territory(
+        version=version,
+        etag='"territory-%d"' % version,
+        levels=levels,
+        content=content,
+        compressed=gzip.compress(content, mtime=0),
+    )
+    _territory['current'] = current
+    return current
+
+
+def children(level, pk):
+    """!
+    Función que obtiene los hijos de un objeto de la división territorial,
+    ordenados por nombre
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param level <b>{string}</b> Nombre del nivel del objeto en LEVELS
+    @param pk <b>{int}</b> Identificador del objeto
+    @return Retorna una lista de tuplas con el identificador y el nombre
+    """
+
+    levels = territory().levels
+    depth = LEVEL_POSITIONS[level]
+    position = levels[depth].positions.get(pk)
+    if position is None or depth + 1 == len(levels):
+        return []
+    child = levels[depth + 1]
+    start = bisect_left(child.parent_positions, position)
+    end = bisect_right(child.parent_positions, position, start)
+    return list(zip(child.ids[start:end], child.names[start:end]))
+
+
+def ancestors(pk, level='departments'):
+    """!
+    Función que obtiene los objetos de los que depende un objeto de la
+    división territorial, desde el país hasta el objeto
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param pk <b>{int}</b> Identificador del objeto
+    @param level <b>{string}</b> Nombre del nivel del objeto en LEVELS
+    @return Retorna una lista de tuplas con el nivel, el identificador y el
+        nombre, vacía si el objeto no existe
+    """
+
+    levels = territory().levels
+    depth = LEVEL_POSITIONS[level]
+    position = levels[depth].positions.get(pk)
+    result = []
+    while position is not None and depth >= 0:
+        current = levels[depth]
+        result.append(
+            (LEVELS[depth][0], current.ids[position], current.names[position])
+        )
+        if current.parents[position] is None:
+            break
+        position = current.parent_positions[position]
+        depth = depth - 1
+    result.reverse()
+    return result
+
+
+def descendants(pk, level='blocks'):
+    """!
+    Función que obtiene los identificadores de todos los objetos que
+    dependen de un objeto de la división territorial. Como los descendientes
+    de cada nivel están contiguos, solo se buscan los límites de un rango
+    por nivel
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param pk <b>{int}</b> Identificador del objeto
+    @param level <b>{string}</b> Nombre del nivel del objeto en LEVELS
+    @return Retorna un diccionario con la lista de identificadores de cada
+        nivel inferior
+    """
+
+    levels = territory().levels
+    depth = LEVEL_POSITIONS[level]
+    position = levels[depth].positions.get(pk)
+    result = {}
+    if position is None:
+        return result
+    start, end = position, position + 1
+    for depth in range(depth + 1, len(levels)):
+        child = levels[depth]
+        start = bisect_left(child.parent_positions, start)
+        end = bisect_left(child.parent_positions, end, start)
+        result[LEVELS[depth][0]] = child.ids[start:end]
+    return result
+
+
+def territory_response(request):
+    """!
+    Función que retorna la división territorial completa, comprimida con
+    gzip si el navegador lo acepta, o una respuesta 304 si el navegador ya
+    tiene la versión actual
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param request <b>{object}</b> Objeto que contiene la petición
+    @return Retorna un objeto HttpResponse
+    """
+
+    current = territory()
+    response = get_conditional_response(request, etag=current.etag)
+    if response is None:
+        if 'gzip' in request.headers.get('accept-encoding', ''):
+            response = HttpResponse(
+                current.compressed, content_type='application/json'
+            )
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(
+                current.content, content_type='application/json'
+            )
+    response['ETag'] = current.etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1 +1,1127 @@
-from django.test import TestCase
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.files.storage import FileSystemStorage
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from user.models import (
+    CensusStats,
+    FamilyGroup,
+    Person,
+    Profile,
+    calculate_age,
+)
+
+from .cascades import CASCADES
+from .demographics import (
+    BLOCK_PATH,
+    DEMOGRAPHIC_BRACKETS,
+    FEMALE,
+    SOCIODEMOGRAPHIC_BRACKETS,
+    count_brackets,
+    refresh_census_stats,
+)
+from .factories import (
+    CENSUS_FIXTURES,
+    create_families,
+    create_family_group,
+    create_leaders,
+    create_profile,
+)
+from .models import (
+    Block,
+    Bridge,
+    Building,
+    Department,
+    Gender,
+    OutgoingEmail,
+    ReportJob,
+    Ubch,
+)
+from .outbox import (
+    MAX_RETRY_DELAY,
+    claim_emails,
+    delete_expired_emails,
+    queue_email,
+    record_failure,
+    release_stale_emails,
+    retry_delay,
+    send_queued_emails,
+)
+from .reference_data import _reference_lists
+from .report_cache import report_key
+from .reports import (
+    REPORTS,
+    Report,
+    build_report,
+    census_report,
+    claim_report_job,
+    delete_expired_report_jobs,
+    global_scope,
+    older_adult_report,
+    release_stale_report_jobs,
+    run_report_job,
+    street_leader_census_report,
+)
+from .territory import (
+    MAX_SORT_KEY,
+    SORT_KEY_GAP,
+    _territory,
+    children,
+    kept_keys,
+    refresh_locations,
+    stable_keys,
+    territory,
+)
+
+# Personas de la población de prueba del censo sociodemográfico
+POPULATION_SIZE = 100000
+
+# Personas por grupo familiar de la población de prueba
+POPULATION_FAMILY_SIZE = 100
+
+# Máximo de segundos que puede tardar el censo sociodemográfico de la
+# población de prueba
+POPULATION_TIME_BUDGET = 1.0
+
+
+class CensusExportQueryTest(TestCase):
+    """!
+    Clase que prueba que las descargas del censo hacen la misma cantidad de
+    consultas sin importar cuántos grupos familiares estén registrados
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    @classmethod
+    def setUpTestData(cls):
+        """!
+        Función que registra un líder de comunidad con dos líderes de calle
+        y sus grupos familiares
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param cls <b>{object}</b> Clase de la prueba
+        """
+
+        community_leader, cls.street_leaders = create_leaders(2)
+        cls.community_user = community_leader.profile.user
+        create_families(cls.street_leaders, 4)
+
+    def report_queries(self, report, user):
+        """!
+        Función que cuenta las consultas de un reporte
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param report <b>{object}</b> Función que genera el reporte
+        @param user <b>{object}</b> Usuario que solicita el reporte
+        @return Retorna la cantidad de consultas
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            report(user, {}, io.BytesIO())
+        return len(queries)
+
+    def test_queries_do_not_grow_with_families(self):
+        """!
+        Función que compara las consultas de cada descarga antes y después
+        de registrar más grupos familiares
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        reports = (
+            (census_report, self.community_user),
+            (older_adult_report, self.community_user),
+            (street_leader_census_report, self.street_leaders[0].profile.user),
+        )
+        before = [self.report_queries(*report) for report in reports]
+        create_families(self.street_leaders, 12, start=4)
+        for (report, user), queries in zip(reports, before):
+            with self.subTest(report=report.__name__):
+                self.assertEqual(self.report_queries(report, user), queries)
+
+
+class SociodemographicPopulationTest(TestCase):
+    """!
+    Clase que prueba los rangos de edad del censo sociodemográfico sobre una
+    población de prueba de POPULATION_SIZE personas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    @classmethod
+    def setUpTestData(cls):
+        """!
+        Función que registra la población de prueba con bulk_create, con
+        edades de 0 a 94 años y ambos sexos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param cls <b>{object}</b> Clase de la prueba
+        """
+
+        community_leader, (street_leader,) = create_leaders(1)
+        families = POPULATION_SIZE // POPULATION_FAMILY_SIZE
+        users = User.objects.bulk_create([
+            User(username='family%s' % number) for number in range(families)
+        ])
+        profiles = Profile.objects.bulk_create([
+            Profile(user=user) for user in users
+        ])
+        departments = list(Department.objects.order_by('id'))
+        family_groups = FamilyGroup.objects.bulk_create([
+            FamilyGroup(
+                street_leader=street_leader, profile=profile,
+                department=departments[number % len(departments)],
+            ) for number, profile in enumerate(profiles)
+        ])
+        today = datetime.date.today()
+        Person.objects.bulk_create([
+            Person(
+                first_name='Persona', last_name=str(number),
+                id_number=str(40000000 + number),
+                birthdate=today - datetime.timedelta(
+                    days=number * 7919 % (95 * 365)
+                ),
+                family_head=number % POPULATION_FAMILY_SIZE == 0,
+                gender_id=number % 2 + 1,
+                vote_type_id=1,
+                relationship_id=1,
+                family_group=family_groups[number // POPULATION_FAMILY_SIZE],
+            ) for number in range(POPULATION_SIZE)
+        ], batch_size=5000)
+
+    def expected_counts(self):
+        """!
+        Función que cuenta los rangos de edad recorriendo las personas con
+        la edad de calculate_age, como lo hacía el reporte anterior
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un diccionario con los conteos por nombre
+        """
+
+        counts = {bracket.name: 0 for bracket in SOCIODEMOGRAPHIC_BRACKETS}
+        families, departments = 0, set()
+        for birthdate, gender_id, family_head, department_id in (
+            Person.objects.values_list(
+                'birthdate', 'gender_id', 'family_head',
+                'family_group__department_id'
+            ).iterator(chunk_size=5000)
+        ):
+            age = calculate_age(birthdate)
+            for bracket in SOCIODEMOGRAPHIC_BRACKETS:
+                if (
+                    bracket.gender in (None, gender_id) and
+                    (bracket.age1 is None or age >= bracket.age1) and
+                    (bracket.age2 is None or age <= bracket.age2)
+                ):
+                    counts[bracket.name] += 1
+            if family_head:
+                families = families + 1
+                departments.add(department_id)
+        counts['families'] = families
+        counts['departments'] = len(departments)
+        return counts
+
+    def test_brackets_in_one_query_within_budget(self):
+        """!
+        Función que evalúa todos los rangos en una sola consulta, dentro del
+        tiempo POPULATION_TIME_BUDGET, y compara los conteos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        with self.assertNumQueries(1):
+            start = time.perf_counter()
+            counts = count_brackets(
+                Person.objects.all(), SOCIODEMOGRAPHIC_BRACKETS
+            )
+            elapsed = time.perf_counter() - start
+        self.assertLess(elapsed, POPULATION_TIME_BUDGET)
+        self.assertEqual(counts, self.expected_counts())
+        self.assertGreater(counts['female_elderly'], 0)
+        self.assertEqual(
+            counts['female_children'], Person.objects.filter(
+                gender_id=FEMALE
+            ).with_age().filter(age_years__lte=12).count()
+        )
+
+
+class ReportCacheKeyTest(TestCase):
+    """!
+    Clase que prueba la llave con la que se guardan los reportes en caché
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    def test_territory_change_changes_key(self):
+        """!
+        Función que prueba que cambiar el nombre de una Ubch, que aparece en
+        los reportes, cambia la llave
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        key = report_key('census', 'global', {})
+        with self.captureOnCommitCallbacks(execute=True):
+            ubch = Ubch.objects.first()
+            ubch.name = 'Otra Ubch'
+            ubch.save()
+        self.assertNotEqual(report_key('census', 'global', {}), key)
+
+    def test_only_report_params_in_key(self):
+        """!
+        Función que prueba que los parámetros que no son del reporte no
+        generan otra copia en la caché
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        def build(user, params, output):
+            output.write(('edad %(age)s' % params).encode())
+
+        report = Report(build, 'edad.txt', 'text/plain', [], global_scope, [
+            'age'
+        ])
+        with tempfile.TemporaryDirectory() as root, override_settings(
+            REPORT_CACHE_ROOT=root
+        ), mock.patch.dict(REPORTS, {'age': report}):
+            for params in ({'age': '60'}, {'age': 60, 'page': '2'}):
+                with build_report('age', None, params) as output:
+                    self.assertEqual(output.read(), b'edad 60')
+            with build_report('age', None, {'age': '61'}) as output:
+                self.assertEqual(output.read(), b'edad 61')
+            self.assertEqual(len(os.listdir(root)), 2)
+
+
+class CensusStatsTest(TestCase):
+    """!
+    Clase que prueba que los totales guardados de los bloques y del consejo
+    comunal se recalculan al confirmar los cambios del censo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    @classmethod
+    def setUpTestData(cls):
+        """!
+        Función que registra grupos familiares en el primer bloque y calcula
+        los totales de todos los bloques
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param cls <b>{object}</b> Clase de la prueba
+        """
+
+        community_leader, cls.street_leaders = create_leaders(2)
+        create_families(cls.street_leaders, 4)
+        refresh_census_stats(list(Block.objects.values_list('id', flat=True)))
+        cls.other_department = Department.objects.filter(
+            building__bridge__block_id=2
+        ).order_by('id').first()
+
+    def assertStats(self):
+        """!
+        Función que compara los totales guardados de cada bloque con los
+        contados sobre las personas, y el total del consejo comunal con la
+        suma de sus bloques
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        brackets = DEMOGRAPHIC_BRACKETS + SOCIODEMOGRAPHIC_BRACKETS
+        fields = [bracket.name for bracket in brackets] + [
+            'families', 'departments',
+        ]
+        totals = dict.fromkeys(fields + ['people'], 0)
+        for block in Block.objects.all():
+            people = Person.objects.filter(**{BLOCK_PATH: block})
+            expected = count_brackets(people, brackets)
+            expected['people'] = people.count()
+            stats = CensusStats.objects.get(block=block)
+            for field, value in expected.items():
+                with self.subTest(block=block.id, field=field):
+                    self.assertEqual(getattr(stats, field), value)
+                totals[field] = totals[field] + value
+        council = CensusStats.objects.get(
+            communal_council_id=1, block__isnull=True
+        )
+        for field, value in totals.items():
+            with self.subTest(field=field):
+                self.assertEqual(getattr(council, field), value)
+
+    def test_changes_refreshed_once_on_commit(self):
+        """!
+        Función que prueba que los cambios de una transacción recalculan los
+        totales de todos sus bloques una sola vez, al confirmarla
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        with mock.patch(
+            'user.signals.refresh_census_stats', wraps=refresh_census_stats
+        ) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                create_family_group(
+                    self.street_leaders[0], self.other_department, [
+                        {
+                            'first_name': 'Nueva', 'last_name': 'Familia',
+                            'id_number': '50000000', 'family_head': True,
+                        },
+                        {
+                            'first_name': 'Otra', 'last_name': 'Persona',
+                            'id_number': '50000001', 'gender_id': FEMALE,
+                        },
+                    ]
+                )
+                Person.objects.filter(family_head=False).first().delete()
+                refresh.assert_not_called()
+        refresh.assert_called_once()
+        self.assertEqual(set(refresh.call_args.args[0]), {1, 2})
+        self.assertStats()
+
+    def test_moved_family_group_refreshes_both_blocks(self):
+        """!
+        Función que prueba que mudar un grupo familiar a otro bloque
+        recalcula el bloque anterior y el nuevo
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        family_group = FamilyGroup.objects.order_by('id').first()
+        with self.captureOnCommitCallbacks(execute=True):
+            family_group.department = self.other_department
+            family_group.save()
+        self.assertEqual(CensusStats.objects.get(block_id=2).people, 4)
+        self.assertStats()
+
+    def test_one_council_row(self):
+        """!
+        Función que prueba que recalcular los totales varias veces deja un
+        solo registro por bloque y por consejo comunal
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        refresh_census_stats([1])
+        refresh_census_stats([1, 2])
+        self.assertEqual(
+            CensusStats.objects.filter(block__isnull=True).count(), 1
+        )
+        self.assertEqual(
+            CensusStats.objects.filter(block__isnull=False).count(),
+            Block.objects.count()
+        )
+        self.assertStats()
+
+
+@override_settings(REPORT_JOB_TIMEOUT=60)
+class ReportJobTest(TestCase):
+    """!
+    Clase que prueba la cola de reportes generados en segundo plano
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    @classmethod
+    def setUpTestData(cls):
+        """!
+        Función que registra un líder de comunidad que solicita los reportes
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param cls <b>{object}</b> Clase de la prueba
+        """
+
+        community_leader, street_leaders = create_leaders(0)
+        cls.user = community_leader.profile.user
+
+    def setUp(self):
+        """!
+        Función que guarda los reportes y la caché en directorios temporales
+        y agrega un reporte de texto con un parámetro
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        def build(user, params, output):
+            if params['age'] == '0':
+                raise ValueError('Edad inválida')
+            output.write(('edad %(age)s' % params).encode())
+
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        cache_root = override_settings(
+            REPORT_CACHE_ROOT=os.path.join(root.name, 'c')
+        )
+        cache_root.enable()
+        self.addCleanup(cache_root.disable)
+        for patcher in (
+            mock.patch.object(
+                ReportJob._meta.get_field('file'), 'storage',
+                FileSystemStorage(location=os.path.join(root.name, 'r'))
+            ),
+            mock.patch.dict(REPORTS, {'age': Report(
+                build, 'edad.txt', 'text/plain', ['Líder de Comunidad'],
+                global_scope, ['age']
+            )}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create_job(self, **fields):
+        """!
+        Función que registra un reporte pendiente
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param **fields <b>{dict}</b> Campos del reporte
+        @return Retorna el objeto ReportJob registrado
+        """
+
+        return ReportJob.objects.create(**{
+            'report': 'age', 'params': {'age': 60}, 'user': self.user,
+            **fields
+        })
+
+    def test_claim_oldest_pending_once(self):
+        """!
+        Función que prueba que cada reporte pendiente se toma una sola vez,
+        del más antiguo al más reciente, sin tomar los que están en proceso
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.create_job(status=ReportJob.RUNNING, started=timezone.now())
+        first, second = self.create_job(), self.create_job()
+        self.assertEqual(claim_report_job(), first)
+        self.assertEqual(claim_report_job(), second)
+        self.assertIsNone(claim_report_job())
+        second.refresh_from_db()
+        self.assertEqual(second.status, ReportJob.RUNNING)
+        self.assertIsNotNone(second.started)
+
+    def test_release_stale_jobs(self):
+        """!
+        Función que prueba que solo vuelven a pendientes los reportes en
+        proceso desde hace más de REPORT_JOB_TIMEOUT segundos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        now = timezone.now()
+        stale = self.create_job(
+            status=ReportJob.RUNNING,
+            started=now - datetime.timedelta(seconds=61)
+        )
+        self.create_job(
+            status=ReportJob.RUNNING,
+            started=now - datetime.timedelta(seconds=30)
+        )
+        self.assertEqual(release_stale_report_jobs(), 1)
+        self.assertEqual(claim_report_job(), stale)
+        self.assertIsNone(claim_report_job())
+
+    def test_run_and_expire_job(self):
+        """!
+        Función que prueba que un reporte tomado se genera, se descarga y
+        se elimina con su archivo al expirar
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.create_job()
+        job = claim_report_job()
+        run_report_job(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportJob.DONE)
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('base:report_job_download', args=[job.pk])
+        )
+        self.assertEqual(b''.join(response.streaming_content), b'edad 60')
+        path = job.file.path
+        self.assertEqual(delete_expired_report_jobs(), 0)
+        ReportJob.objects.filter(pk=job.pk).update(
+            expires=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        self.assertEqual(delete_expired_report_jobs(), 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_failed_job(self):
+        """!
+        Función que prueba que un error al generar el reporte lo deja
+        fallido con el mensaje del error
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.create_job(params={'age': 0})
+        job = claim_report_job()
+        with self.assertLogs('base', 'ERROR'):
+            run_report_job(job)
+        job.refresh_from_db()
+        self.assertEqual(
+            (job.status, job.error), (ReportJob.FAILED, 'Edad inválida')
+        )
+
+    def test_enqueue_validates_params(self):
+        """!
+        Función que prueba que solicitar un reporte con parámetros inválidos
+        no lo registra, y con parámetros válidos lo deja pendiente
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.client.force_login(self.user)
+        url = reverse('base:report_job_create', args=['age'])
+        response = self.client.post(url, {'age': 'diez'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(
+            response.json()['errors'], {'age': ['Indique una edad válida']}
+        )
+        self.assertFalse(ReportJob.objects.exists())
+        response = self.client.post(url, {'age': '10'})
+        self.assertEqual(response.status_code, 200)
+        job = ReportJob.objects.get()
+        self.assertEqual(
+            (job.status, job.params), (ReportJob.PENDING, {'age': 10})
+        )
+
+
+class ReferenceListTest(TestCase):
+    """!
+    Clase que prueba las listas de referencia con su etiqueta de versión
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    def setUp(self):
+        """!
+        Función que descarta las listas construidas en otras pruebas, cuya
+        versión se repite al revertir cada transacción, e inicia sesión
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        _reference_lists.clear()
+        self.client.force_login(User.objects.create_user('reference'))
+        self.url = reverse('base:gender_list')
+
+    def test_not_modified(self):
+        """!
+        Función que prueba que el navegador con la versión actual recibe una
+        respuesta 304 sin contenido
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [record['text'] for record in response.json()['list']],
+            ['Seleccione...'] + list(
+                Gender.objects.values_list('name', flat=True)
+            )
+        )
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('private', response['Cache-Control'])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+    def test_change_invalidates_etag(self):
+        """!
+        Función que prueba que cambiar una lista de referencia cambia la
+        etiqueta y el contenido que recibe el navegador
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Gender.objects.create(name='Otro')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['list'][-1]['text'], 'Otro')
+
+
+@override_settings(
+    OUTGOING_EMAIL_MAX_ATTEMPTS=3, OUTGOING_EMAIL_RETRY_DELAY=60,
+    OUTGOING_EMAIL_CLAIM_TIMEOUT=600, OUTGOING_EMAIL_EXPIRATION=3600,
+)
+class OutboxTest(TestCase):
+    """!
+    Clase que prueba el envío de los correos de la bandeja de salida, con
+    sus reintentos y la eliminación de los correos vencidos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def queue(self, to, subject='Bienvenido', **fields):
+        """!
+        Función que registra un correo en la bandeja de salida
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param to <b>{string}</b> Dirección de correo del destinatario
+        @param subject <b>{string}</b> Asunto del correo
+        @param **fields <b>{dict}</b> Campos que se actualizan después de
+            registrarlo
+        @return Retorna el objeto OutgoingEmail registrado
+        """
+
+        email = queue_email(to, subject, 'Usuario: ' + to)
+        if fields:
+            OutgoingEmail.objects.filter(id=email.id).update(**fields)
+            email.refresh_from_db()
+        return email
+
+    def test_retry_delay_doubles_up_to_maximum(self):
+        """!
+        Función que prueba que la espera entre intentos se duplica hasta
+        MAX_RETRY_DELAY
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.assertEqual(
+            [retry_delay(attempts).total_seconds() for attempts in (1, 2, 3)],
+            [60, 120, 240]
+        )
+        self.assertEqual(
+            retry_delay(20), datetime.timedelta(seconds=MAX_RETRY_DELAY)
+        )
+
+    def test_failed_attempts_until_maximum(self):
+        """!
+        Función que prueba que un intento fallido deja el correo pendiente
+        para más tarde, hasta quedar fallido en OUTGOING_EMAIL_MAX_ATTEMPTS
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        email = self.queue('ana@example.com')
+        self.assertEqual(claim_emails(10), [email])
+        before = timezone.now()
+        record_failure(email, OSError('Servidor no disponible'))
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.error, 'Servidor no disponible')
+        self.assertIsNone(email.claimed)
+        self.assertGreaterEqual(
+            email.next_attempt, before + datetime.timedelta(seconds=60)
+        )
+        self.assertEqual(claim_emails(10), [])
+
+        record_failure(email, OSError())
+        self.assertEqual(email.error, 'OSError')
+        with self.assertLogs('base', 'ERROR'):
+            record_failure(email, OSError())
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self.assertEqual(email.attempts, 3)
+
+    def test_claim_and_release_stale_emails(self):
+        """!
+        Función que prueba que cada correo pendiente se toma una sola vez y
+        que solo vuelven a pendientes los tomados hace más de
+        OUTGOING_EMAIL_CLAIM_TIMEOUT segundos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        now = timezone.now()
+        stale = self.queue(
+            'ana@example.com', status=OutgoingEmail.SENDING,
+            claimed=now - datetime.timedelta(seconds=601)
+        )
+        self.queue(
+            'luis@example.com', status=OutgoingEmail.SENDING,
+            claimed=now - datetime.timedelta(seconds=300)
+        )
+        self.queue(
+            'rosa@example.com', next_attempt=now + datetime.timedelta(
+                seconds=60
+            )
+        )
+        pending = self.queue('pedro@example.com')
+        self.assertEqual(claim_emails(10), [pending])
+        self.assertEqual(claim_emails(10), [])
+        self.assertEqual(release_stale_emails(), 1)
+        self.assertEqual(claim_emails(10), [stale])
+
+    def test_send_batch(self):
+        """!
+        Función que prueba que los correos enviados quedan sin contenido y
+        que el error de un correo no impide enviar el resto del lote
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        first = self.queue('ana@example.com')
+        invalid = self.queue('luis@example.com', 'Asunto\ninválido')
+        last = self.queue('rosa@example.com')
+        self.assertEqual(send_queued_emails(), {'sent': 2, 'failed': 1})
+        self.assertEqual(
+            [message.to for message in mail.outbox],
+            [['ana@example.com'], ['rosa@example.com']]
+        )
+        self.assertEqual(mail.outbox[0].body, 'Usuario: ana@example.com')
+        for email in (first, last):
+            email.refresh_from_db()
+            self.assertEqual(email.status, OutgoingEmail.SENT)
+            self.assertEqual(email.body, '')
+            self.assertIsNotNone(email.sent)
+        invalid.refresh_from_db()
+        self.assertEqual(invalid.status, OutgoingEmail.PENDING)
+        self.assertEqual(invalid.attempts, 1)
+        self.assertEqual(invalid.body, 'Usuario: luis@example.com')
+
+    def test_delete_expired_emails(self):
+        """!
+        Función que prueba que solo se eliminan los correos enviados o
+        fallidos registrados hace más de OUTGOING_EMAIL_EXPIRATION segundos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        old = timezone.now() - datetime.timedelta(seconds=3601)
+        self.queue('ana@example.com', status=OutgoingEmail.SENT, created=old)
+        self.queue(
+            'luis@example.com', status=OutgoingEmail.FAILED, created=old
+        )
+        kept = [
+            self.queue('rosa@example.com', created=old),
+            self.queue('pedro@example.com', status=OutgoingEmail.SENT),
+        ]
+        self.assertEqual(delete_expired_emails(), 2)
+        self.assertEqual(
+            list(OutgoingEmail.objects.order_by('id')), kept
+        )
+
+
+class CascadeTest(TestCase):
+    """!
+    Clase que prueba las opciones de los campos dependientes, que solo se
+    responden para las listas declaradas en CASCADES
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    def setUp(self):
+        """!
+        Función que inicia la sesión de un líder de comunidad
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.client.force_login(
+            create_profile('community', 'Líder de Comunidad').user
+        )
+
+    def cascade(self, name, params, **headers):
+        """!
+        Función que consulta las opciones de un campo dependiente
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param name <b>{string}</b> Nombre de la lista
+        @param params <b>{dict}</b> Parámetros de la petición
+        @param **headers <b>{dict}</b> Encabezados de la petición
+        @return Retorna la respuesta de la petición
+        """
+
+        return self.client.get(
+            reverse('base:cascade', args=[name]), params, **headers
+        )
+
+    def test_declared_list(self):
+        """!
+        Función que prueba que una lista declarada responde los hijos del
+        objeto seleccionado ordenados por nombre, y una respuesta 304 si el
+        navegador ya la tiene
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        response = self.cascade('bridges', {'parent': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(record['id'], record['text']) for record in response.json()[
+                'list'
+            ]], [('', 'Seleccione...')] + list(
+                Bridge.objects.filter(block_id=1).order_by('name').values_list(
+                    'id', 'name'
+                )
+            )
+        )
+        response = self.cascade(
+            'bridges', {'parent': 1}, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(
+            self.cascade('bridges', {'parent': 0}).json()['list'],
+            [{'id': '', 'text': 'Seleccione...'}]
+        )
+
+    def test_undeclared_list_not_found(self):
+        """!
+        Función que prueba que las listas que no están en CASCADES, incluso
+        los niveles de la división territorial, responden 404
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.assertNotIn('communal_councils', CASCADES)
+        for name in ('communal_councils', 'users'):
+            response = self.cascade(name, {'parent': 1})
+            self.assertEqual(response.status_code, 404)
+            self.assertEqual(response.json()['message'], 'Lista no encontrada')
+
+    def test_parent_required(self):
+        """!
+        Función que prueba que se debe indicar un identificador en parent
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        for params in ({}, {'parent': 'abc'}, {'parent': '-1'}):
+            self.assertEqual(
+                self.cascade('bridges', params).status_code, 422
+            )
+
+
+class TerritoryTest(TestCase):
+    """!
+    Clase que prueba el índice de la división territorial y su versión
+    comprimida que recibe el navegador
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    def setUp(self):
+        """!
+        Función que descarta el índice construido por otras pruebas e inicia
+        la sesión de un líder de comunidad
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        _territory['current'] = None
+        self.client.force_login(
+            create_profile('community', 'Líder de Comunidad').user
+        )
+        self.url = reverse('base:territory')
+
+    def test_snapshot_compressed(self):
+        """!
+        Función que prueba que la división territorial se comprime si el
+        navegador lo acepta y que se responde 304 con la misma etiqueta
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        content = self.client.get(self.url).content
+        self.assertEqual(gzip.decompress(response.content), content)
+        snapshot = json.loads(content)
+        self.assertEqual(snapshot['levels'][-1], 'departments')
+        self.assertEqual(
+            sorted(snapshot['ids']['blocks']),
+            sorted(Block.objects.values_list('id', flat=True))
+        )
+        index = snapshot['ids']['bridges'].index(1)
+        self.assertEqual(snapshot['parents']['bridges'][index], 1)
+        self.assertEqual(
+            snapshot['names']['bridges'][index],
+            Bridge.objects.get(id=1).name
+        )
+        response = self.client.get(
+            self.url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_rebuilt_when_version_changes(self):
+        """!
+        Función que prueba que el índice se construye una sola vez por
+        versión y que un cambio en la división territorial cambia la
+        etiqueta y los hijos de los objetos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        current = territory()
+        with self.assertNumQueries(1):
+            self.assertIs(territory(), current)
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(etag, current.etag)
+        bridge = Bridge.objects.get(id=1)
+        bridge.name = 'Puente renombrado'
+        with self.captureOnCommitCallbacks(execute=True):
+            bridge.save()
+        self.assertIn((1, 'Puente renombrado'), children('blocks', 1))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class SortKeyTest(TestCase):
+    """!
+    Clase que prueba las posiciones de orden de la división territorial,
+    que conservan las posiciones que siguen en orden
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    def test_kept_keys(self):
+        """!
+        Función que prueba que se conserva la subsecuencia creciente más
+        larga de las posiciones, sin los objetos que no tienen posición
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.assertEqual(kept_keys([10, 0, 40, 20, 30]), {0, 3, 4})
+        self.assertEqual(kept_keys([30, 10, 20]), {1, 2})
+        self.assertEqual(kept_keys([0, 0]), set())
+
+    def test_stable_keys(self):
+        """!
+        Función que prueba que los objetos nuevos o movidos toman posiciones
+        libres entre sus vecinos, que al final se separan SORT_KEY_GAP, y
+        que solo se mueven los vecinos si no hay espacio
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.assertEqual(stable_keys([100, 0, 200]), [100, 150, 200])
+        self.assertEqual(stable_keys([30, 10, 20]), [5, 10, 20])
+        self.assertEqual(
+            stable_keys([0, 0]), [SORT_KEY_GAP, 2 * SORT_KEY_GAP]
+        )
+        self.assertEqual(
+            stable_keys([100, 0]), [100, 100 + SORT_KEY_GAP]
+        )
+        self.assertEqual(stable_keys([100, 0, 101, 200]), [50, 100, 150, 200])
+        keys = stable_keys([MAX_SORT_KEY - 1, MAX_SORT_KEY, 0])
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertLessEqual(keys[-1], MAX_SORT_KEY)
+
+    def test_refresh_locations_writes_changes(self):
+        """!
+        Función que prueba que se actualizan solo los objetos cuya dirección
+        o posición cambió: al renombrar un edificio sin cambiar su orden, el
+        edificio y sus departamentos, que conservan sus posiciones
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        refresh_locations()
+        self.assertEqual(refresh_locations(), {})
+        department = Department.objects.order_by('id').first()
+        keys = dict(Department.objects.values_list('id', 'sort_key'))
+        building = department.building
+        building.name = building.name + ' renombrado'
+        Building.objects.filter(id=building.id).update(name=building.name)
+        updated = refresh_locations()
+        self.assertEqual(updated['buildings'], [building.id])
+        self.assertEqual(
+            sorted(updated['departments']),
+            sorted(building.department_set.values_list('id', flat=True))
+        )
+        department.refresh_from_db()
+        self.assertEqual(
+            department.full_path.split(' | ')[:2],
+            [department.name, building.name]
+        )
+        self.assertEqual(
+            dict(Department.objects.values_list('id', 'sort_key')), keys
+        )
@@ -1,9 +1,10 @@
 from django.contrib.auth.decorators import login_required
 from django.urls import path
 
-from .ajax import ComboUpdateView
+from .ajax import CascadeView, TerritoryView
 from .views import (
     BuildingListView,
+    DemographicCensusListView,
     DemographicCensusTemplateView,
     DepartmentListView,
     Error403View,
@@ -17,6 +18,9 @@ from .views import (
     HomeView,
     LowResourcesTemplateView,
     RelationshipListView,
+    ReportJobCreateView,
+    ReportJobDetailView,
+    ReportJobDownloadView,
     ResidenceProofTemplateView,
     SociodemographicTemplateView,
     VacationPlanTemplateView,
@@ -78,6 +82,11 @@ urlpatterns = [
         login_required(DemographicCensusTemplateView.as_view()),
         name='demographic_census'
     ),
+    path(
+        'demographic-census/list/',
+        login_required(DemographicCensusListView.as_view()),
+        name='demographic_census_list'
+    ),
     path(
         'descargar-plan-vacacional/',
         login_required(VacationPlanTemplateView.as_view()),
@@ -111,7 +120,27 @@ urlpatterns = [
     ),
 
     path(
-        'ajax/combo-update/', login_required(ComboUpdateView.as_view()),
-        name='combo_update'
+        'reports/<slug:report>/enqueue/',
+        login_required(ReportJobCreateView.as_view()),
+        name='report_job_create'
+    ),
+    path(
+        'reports/jobs/<int:pk>/',
+        login_required(ReportJobDetailView.as_view()),
+        name='report_job_detail'
+    ),
+    path(
+        'reports/jobs/<int:pk>/download/',
+        login_required(ReportJobDownloadView.as_view()),
+        name='report_job_download'
+    ),
+
+    path(
+        'ajax/cascades/<slug:name>/', login_required(CascadeView.as_view()),
+        name='cascade'
+    ),
+    path(
+        'ajax/territory/', login_required(TerritoryView.as_view()),
+        name='territory'
     ),
 ]
@@ -52,6 +52,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'user.middleware.CensusRoleMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'auditlog.middleware.AuditlogMiddleware',
@@ -168,6 +169,37 @@ LOGOUT_REDIRECT_URL = 'user:login'
 
 MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 
+# Directorio privado donde se guardan los reportes generados en segundo plano
+REPORT_ROOT = BASE_DIR / 'reports'
+
+# Segundos que se conservan los reportes generados en segundo plano
+REPORT_JOB_EXPIRATION = 24 * 60 * 60
+
+# Segundos después de los cuales un reporte tomado por un proceso que no
+# terminó de generarlo vuelve a quedar pendiente
+REPORT_JOB_TIMEOUT = 30 * 60
+
+# Directorio donde se guardan en caché los reportes generados
+REPORT_CACHE_ROOT = BASE_DIR / 'report_cache'
+
+# Tamaño máximo en bytes de la caché de reportes
+REPORT_CACHE_MAX_SIZE = 200 * 1024 * 1024
+
+# Intentos máximos de envío de un correo de la bandeja de salida
+OUTGOING_EMAIL_MAX_ATTEMPTS = 5
+
+# Segundos de espera antes de reintentar el envío de un correo. Se duplican
+# en cada intento fallido, hasta una hora
+OUTGOING_EMAIL_RETRY_DELAY = 60
+
+# Segundos después de los cuales un correo tomado por un proceso que no
+# terminó de enviarlo vuelve a quedar pendiente
+OUTGOING_EMAIL_CLAIM_TIMEOUT = 10 * 60
+
+# Segundos que se conservan los correos enviados o fallidos de la bandeja de
+# salida
+OUTGOING_EMAIL_EXPIRATION = 7 * 24 * 60 * 60
+
 if DEBUG:
     # Configuración para entornos de desarrollo
     EMAIL_HOST_USER = 'email@email.com'
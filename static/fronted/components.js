@@ -978,6 +978,17 @@ Vue.component('age', {
     }
   },
 
+  methods: {
+    /**
+     * Método que solicita el reporte de personas entre dos edades
+     *
+     * @author  William Páez <paez.william8@gmail.com>
+     */
+    download() {
+      request_report('filter-age', {age1: this.age1, age2: this.age2});
+    }
+  },
+
   template: `
     <!-- card - BEGIN -->
     <div class="card">
@@ -1033,7 +1044,7 @@ Vue.component('age', {
 
             <div class="col-sm-6">
               <div class="form-group">
-                <a :href="'/filtros/edad/?age1=' + age1 + '&age2=' + age2" target="_blank"> Descargar </a>
+                <a :href="'/filtros/edad/?age1=' + age1 + '&age2=' + age2" target="_blank" @click.prevent="download"> Descargar </a>
               </div>
             </div>
           </div>
@@ -1054,6 +1065,17 @@ Vue.component('voters', {
     }
   },
 
+  methods: {
+    /**
+     * Método que solicita el reporte de votantes por edad
+     *
+     * @author  William Páez <paez.william8@gmail.com>
+     */
+    download() {
+      request_report('voter', {age: this.age});
+    }
+  },
+
   template: `
     <!-- card - BEGIN -->
     <div class="card">
@@ -1086,7 +1108,7 @@ Vue.component('voters', {
           <div class="row">
             <div class="col-sm-6">
               <div class="form-group">
-                <a :href="'/descargar-votantes/?age=' + age" target="_blank"> Descargar </a>
+                <a :href="'/descargar-votantes/?age=' + age" target="_blank" @click.prevent="download"> Descargar </a>
               </div>
             </div>
           </div>
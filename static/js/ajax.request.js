@@ -1,48 +1,57 @@
+/* División territorial cargada una sola vez por página */
+var territory = null;
+
+/**
+ * @brief Función que obtiene la división territorial completa. Se consulta una sola vez y el navegador la
+ * vuelve a usar mientras no cambie su versión
+ *
+ * @author William Páez (paez.william8 at gmail.com)
+ * @copyright <a href='http://www.gnu.org/licenses/gpl-3.0.html'>GNU Public License versión 3 (GPLv3)</a>
+ * @return Objeto con los arreglos ids, parents y names de cada nivel, o null si la petición falló
+ */
+function load_territory() {
+  if (territory === null) {
+    $.ajax({
+      url: "/ajax/territory/", dataType: "json", async: false
+    }).done(function(data) {
+      territory = data;
+    }).fail(function(jqxhr, textStatus, error) {
+      var err = textStatus + ", " + error;
+      bootbox.alert("Petición fallida. Verifique el error: " + err);
+      console.log("Petición fallida. Verifique el error: " + err);
+    });
+  }
+  return territory;
+}
+
 /**
  * @brief Función que actualiza los datos de combos dependientes
  *
  * @author Ing. Roldan Vargas (rvargas at cenditel.gob.ve)
+ * @author William Páez (paez.william8 at gmail.com)
  * @copyright <a href='http://www.gnu.org/licenses/gpl-3.0.html'>GNU Public License versión 3 (GPLv3)</a>
  * @date 03-08-2018
  * @param option Código del elemento seleccionado por el cual se filtrarán los datos en el combo dependiente
- * @param app Nombre de la aplicación en la cual buscar la información a filtrar
- * @param mod Modelo del cual se van a extraer los datos filtrados según la selección
- * @param field Nombre del campo con el cual realizar el filtro de los datos
- * @param n_value Nombre del campo que contendra el valor de cada opción en el combo
- * @param n_text Nombre del campo que contendrá el texto en cada opción del combo
+ * @param name Nombre del nivel de la división territorial que se muestra en el combo (base.cascades.CASCADES)
  * @param combo_target Identificador del combo en el cual se van a mostrar los datos filtrados
- * @param bd Nombre de la base de datos, si no se específica se asigna el valor por defecto
  */
-function combo_update(option, app, mod, field, n_value, n_text, combo_target, bd) {
-  /* Verifica si el parámetro esta definido, en caso contrario establece el valor por defecto */
-  bd = typeof bd !== 'undefined' ? bd : 'default';
-  $.ajaxSetup({
-    async: false
-  });
-  $.getJSON("/ajax/combo-update/", {
-    option:option, app:app, mod:mod, field:field, n_value:n_value, n_text: n_text, bd:bd
-  }, function(data) {
-
-    var combo = $("#"+combo_target);
-
-    if (data.result) {
-
-      if (data.combo_disabled == "false") {
-        combo.removeAttr("disabled");
-      }
-      else {
-        combo.attr("disabled", "true");
-      }
-
-      combo.html(data.combo_html);
-    }
-    else {
-      bootbox.alert(data.error);
-      console.log(data.error);
+function combo_update(option, name, combo_target) {
+  var combo = $("#"+combo_target);
+  var options = [$("<option>", {value: "", text: "Seleccione..."})[0]];
+  var data = option && option != "0" ? load_territory() : null;
+  if (data === null) {
+    combo.empty().append(options);
+    combo.attr("disabled", "true");
+    return;
+  }
+  /* Las opciones se filtran en el navegador en una sola pasada y se agregan de una vez */
+  var ids = data.ids[name], parents = data.parents[name], names = data.names[name];
+  var parent = parseInt(option, 10);
+  for (var i = 0; i < ids.length; i++) {
+    if (parents[i] === parent) {
+      options.push($("<option>", {value: ids[i], text: names[i]})[0]);
     }
-  }).fail(function(jqxhr, textStatus, error) {
-    var err = textStatus + ", " + error;
-    bootbox.alert( "{% trans 'Petición fallida. Verifique el error: ' %}" + err );
-    console.log("{% trans 'Petición fallida. Verifique el error: ' %}" + err)
-  });
+  }
+  combo.empty().append(options);
+  combo.removeAttr("disabled");
 }
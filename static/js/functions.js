@@ -33,3 +33,39 @@ function button_datatable(table) {
   });
   table.buttons().container().appendTo(table.table().container());
 }
+
+/**
+ * @brief Función que solicita un reporte en segundo plano, consulta su estatus cada dos segundos y lo descarga al terminar
+ *
+ * @author William Páez (paez.william8 at gmail.com)
+ * @copyright <a href='http://www.gnu.org/licenses/gpl-3.0.html'>GNU Public License versión 3 (GPLv3)</a>
+ * @param report Nombre del reporte
+ * @param params Objeto con los parámetros del reporte
+ * @return Retorna false para que no se siga el enlace
+ */
+function request_report(report, params) {
+  axios.post(`/reports/${report}/enqueue/`, new URLSearchParams(params || {})).then(response => {
+    const poll = record => {
+      if (record.status == 'done') {
+        window.location.href = record.download_url;
+      } else if (record.status == 'failed') {
+        bootbox.alert('No se pudo generar el reporte: ' + record.error);
+      } else {
+        setTimeout(() => {
+          axios.get(`/reports/jobs/${record.id}/`).then(response => {
+            poll(response.data.record);
+          });
+        }, 2000);
+      }
+    };
+    bootbox.alert('El reporte se está generando, se descargará al terminar');
+    poll(response.data.record);
+  }).catch(error => {
+    if (error.response && error.response.status == 422) {
+      bootbox.alert(Object.values(error.response.data.errors).join('<br>'));
+    } else {
+      bootbox.alert('No se pudo solicitar el reporte');
+    }
+  });
+  return false;
+}
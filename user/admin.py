@@ -1,6 +1,10 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 
-from .forms import UbchLevelAdminForm
+from .census_import import COLUMNS, CensusImport, read_rows
+from .forms import CensusImportForm, UbchLevelAdminForm
 from .models import (
     Admonition,
     Condominium,
@@ -14,6 +18,7 @@ from .models import (
     StreetLeader,
     UbchLevel,
 )
+from .search import search_filter
 
 
 class ProfileAdmin(admin.ModelAdmin):
@@ -88,6 +93,67 @@ class FamilyGroupAdmin(admin.ModelAdmin):
         'department',
     )
 
+    change_list_template = 'user/admin/family_group_change_list.html'
+
+    def get_urls(self):
+        """!
+        Función que agrega la dirección de la importación del censo
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna la lista de direcciones del modelo
+        """
+
+        return [
+            path(
+                'import/', self.admin_site.admin_view(self.import_view),
+                name='user_familygroup_import'
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        """!
+        Función que importa grupos familiares desde un archivo subido. Los
+        archivos grandes se deben importar con el comando import_census, que
+        puede continuar una importación interrumpida
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param request <b>{object}</b> Objeto que contiene la petición
+        @return Retorna la página de importación
+        """
+
+        if not self.has_add_permission(request):
+            return redirect('admin:user_familygroup_changelist')
+        errors = []
+        form = CensusImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            file = form.cleaned_data['file']
+            census_import = CensusImport()
+            try:
+                created = census_import.run(read_rows(file, file.name))
+            except ValueError as error:
+                messages.error(request, error)
+            else:
+                messages.success(
+                    request,
+                    'Grupos familiares: %(family_groups)s, '
+                    'personas: %(people)s' % created
+                )
+                errors = census_import.error_list
+                if not errors:
+                    return redirect('admin:user_familygroup_changelist')
+        return TemplateResponse(
+            request, 'user/admin/census_import.html', {
+                **self.admin_site.each_context(request),
+                'opts': self.model._meta,
+                'title': 'Importar censo',
+                'form': form,
+                'columns': COLUMNS,
+                'errors': errors,
+            }
+        )
+
 
 class PersonAdmin(admin.ModelAdmin):
     """!
@@ -109,6 +175,25 @@ class PersonAdmin(admin.ModelAdmin):
         'first_name', 'last_name', 'id_number',
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        """!
+        Método que busca por prefijo de la cédula o por nombres y apellidos
+        con los índices de search_filter, en lugar de recorrer la tabla con
+        icontains
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param request <b>{object}</b> Objeto que contiene la petición
+        @param queryset <b>{object}</b> Personas del listado
+        @param search_term <b>{string}</b> Texto de la búsqueda
+        @return Retorna una tupla con el queryset filtrado y si puede tener
+            duplicados
+        """
+
+        if not search_term.strip():
+            return queryset, False
+        return search_filter(queryset, search_term), False
+
 
 class MoveOutAdmin(admin.ModelAdmin):
     """!
@@ -0,0 +1,551 @@
+import csv
+import datetime
+import io
+import itertools
+import json
+import os
+from tempfile import NamedTemporaryFile
+
+from django import forms
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from openpyxl import load_workbook
+
+from base.functions import PEOPLE_DATA
+from base.models import Department
+
+from .family_groups import find_family_head, person_fields
+from .forms import FamilyGroupForm, PersonForm, person_lookups
+from .models import FamilyGroup, Person, Profile
+from .roles import group_id
+from .signals import mark_block, mark_changed
+
+# Columnas del archivo a importar. Las filas seguidas con el mismo usuario
+# forman un grupo familiar, y su ubicación se toma de la primera fila. Si
+# has_id_number está vacío se toma de si la persona tiene cédula
+COLUMNS = (
+    'username',
+    'email',
+    'block',
+    'bridge',
+    'building',
+    'department',
+    'first_name',
+    'last_name',
+    'has_id_number',
+    'id_number',
+    'person_email',
+    'phone',
+    'birthdate',
+    'admission_date',
+    'gender',
+    'vote_type',
+    'relationship',
+    'family_head',
+)
+
+# Columnas del reporte de errores
+ERROR_COLUMNS = ('row', 'username', 'field', 'message')
+
+# Valores que se interpretan como verdadero en las columnas de si o no
+TRUE_VALUES = ('1', 'x', 's', 'si', 'sí', 'y', 'yes', 'true', 'verdadero')
+
+# Campos de selección de PersonForm y la columna con el nombre del objeto
+LOOKUP_COLUMNS = {
+    'gender_id': 'gender',
+    'vote_type_id': 'vote_type',
+    'relationship_id': 'relationship',
+}
+
+
+def normalize(value):
+    """!
+    Función que normaliza un nombre para compararlo sin importar mayúsculas
+    ni espacios
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param value <b>{string}</b> Nombre
+    @return Retorna el nombre normalizado
+    """
+
+    return ' '.join(str(value).split()).casefold()
+
+
+def cell_value(value):
+    """!
+    Función que convierte el valor de una celda en texto, con las fechas en
+    formato ISO y los números enteros sin decimales
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param value <b>{object}</b> Valor de la celda
+    @return Retorna una cadena
+    """
+
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def check_header(header):
+    """!
+    Función que valida que el archivo tenga todas las columnas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param header <b>{list}</b> Nombres de las columnas del archivo
+    @return Retorna los nombres de las columnas
+    """
+
+    missing = [column for column in COLUMNS if column not in header]
+    if missing:
+        raise ValueError('Faltan las columnas: ' + ', '.join(missing))
+    return header
+
+
+def read_rows(file, name):
+    """!
+    Función que lee las filas de un archivo CSV o XLSX sin cargarlo completo
+    en memoria. La primera fila contiene los nombres de las columnas de
+    COLUMNS
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param file <b>{object}</b> Archivo abierto en modo binario
+    @param name <b>{string}</b> Nombre del archivo, para saber su formato
+    @return Retorna un generador de tuplas con el número de fila y un
+        diccionario de valores por columna
+    """
+
+    if name.lower().endswith('.xlsx'):
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+            header = check_header([
+                normalize(cell_value(value)) for value in next(rows, ())
+            ])
+            for number, values in enumerate(rows, 2):
+                values = [cell_value(value) for value in values]
+                if any(values):
+                    yield number, dict(zip(header, values))
+        finally:
+            workbook.close()
+        return
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    reader = csv.reader(text)
+    header = check_header([normalize(value) for value in next(reader, [])])
+    for values in reader:
+        values = [value.strip() for value in values]
+        if any(values):
+            yield reader.line_num, dict(zip(header, values))
+
+
+def read_households(rows, start=0):
+    """!
+    Función que agrupa las filas seguidas con el mismo usuario
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param rows <b>{object}</b> Filas de read_rows
+    @param start <b>{int}</b> Última fila importada, las anteriores se omiten
+    @return Retorna un generador de listas de filas
+    """
+
+    rows = ((number, row) for number, row in rows if number > start)
+    for _, household in itertools.groupby(
+        rows, key=lambda item: item[1].get('username', '')
+    ):
+        yield list(household)
+
+
+def read_checkpoint(path):
+    """!
+    Función que lee la última fila importada del archivo de control
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param path <b>{string}</b> Ruta del archivo de control
+    @return Retorna el número de fila o 0 si no existe
+    """
+
+    try:
+        with open(path) as checkpoint:
+            return json.load(checkpoint)['row']
+    except FileNotFoundError:
+        return 0
+
+
+def write_checkpoint(path, row):
+    """!
+    Función que guarda la última fila importada en el archivo de control. Se
+    escribe en un archivo temporal y luego se reemplaza, para que una
+    interrupción no lo deje incompleto
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param path <b>{string}</b> Ruta del archivo de control
+    @param row <b>{int}</b> Número de fila
+    """
+
+    root = os.path.dirname(os.path.abspath(path))
+    with NamedTemporaryFile('w', dir=root, prefix='.', delete=False) as tmp:
+        json.dump({'row': row}, tmp)
+    os.replace(tmp.name, path)
+
+
+class CensusImport:
+    """!
+    Clase que importa grupos familiares desde las filas de un archivo. Cada
+    grupo familiar se valida con las reglas de PersonForm y los grupos
+    válidos se registran por lotes, con una transacción y una consulta por
+    modelo en cada lote
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def __init__(self, chunk_size=500, checkpoint=None, errors=None):
+        """!
+        Función que inicializa la importación y precarga los datos de
+        referencia
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param chunk_size <b>{int}</b> Grupos familiares por lote
+        @param checkpoint <b>{string}</b> Ruta del archivo de control
+        @param errors <b>{object}</b> Archivo de texto del reporte de errores
+        """
+
+        self.chunk_size = chunk_size
+        self.checkpoint = checkpoint
+        self.errors = csv.writer(errors) if errors is not None else None
+        self.lookups = person_lookups()
+        self.names = {
+            field: {
+                normalize(obj.name): pk for pk, obj in objects.items()
+            } for field, objects in self.lookups.items()
+        }
+        self.departments = self.department_keys()
+        self.group_id = group_id('Grupo Familiar')
+        # Valores ya usados en el archivo, para detectar repetidos entre
+        # grupos familiares del mismo lote
+        self.usernames, self.emails, self.id_numbers = set(), set(), set()
+        self.error_list = []
+        self.created = {'family_groups': 0, 'people': 0}
+        self.last_row = 0
+
+    def department_keys(self):
+        """!
+        Función que construye el mapa de departamentos por nombre de bloque,
+        puente, edificio y departamento, con una sola consulta
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un diccionario de tuplas con el departamento, el
+            líder de calle, el bloque y la posición del departamento, o None
+            si el nombre es ambiguo
+        """
+
+        departments = {}
+        for row in Department.objects.values_list(
+            'building__bridge__block__name', 'building__bridge__name',
+            'building__name', 'name', 'id',
+            'building__bridge__streetleader', 'building__bridge__block',
+            'sort_key',
+        ):
+            key = tuple(normalize(name) for name in row[:4])
+            departments[key] = None if key in departments else row[4:]
+        return departments
+
+    def add_error(self, number, username, field, message):
+        """!
+        Función que agrega un error al reporte
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param number <b>{int}</b> Número de fila
+        @param username <b>{string}</b> Usuario del grupo familiar
+        @param field <b>{string}</b> Columna con el error
+        @param message <b>{string}</b> Mensaje del error
+        """
+
+        error = (number, username, field, message)
+        self.error_list.append(error)
+        if self.errors is not None:
+            self.errors.writerow(error)
+
+    def person_data(self, row):
+        """!
+        Función que convierte una fila en los datos de PersonForm, cambiando
+        los nombres de los campos de selección por sus identificadores
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param row <b>{dict}</b> Valores de la fila por columna
+        @return Retorna un diccionario de datos del formulario
+        """
+
+        has_id_number = row.get('has_id_number', '')
+        if has_id_number:
+            has_id_number = normalize(has_id_number) in TRUE_VALUES
+        else:
+            has_id_number = bool(row.get('id_number'))
+        data = {
+            'first_name': row.get('first_name', ''),
+            'last_name': row.get('last_name', ''),
+            'has_id_number': 'y' if has_id_number else 'n',
+            'id_number': row.get('id_number', '') if has_id_number else '',
+            'email': row.get('person_email', ''),
+            'phone': row.get('phone', ''),
+            'birthdate': row.get('birthdate', ''),
+            'admission_date': row.get('admission_date', ''),
+            'family_head': normalize(
+                row.get('family_head', '')
+            ) in TRUE_VALUES,
+        }
+        for field, column in LOOKUP_COLUMNS.items():
+            name = row.get(column, '')
+            data[field] = self.names[field].get(normalize(name), name)
+        return data
+
+    def validate(self, household):
+        """!
+        Función que valida las filas de un grupo familiar
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param household <b>{list}</b> Filas del grupo familiar
+        @return Retorna un diccionario con los datos validados o None si el
+            grupo familiar tiene errores
+        """
+
+        number, first = household[0]
+        username = first.get('username', '')
+        valid = True
+        values = {}
+        for field in ('username', 'email'):
+            try:
+                values[field] = FamilyGroupForm.base_fields[field].clean(
+                    first.get(field, '')
+                )
+            except forms.ValidationError as error:
+                self.add_error(number, username, field, error.messages[0])
+                valid = False
+        if values.get('username') in self.usernames:
+            self.add_error(number, username, 'username', 'Usuario repetido')
+            valid = False
+        if values.get('email') in self.emails:
+            self.add_error(number, username, 'email', 'Correo repetido')
+            valid = False
+
+        location = tuple(
+            normalize(first.get(column, ''))
+            for column in ('block', 'bridge', 'building', 'department')
+        )
+        department = self.departments.get(location)
+        if department is None:
+            self.add_error(
+                number, username, 'department',
+                'Departamento ambiguo' if location in self.departments
+                else 'Departamento inexistente'
+            )
+            valid = False
+        elif department[1] is None:
+            self.add_error(
+                number, username, 'bridge', 'El puente no tiene líder de calle'
+            )
+            valid = False
+
+        people = []
+        for number, row in household:
+            form = PersonForm(self.person_data(row), lookups=self.lookups)
+            if not form.is_valid():
+                for field, messages in form.errors.items():
+                    self.add_error(number, username, field, messages[0])
+                valid = False
+                continue
+            people.append((number, form.cleaned_data))
+        if not valid:
+            return None
+
+        heads = [person for number, person in people if person['family_head']]
+        if len(heads) != 1:
+            self.add_error(
+                household[0][0], username, 'family_head',
+                'Solo puede haber 1 jefe familiar'
+            )
+            return None
+        people = [person for number, person in people]
+        head = find_family_head(people)
+        if head is None:
+            self.add_error(
+                household[0][0], username, 'id_number',
+                'El jefe familiar debe tener cédula'
+            )
+            return None
+
+        # Cédulas de las personas, las personas sin cédula usan la del jefe
+        c = 1
+        id_numbers = []
+        for person in people:
+            if person['has_id_number'] == 'y':
+                id_numbers.append(person['id_number'])
+            else:
+                id_numbers.append(head['id_number'] + '-' + str(c))
+                c = c + 1
+        repeated = [
+            id_number for id_number in id_numbers
+            if id_number in self.id_numbers or id_numbers.count(id_number) > 1
+        ]
+        if repeated:
+            self.add_error(
+                household[0][0], username, 'id_number',
+                'Cédula repetida: ' + ', '.join(sorted(set(repeated)))
+            )
+            return None
+
+        self.usernames.add(values['username'])
+        self.emails.add(values['email'])
+        self.id_numbers.update(id_numbers)
+        return {
+            'row': household[0][0],
+            'last_row': household[-1][0],
+            'username': values['username'],
+            'email': values['email'],
+            'department_id': department[0],
+            'street_leader_id': department[1],
+            'block_id': department[2],
+            'location_key': department[3],
+            'people': people,
+            'id_numbers': id_numbers,
+        }
+
+    def exclude_registered(self, households):
+        """!
+        Función que descarta los grupos familiares cuyo usuario, correo o
+        cédulas ya están registrados, con una consulta por campo
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param households <b>{list}</b> Grupos familiares validados
+        @return Retorna la lista de grupos familiares que se pueden registrar
+        """
+
+        usernames = set(User.objects.filter(
+            username__in=[household['username'] for household in households]
+        ).values_list('username', flat=True))
+        emails = set(User.objects.filter(
+            email__in=[household['email'] for household in households]
+        ).values_list('email', flat=True))
+        id_numbers = set(Person.objects.filter(id_number__in=[
+            id_number for household in households
+            for id_number in household['id_numbers']
+        ]).values_list('id_number', flat=True))
+
+        valid = []
+        for household in households:
+            registered = [
+                (field, 'Este campo ya está registrado')
+                for field, values in (
+                    ('username', usernames), ('email', emails)
+                ) if household[field] in values
+            ] + [
+                ('id_number', 'Cédula ya registrada: ' + id_number)
+                for id_number in household['id_numbers']
+                if id_number in id_numbers
+            ]
+            for field, message in registered:
+                self.add_error(
+                    household['row'], household['username'], field, message
+                )
+            if not registered:
+                valid.append(household)
+        return valid
+
+    def save(self, households, last_row):
+        """!
+        Función que registra un lote de grupos familiares en una transacción
+        y guarda la última fila procesada en el archivo de control
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param households <b>{list}</b> Grupos familiares validados
+        @param last_row <b>{int}</b> Última fila del lote
+        """
+
+        households = self.exclude_registered(households) if households else []
+        with transaction.atomic():
+            # Los usuarios quedan inactivos y sin contraseña hasta que el
+            # líder de calle los active
+            users = User.objects.bulk_create([
+                User(
+                    username=household['username'], email=household['email'],
+                    password=make_password(None), is_active=False,
+                ) for household in households
+            ])
+            User.groups.through.objects.bulk_create([
+                User.groups.through(user_id=user.id, group_id=self.group_id)
+                for user in users
+            ])
+            profiles = Profile.objects.bulk_create([
+                Profile(user=user) for user in users
+            ])
+            family_groups = FamilyGroup.objects.bulk_create([
+                FamilyGroup(
+                    street_leader_id=household['street_leader_id'],
+                    profile=profile,
+                    department_id=household['department_id'],
+                    location_key=household['location_key'],
+                ) for household, profile in zip(households, profiles)
+            ])
+            people = []
+            for household, family_group in zip(households, family_groups):
+                for person, id_number in zip(
+                    household['people'], household['id_numbers']
+                ):
+                    people.append(Person(
+                        **person_fields(person, family_group, id_number)
+                    ))
+            Person.objects.bulk_create(people)
+            # bulk_create no envía las señales, los totales de los bloques y
+            # la versión del censo se actualizan al confirmar la transacción
+            block_ids = {household['block_id'] for household in households}
+            for block_id in block_ids:
+                mark_block(block_id)
+            if households:
+                mark_changed()
+                mark_changed(PEOPLE_DATA)
+        self.created['family_groups'] += len(family_groups)
+        self.created['people'] += len(people)
+        self.last_row = last_row
+        if self.checkpoint:
+            write_checkpoint(self.checkpoint, last_row)
+
+    def run(self, rows, start=0):
+        """!
+        Función que importa todas las filas por lotes
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param rows <b>{object}</b> Filas de read_rows
+        @param start <b>{int}</b> Última fila importada, se omiten las
+            anteriores
+        @return Retorna un diccionario con los totales registrados
+        """
+
+        chunk, count = [], 0
+        last_row = start
+        for household in read_households(rows, start):
+            validated = self.validate(household)
+            if validated is not None:
+                chunk.append(validated)
+            last_row = household[-1][0]
+            count += 1
+            if count == self.chunk_size:
+                self.save(chunk, last_row)
+                chunk, count = [], 0
+        if count:
+            self.save(chunk, last_row)
+        return self.created
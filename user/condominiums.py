@@ -0,0 +1,254 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, FilteredRelation, Q
+
+from .models import Condominium, FamilyGroup, FamilyHead, Payment, Person
+
+# Total guardado en Condominium por estado del cobro de un jefe familiar
+STATE_FIELDS = {
+    'paid': 'paid_count',
+    'unpaid': 'unpaid_count',
+    'exonerated': 'exonerated_count',
+}
+
+
+def create_payments(condominium, user):
+    """!
+    Función que genera los cobros de un condominio para los departamentos de
+    los líderes de calle de un líder de comunidad. Los grupos familiares y
+    sus jefes se consultan de una vez, los montos se calculan en una pasada
+    y los pagos se registran con una consulta por modelo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param condominium <b>{object}</b> Condominio registrado
+    @param user <b>{object}</b> Usuario del líder de comunidad
+    @return Retorna la lista de jefes familiares de los grupos familiares con
+        más de un jefe
+    """
+
+    family_groups = FamilyGroup.objects.filter(
+        street_leader__community_leader__profile__user=user,
+        department__isnull=False,
+    )
+    # Grupos familiares con más de un jefe familiar
+    repeated = set(Person.objects.filter(
+        family_group__in=family_groups, family_head=True
+    ).order_by().values('family_group').annotate(
+        heads=Count('id')
+    ).filter(heads__gt=1).values_list('family_group', flat=True))
+
+    # Una fila por grupo familiar y jefe familiar, o una sola fila con jefe
+    # nulo si no tiene
+    rows = family_groups.annotate(
+        head=FilteredRelation('person', condition=Q(person__family_head=True))
+    ).order_by('department__name', 'department', 'id', 'head__id').values_list(
+        'department', 'id', 'street_leader__profile__user', 'head__id',
+        'head__first_name', 'head__last_name', 'head__id_number',
+        'department__sort_key',
+    )
+    departments, location_keys = {}, {}
+    for department_id, family_group_id, street_leader_user_id, *head in rows:
+        location_keys[department_id] = head.pop()
+        family_groups = departments.setdefault(department_id, {})
+        # Solo se cobra al primer jefe familiar de cada grupo familiar
+        if family_group_id not in family_groups:
+            family_groups[family_group_id] = (street_leader_user_id, head)
+
+    total = condominium.rate * condominium.amount
+    payments, heads, family_heads = [], [], []
+    for department_id, family_groups in departments.items():
+        payment = Payment(
+            department_id=department_id,
+            condominium=condominium,
+            user_id=next(iter(family_groups.values()))[0],
+            location_key=location_keys[department_id],
+        )
+        payments.append(payment)
+        amount = total / len(family_groups)
+        for family_group_id, (user_id, head) in family_groups.items():
+            person_id, first_name, last_name, id_number = head
+            if person_id is None:
+                continue
+            if family_group_id in repeated:
+                family_heads.append(person_id)
+            heads.append(FamilyHead(
+                payer='{} {}'.format(first_name, last_name),
+                id_number=id_number,
+                amount=amount,
+                payment=payment,
+                location_key=payment.location_key,
+            ))
+    Payment.objects.bulk_create(payments)
+    FamilyHead.objects.bulk_create(heads)
+    condominium.refresh_totals()
+    if not family_heads:
+        return []
+    people = Person.objects.in_bulk(family_heads)
+    return [people[person_id] for person_id in family_heads]
+
+
+def payment_state(paid, exonerated):
+    """!
+    Función que obtiene el estado del cobro de un jefe familiar. Un cobro
+    exonerado no se cuenta como pagado
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param paid <b>{boolean}</b> ¿Pagado?
+    @param exonerated <b>{boolean}</b> ¿Exonerado?
+    @return Retorna una llave de STATE_FIELDS
+    """
+
+    if exonerated:
+        return 'exonerated'
+    return 'paid' if paid else 'unpaid'
+
+
+def add_state_change(changes, condominium_id, amount, old, new):
+    """!
+    Función que suma a los cambios de los totales de un condominio el paso
+    de un cobro de un estado a otro
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param changes <b>{dict}</b> Cambios de los totales por condominio
+    @param condominium_id <b>{int}</b> Identificador del condominio
+    @param amount <b>{object}</b> Monto del cobro
+    @param old <b>{string}</b> Estado anterior del cobro
+    @param new <b>{string}</b> Estado nuevo del cobro
+    """
+
+    if old == new:
+        return
+    change = changes.setdefault(condominium_id, Counter())
+    change[STATE_FIELDS[old]] -= 1
+    change[STATE_FIELDS[new]] += 1
+    if old == 'paid':
+        change['paid_total'] -= amount
+    if new == 'paid':
+        change['paid_total'] += amount
+
+
+def apply_total_changes(changes):
+    """!
+    Función que aplica los cambios de los totales de los condominios con
+    expresiones F, para que las actualizaciones simultáneas no se pisen
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param changes <b>{dict}</b> Cambios de los totales por condominio
+    """
+
+    for condominium_id, change in changes.items():
+        values = {
+            field: F(field) + value for field, value in change.items()
+            if value
+        }
+        if values:
+            Condominium.objects.filter(pk=condominium_id).update(**values)
+
+
+def save_family_head(family_head, **values):
+    """!
+    Función que cambia el estado del cobro de un jefe familiar y actualiza
+    los totales de su condominio en la misma transacción
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param family_head <b>{object}</b> Jefe familiar
+    @param **values <b>{dict}</b> Valores nuevos de paid y exonerated
+    """
+
+    with transaction.atomic():
+        # El estado anterior se lee bloqueando la fila, por si otro usuario
+        # lo cambió después de consultar family_head
+        paid, exonerated, condominium_id = FamilyHead.objects.filter(
+            pk=family_head.pk
+        ).select_for_update(of=('self',)).values_list(
+            'paid', 'exonerated', 'payment__condominium'
+        ).get()
+        for field, value in values.items():
+            setattr(family_head, field, value)
+        family_head.save(update_fields=list(values))
+        changes = {}
+        add_state_change(
+            changes, condominium_id, family_head.amount,
+            payment_state(paid, exonerated),
+            payment_state(family_head.paid, family_head.exonerated)
+        )
+        apply_total_changes(changes)
+
+
+def payment_updates(record):
+    """!
+    Función que valida los cambios de estado de varios cobros enviados en
+    formato json: {"updates": [{"ids": [1, 2], "paid": true}, ...]}. Igual
+    que en el detalle del condominio, exonerar un cobro lo marca como no
+    pagado si no se indica lo contrario
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param record <b>{dict}</b> Datos enviados
+    @return Retorna una lista de tuplas con los identificadores de los
+        jefes familiares y los valores nuevos
+    """
+
+    updates = record.get('updates') if isinstance(record, dict) else None
+    if not isinstance(updates, list) or not updates:
+        raise ValueError('Debe indicar los cambios en la lista updates')
+    result = []
+    for update in updates:
+        if not isinstance(update, dict):
+            raise ValueError('Cada cambio debe ser un objeto')
+        ids = update.get('ids')
+        if not isinstance(ids, list) or not ids or not all(
+            isinstance(pk, int) and not isinstance(pk, bool) for pk in ids
+        ):
+            raise ValueError('ids debe ser una lista de números')
+        values = {
+            field: update[field] for field in ('paid', 'exonerated')
+            if field in update
+        }
+        if not values or not all(
+            isinstance(value, bool) for value in values.values()
+        ):
+            raise ValueError(
+                'Debe indicar paid o exonerated como true o false'
+            )
+        if values.get('exonerated'):
+            values.setdefault('paid', False)
+        result.append((ids, values))
+    return result
+
+
+def update_family_heads(queryset, ids, **values):
+    """!
+    Función que cambia el estado del cobro de varios jefes familiares con
+    una sola consulta y actualiza los totales de sus condominios en la misma
+    transacción. La actualización no envía señales, por eso no queda en el
+    registro de auditoría
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param queryset <b>{object}</b> Jefes familiares que se pueden cambiar
+    @param ids <b>{list}</b> Identificadores de los jefes familiares
+    @param **values <b>{dict}</b> Valores nuevos de paid y exonerated
+    @return Retorna la cantidad de jefes familiares actualizados
+    """
+
+    with transaction.atomic():
+        rows = list(queryset.filter(id__in=ids).select_for_update(
+            of=('self',)
+        ).values_list(
+            'id', 'paid', 'exonerated', 'amount', 'payment__condominium'
+        ))
+        changes = {}
+        for pk, paid, exonerated, amount, condominium_id in rows:
+            add_state_change(
+                changes, condominium_id, amount,
+                payment_state(paid, exonerated),
+                payment_state(
+                    values.get('paid', paid),
+                    values.get('exonerated', exonerated)
+                )
+            )
+        updated = FamilyHead.objects.filter(
+            id__in=[row[0] for row in rows]
+        ).update(**values)
+        apply_total_changes(changes)
+    return updated
@@ -0,0 +1,216 @@
+from base.functions import PEOPLE_DATA
+
+from .models import FamilyGroup, Person
+from .signals import BLOCK_PATHS, current_block, mark_block, mark_changed
+
+# Campos de Person que se guardan desde el formulario del grupo familiar
+PERSON_FIELDS = (
+    'first_name',
+    'last_name',
+    'id_number',
+    'email',
+    'phone',
+    'birthdate',
+    'admission_date',
+    'gender',
+    'vote_type',
+    'relationship',
+    'family_head',
+    'family_group',
+)
+
+
+def find_family_head(people):
+    """!
+    Función que obtiene el jefe familiar de los datos validados de un grupo
+    familiar. El jefe familiar debe tener cédula, ya que las personas sin
+    cédula usan la suya
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param people <b>{list}</b> Datos validados de cada PersonForm
+    @return Retorna los datos del jefe familiar o None si no tiene cédula
+    """
+
+    head = next(person for person in people if person['family_head'])
+    if head['has_id_number'] != 'y':
+        return None
+    return head
+
+
+def person_fields(person, family_group, id_number):
+    """!
+    Función que obtiene los valores de los campos de una persona a partir de
+    los datos validados de su formulario
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param person <b>{dict}</b> Datos validados de PersonForm
+    @param family_group <b>{object}</b> Grupo familiar de la persona
+    @param id_number <b>{string}</b> Cédula que se guarda
+    @return Retorna un diccionario con los valores de PERSON_FIELDS y la
+        posición de orden del grupo familiar
+    """
+
+    return {
+        'first_name': person['first_name'],
+        'last_name': person['last_name'],
+        'id_number': id_number,
+        # Los campos opcionales vacíos se guardan como nulos
+        'email': person['email'] or None,
+        'phone': person['phone'] or None,
+        'birthdate': person['birthdate'],
+        'admission_date': person['admission_date'],
+        'gender': person['gender_id'],
+        'vote_type': person['vote_type_id'],
+        'relationship': person['relationship_id'],
+        'family_head': person['has_id_number'] == 'y' and bool(
+            person['family_head']
+        ),
+        'family_group': family_group,
+        # bulk_create no envía las señales, la posición de orden se copia
+        # aquí del grupo familiar
+        'location_key': family_group.location_key,
+    }
+
+
+def dependent_numbers(people, head_id_number):
+    """!
+    Función que obtiene el siguiente número consecutivo de las cédulas de
+    las personas sin cédula, que tienen la forma <cédula del jefe>-<número>
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param people <b>{list}</b> Personas registradas del grupo familiar
+    @param head_id_number <b>{string}</b> Cédula del jefe familiar
+    @return Retorna un número entero
+    """
+
+    prefix = head_id_number + '-'
+    numbers = [
+        int(person.id_number[len(prefix):]) for person in people
+        if person.id_number.startswith(prefix)
+        and person.id_number[len(prefix):].isdigit()
+    ]
+    return max(numbers, default=0) + 1
+
+
+def create_people(family_group, people):
+    """!
+    Función que registra todas las personas de un grupo familiar nuevo con
+    una sola consulta
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param family_group <b>{object}</b> Grupo familiar registrado
+    @param people <b>{list}</b> Datos validados de cada PersonForm
+    @return Retorna la lista de personas registradas
+    """
+
+    head_id_number = find_family_head(people)['id_number']
+    c = 1
+    person_list = []
+    for person in people:
+        if person['has_id_number'] == 'y':
+            id_number = person['id_number']
+        else:
+            id_number = head_id_number + '-' + str(c)
+            c = c + 1
+        person_list.append(
+            Person(**person_fields(person, family_group, id_number))
+        )
+    # bulk_create no envía las señales de Person. Los totales del bloque y la
+    # versión del censo se actualizan por las señales de FamilyGroup, pero
+    # la versión de los nombres de la búsqueda se marca aquí
+    person_list = Person.objects.bulk_create(person_list)
+    mark_changed(PEOPLE_DATA)
+    return person_list
+
+
+def update_people(family_group, records, people):
+    """!
+    Función que compara las personas registradas de un grupo familiar con
+    los datos enviados y guarda solo las diferencias: una consulta para
+    actualizar, una para registrar y una para eliminar. Las personas se
+    identifican por su id, o por su cédula si no lo tienen
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param family_group <b>{object}</b> Grupo familiar actualizado
+    @param records <b>{list}</b> Datos enviados de cada persona
+    @param people <b>{list}</b> Datos validados de cada PersonForm
+    @return Retorna un diccionario con las cédulas de las personas
+        registradas, actualizadas con sus campos cambiados y eliminadas
+    """
+
+    members = {person.id: person for person in family_group.person_set.all()}
+    by_id_number = {person.id_number: person for person in members.values()}
+    # Personas con cédula que se mueven desde otro grupo familiar
+    others = {
+        person.id_number: person for person in Person.objects.filter(
+            id_number__in=[
+                person['id_number'] for person in people
+                if person['has_id_number'] == 'y'
+                and person['id_number'] not in by_id_number
+            ]
+        ).exclude(family_group=family_group)
+    }
+    head_id_number = find_family_head(people)['id_number']
+    c = dependent_numbers(members.values(), head_id_number)
+
+    seen = set()
+    created, updated, fields = [], {}, set()
+    for record, person in zip(records, people):
+        current = members.get(record.get('id'))
+        if current is None and person['has_id_number'] == 'y':
+            current = by_id_number.get(person['id_number']) or others.get(
+                person['id_number']
+            )
+        if person['has_id_number'] == 'y':
+            id_number = person['id_number']
+        elif current and current.id_number.startswith(head_id_number + '-'):
+            id_number = current.id_number
+        else:
+            id_number = head_id_number + '-' + str(c)
+            c = c + 1
+        values = person_fields(person, family_group, id_number)
+        if current is None:
+            created.append(Person(**values))
+            continue
+        seen.add(current.id)
+        changed = [
+            field for field in PERSON_FIELDS
+            if getattr(current, field) != values[field]
+        ]
+        for field in changed:
+            setattr(current, field, values[field])
+        if changed:
+            updated[current] = changed
+            fields.update(changed)
+        if 'family_group' in changed:
+            current.location_key = values['location_key']
+            fields.add('location_key')
+    deleted = [person for pk, person in members.items() if pk not in seen]
+
+    # Bloques de las personas que se mueven desde otros grupos familiares
+    moved = [person.id for person in updated if person.id not in members]
+    block_ids = set(Person.objects.filter(id__in=moved).values_list(
+        BLOCK_PATHS[Person], flat=True
+    )) if moved else set()
+    if updated:
+        Person.objects.bulk_update(list(updated), sorted(fields))
+    if created:
+        Person.objects.bulk_create(created)
+    if deleted:
+        Person.objects.filter(
+            id__in=[person.id for person in deleted]
+        ).delete()
+    if updated or created:
+        # bulk_update y bulk_create no envían las señales de Person
+        block_ids.add(current_block(FamilyGroup, family_group))
+        for block_id in block_ids:
+            mark_block(block_id)
+        mark_changed()
+        mark_changed(PEOPLE_DATA)
+    return {
+        'created': [person.id_number for person in created],
+        'updated': {
+            person.id_number: changed for person, changed in updated.items()
+        },
+        'deleted': [person.id_number for person in deleted],
+    }
@@ -305,8 +305,7 @@ class StreetLeaderForm(ProfileForm):
             attrs={
                 'class': 'form-control select2', 'data-toggle': 'tooltip',
                 'title': 'Seleccione el bloque',
-                'onchange': "combo_update(this.value, 'base', 'Bridge',\
-                    'block', 'pk', 'name', 'id_bridge')",
+                'onchange': "combo_update(this.value, 'bridges', 'id_bridge')",
             }
         )
     )
@@ -450,6 +449,57 @@ class FamilyGroupUpdateForm(FamilyGroupForm):
         self.fields.pop('email')
 
 
+class LookupChoiceField(forms.ModelChoiceField):
+    """!
+    Clase de campo de selección que, si se le asignan objetos precargados,
+    valida el valor contra ellos en lugar de consultar la base de datos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    # Objetos precargados por identificador
+    objects = None
+
+    def to_python(self, value):
+        """!
+        Función que obtiene el objeto seleccionado
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param value <b>{string}</b> Identificador seleccionado
+        @return Retorna el objeto seleccionado o None
+        """
+
+        if self.objects is None or value in self.empty_values:
+            return super().to_python(value)
+        try:
+            return self.objects[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise forms.ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice', params={'value': value}
+            )
+
+
+def person_lookups():
+    """!
+    Función que precarga los objetos de los campos de selección de
+    PersonForm, para validar todos los formularios de un grupo familiar con
+    una consulta por modelo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna un diccionario de objetos por identificador, por campo
+    """
+
+    return {
+        'gender_id': Gender.objects.in_bulk(),
+        'vote_type_id': VoteType.objects.in_bulk(),
+        'relationship_id': Relationship.objects.in_bulk(),
+    }
+
+
 class PersonForm(forms.Form):
     """!
     Clase que contiene los campos del formulario
@@ -459,6 +509,21 @@ class PersonForm(forms.Form):
         GNU Public License versión 2 (GPLv2)</a>
     """
 
+    def __init__(self, *args, lookups=None, **kwargs):
+        """!
+        Función que inicializa el formulario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
+        @param lookups <b>{dict}</b> Objetos precargados de person_lookups
+        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
+        """
+
+        super().__init__(*args, **kwargs)
+        for name, objects in (lookups or {}).items():
+            self.fields[name].objects = objects
+
     # Nombres del usuario
     first_name = forms.CharField(
         label='Nombres:', max_length=100,
@@ -568,7 +633,7 @@ class PersonForm(forms.Form):
     )
 
     # Género
-    gender_id = forms.ModelChoiceField(
+    gender_id = LookupChoiceField(
         label='Género:', queryset=Gender.objects.all(),
         empty_label='Seleccione...',
         widget=forms.Select(attrs={
@@ -578,7 +643,7 @@ class PersonForm(forms.Form):
     )
 
     # Tipo de voto
-    vote_type_id = forms.ModelChoiceField(
+    vote_type_id = LookupChoiceField(
         label='Tipo de Voto:', queryset=VoteType.objects.all(),
         empty_label='Seleccione...',
         widget=forms.Select(attrs={
@@ -588,7 +653,7 @@ class PersonForm(forms.Form):
     )
 
     # Parentesco
-    relationship_id = forms.ModelChoiceField(
+    relationship_id = LookupChoiceField(
         label='Parentesco:', queryset=Relationship.objects.all(),
         empty_label='Seleccione...',
         widget=forms.Select(attrs={
@@ -770,8 +835,7 @@ class MoveOutForm(forms.ModelForm):
         widget=forms.Select(attrs={
             'class': 'form-control select2', 'data-toggle': 'tooltip',
             'title': 'Seleccione el bloque.',
-            'onchange': "combo_update(this.value, 'base', 'Bridge', 'block', 'pk', 'name',\
-                'id_bridge')",
+            'onchange': "combo_update(this.value, 'bridges', 'id_bridge')",
         })
     )
 
@@ -783,8 +847,7 @@ class MoveOutForm(forms.ModelForm):
         widget=forms.Select(attrs={
             'class': 'form-control select2', 'data-toggle': 'tooltip',
             'title': 'Seleccione el puente.', 'disabled': 'true',
-            'onchange': "combo_update(this.value, 'base', 'Building', 'bridge', 'pk', 'name',\
-                'id_building')",
+            'onchange': "combo_update(this.value, 'buildings', 'id_building')",
         })
     )
 
@@ -796,8 +859,8 @@ class MoveOutForm(forms.ModelForm):
         widget=forms.Select(attrs={
             'class': 'form-control select2', 'data-toggle': 'tooltip',
             'title': 'Seleccione el edificio.', 'disabled': 'true',
-            'onchange': "combo_update(this.value, 'base', 'Department', 'building', 'pk', 'name',\
-                'id_department')",
+            'onchange':
+                "combo_update(this.value, 'departments', 'id_department')",
         })
     )
 
@@ -916,3 +979,22 @@ class CondominiumForm(forms.ModelForm):
 
         model = Condominium
         fields = ['date', 'rate', 'amount',]
+
+
+class CensusImportForm(forms.Form):
+    """!
+    Clase que contiene los campos del formulario de importación del censo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    # Archivo con los grupos familiares
+    file = forms.FileField(
+        label='Archivo:',
+        validators=[
+            validators.FileExtensionValidator(['csv', 'xlsx']),
+        ],
+        help_text='Archivo CSV o XLSX con las columnas de la plantilla',
+    )
@@ -1,6 +1,11 @@
 import secrets
 import string
 
+from django.contrib.auth.tokens import default_token_generator
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
 
 def generate_password(length: int = 10, nb_digits: int = 3) -> str:
     """
@@ -26,3 +31,24 @@ def generate_password(length: int = 10, nb_digits: int = 3) -> str:
         ):
             break
     return password
+
+
+def password_url(request, user):
+    """!
+    Función que arma el enlace con el que un usuario registrado establece su
+    contraseña. El correo de bienvenida lleva este enlace en lugar de la
+    contraseña, que no debe quedar guardada en la bandeja de salida
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param request <b>{object}</b> Objeto que contiene la petición
+    @param user <b>{object}</b> Usuario registrado, con su contraseña ya
+        asignada
+    @return Retorna la dirección absoluta del enlace
+    """
+
+    return request.build_absolute_uri(reverse(
+        'user:password_reset_confirm', kwargs={
+            'uidb64': urlsafe_base64_encode(force_bytes(user.pk)),
+            'token': default_token_generator.make_token(user),
+        }
+    ))
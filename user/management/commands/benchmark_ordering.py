@@ -0,0 +1,285 @@
+import datetime
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import Max
+
+from base.models import Block, Bridge, Building, CommunalCouncil, Department
+from base.territory import refresh_locations
+from user.condominiums import create_payments
+from user.models import (
+    CommunityLeader,
+    Condominium,
+    FamilyGroup,
+    FamilyHead,
+    Payment,
+    Person,
+    Profile,
+    StreetLeader,
+)
+
+# Orden anterior de cada modelo, por los nombres de su ubicación
+LEGACY_ORDERINGS = {
+    FamilyGroup: [
+        'department__building__bridge__block__name',
+        'department__building__name',
+        'department__name',
+    ],
+    Person: [
+        'family_group__department__building__bridge__block__name',
+        'family_group__department__building__name',
+        'family_group__department__name',
+    ],
+    Payment: [
+        'department__building__bridge__block__name',
+        'department__building__bridge__name',
+        'department__building__name',
+        'department__name',
+    ],
+    FamilyHead: [
+        'payment__department__building__bridge__block__name',
+        'payment__department__building__bridge__name',
+        'payment__department__building__name',
+        'payment__department__name',
+    ],
+}
+
+# Objetos por página, igual que en las vistas
+PAGE_SIZE = 10
+
+# Bloques, puentes por bloque y edificios por puente de los datos de prueba
+BLOCKS = 10
+BRIDGES = 10
+BUILDINGS = 10
+
+# Personas de cada grupo familiar de prueba
+FAMILY_SIZE = 4
+
+# Tablas que se analizan en PostgreSQL después de registrar los datos de
+# prueba, para que el planificador conozca su tamaño
+ANALYZE_MODELS = (
+    Block, Bridge, Building, Department, FamilyGroup, Person, Payment,
+    FamilyHead,
+)
+
+
+def create_census(communal_council, families):
+    """!
+    Función que registra una división territorial y un censo de prueba en un
+    consejo comunal, con un grupo familiar por departamento y un pago por
+    departamento
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param communal_council <b>{object}</b> Consejo comunal de los datos
+    @param families <b>{int}</b> Cantidad de grupos familiares
+    @return Retorna un diccionario con un líder de calle y el condominio
+    """
+
+    per_building = max(1, families // (BLOCKS * BRIDGES * BUILDINGS))
+    blocks = Block.objects.bulk_create([
+        Block(name='Bloque %02d' % number, communal_council=communal_council)
+        for number in range(BLOCKS, 0, -1)
+    ])
+    bridges = Bridge.objects.bulk_create([
+        Bridge(name='Puente %02d' % number, block=block)
+        for block in blocks for number in range(BRIDGES, 0, -1)
+    ])
+    buildings = Building.objects.bulk_create([
+        Building(name='Edificio %02d' % number, bridge=bridge)
+        for bridge in bridges for number in range(BUILDINGS, 0, -1)
+    ])
+    departments = Department.objects.bulk_create([
+        Department(name='%04d' % number, building=building)
+        for building in buildings for number in range(per_building, 0, -1)
+    ])
+    refresh_locations()
+    sort_keys = dict(Department.objects.filter(
+        id__in=[department.id for department in departments]
+    ).values_list('id', 'sort_key'))
+
+    users = User.objects.bulk_create([
+        User(username='benchmark%06d' % number)
+        for number in range(len(bridges) + len(departments) + 1)
+    ])
+    profiles = Profile.objects.bulk_create([
+        Profile(user=user) for user in users
+    ])
+    community_leader = CommunityLeader.objects.create(
+        communal_council=communal_council, profile=profiles[0]
+    )
+    street_leaders = StreetLeader.objects.bulk_create([
+        StreetLeader(
+            community_leader=community_leader, profile=profile, bridge=bridge
+        ) for profile, bridge in zip(profiles[1:], bridges)
+    ])
+    leaders = {leader.bridge_id: leader for leader in street_leaders}
+    buildings = {building.id: building for building in buildings}
+    family_groups = FamilyGroup.objects.bulk_create([
+        FamilyGroup(
+            street_leader=leaders[buildings[department.building_id].bridge_id],
+            profile=profile,
+            department=department,
+            location_key=sort_keys[department.id],
+        ) for profile, department in zip(
+            profiles[len(bridges) + 1:], departments
+        )
+    ])
+    Person.objects.bulk_create([
+        Person(
+            first_name='Persona', last_name='%d' % number,
+            id_number='b%06d-%d' % (family_group.id % 1000000, number),
+            family_head=number == 0,
+            birthdate=datetime.date(1950 + number * 15, 1, 1),
+            family_group=family_group,
+            location_key=family_group.location_key,
+        )
+        for family_group in family_groups for number in range(FAMILY_SIZE)
+    ], batch_size=5000)
+
+    last_date = Condominium.objects.aggregate(date=Max('date'))['date']
+    condominium = Condominium.objects.create(
+        date=(last_date or datetime.date.today()) + datetime.timedelta(1),
+        rate=1, amount=1, user=users[0],
+    )
+    create_payments(condominium, users[0])
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            for model in ANALYZE_MODELS:
+                cursor.execute('ANALYZE %s' % connection.ops.quote_name(
+                    model._meta.db_table
+                ))
+    return {'street_leader': street_leaders[0], 'condominium': condominium}
+
+
+def benchmark_queries(census):
+    """!
+    Función que obtiene las consultas de listas y paginación que se miden
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param census <b>{dict}</b> Datos de prueba de create_census
+    @return Retorna una lista de tuplas con el nombre, el queryset y la
+        página
+    """
+
+    people = Person.objects.all()
+    pages = (people.count() + PAGE_SIZE - 1) // PAGE_SIZE
+    return [
+        ('Primera página de personas', people, 1),
+        ('Página intermedia de personas', people, max(1, pages // 2)),
+        ('Grupos familiares de un líder de calle', FamilyGroup.objects.filter(
+            street_leader=census['street_leader']
+        ), 1),
+        ('Primera página de grupos familiares', FamilyGroup.objects.all(), 1),
+        ('Pagos de un condominio', Payment.objects.filter(
+            condominium=census['condominium']
+        ), 1),
+        ('Jefes familiares de un condominio', FamilyHead.objects.filter(
+            payment__condominium=census['condominium']
+        ), 1),
+    ]
+
+
+def measure(queryset, page, runs):
+    """!
+    Función que mide el tiempo de contar y consultar una página de un
+    queryset, como lo hace la paginación de las vistas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param queryset <b>{object}</b> Queryset que se pagina
+    @param page <b>{int}</b> Número de la página
+    @param runs <b>{int}</b> Cantidad de repeticiones
+    @return Retorna el mejor tiempo en milisegundos
+    """
+
+    best = None
+    for run in range(runs):
+        start = time.perf_counter()
+        list(Paginator(queryset, PAGE_SIZE).page(page).object_list)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def join_count(queryset):
+    """!
+    Función que cuenta las tablas relacionadas de la consulta de un queryset
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param queryset <b>{object}</b> Queryset
+    @return Retorna un número entero
+    """
+
+    return str(queryset.query).count(' JOIN ')
+
+
+class Command(BaseCommand):
+    """!
+    Clase que compara el orden anterior por los nombres de la ubicación con
+    el orden por la posición copiada en cada modelo, en las consultas de
+    listas y paginación, sobre un censo de prueba que se descarta al terminar
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    help = 'Mide las consultas de listas y paginación con el orden ' \
+        'anterior y con el orden por ubicación sobre un censo de prueba'
+
+    def add_arguments(self, parser):
+        """!
+        Función que agrega los argumentos del comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param parser <b>{object}</b> Objeto que procesa los argumentos
+        """
+
+        parser.add_argument(
+            '--families', type=int, default=20000,
+            help='Grupos familiares del censo de prueba'
+        )
+        parser.add_argument(
+            '--runs', type=int, default=5,
+            help='Repeticiones de cada consulta, se toma el mejor tiempo'
+        )
+
+    def handle(self, *args, **options):
+        """!
+        Función que ejecuta el comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **options <b>{dict}</b> Opciones del comando
+        """
+
+        communal_council = CommunalCouncil.objects.order_by('id').first()
+        if communal_council is None:
+            raise CommandError('Debe registrar un consejo comunal')
+        # Los datos de prueba se registran en una transacción que se revierte
+        # al terminar
+        with transaction.atomic():
+            start = time.perf_counter()
+            census = create_census(communal_council, options['families'])
+            self.stdout.write('Censo de prueba: %s personas en %.1f s' % (
+                Person.objects.count(), time.perf_counter() - start
+            ))
+            for name, queryset, page in benchmark_queries(census):
+                legacy = queryset.order_by(
+                    *LEGACY_ORDERINGS[queryset.model]
+                )
+                self.stdout.write(
+                    '%s (página %s): anterior %.1f ms con %s joins, actual '
+                    '%.1f ms con %s joins' % (
+                        name, page,
+                        measure(legacy, page, options['runs']),
+                        join_count(legacy),
+                        measure(queryset, page, options['runs']),
+                        join_count(queryset),
+                    )
+                )
+            transaction.set_rollback(True)
@@ -0,0 +1,211 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from base.models import (
+    Block,
+    Building,
+    CommunalCouncil,
+    Country,
+    DataVersion,
+    Department,
+    Estate,
+    Gender,
+    Municipality,
+    Parish,
+    Relationship,
+    ReportJob,
+    Ubch,
+    VoteType,
+)
+from user.models import (
+    Condominium,
+    FamilyGroup,
+    FamilyHead,
+    Payment,
+    Person,
+    StreetLeader,
+)
+from user.search import prefix_filter
+
+# Recorridos completos de una tabla en el plan de PostgreSQL y de SQLite
+SEQ_SCAN_RE = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)$'),
+}
+
+# Catálogos pequeños que la base de datos puede recorrer completos sin
+# costo
+SMALL_MODELS = (
+    CommunalCouncil,
+    Country,
+    DataVersion,
+    Estate,
+    Gender,
+    Municipality,
+    Parish,
+    Relationship,
+    Ubch,
+    VoteType,
+)
+
+
+def first_id(model):
+    """!
+    Función que obtiene el identificador de un registro cualquiera de un
+    modelo, usado como ejemplo en las consultas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param model <b>{object}</b> Modelo
+    @return Retorna un número entero, 0 si el modelo no tiene registros
+    """
+
+    return model.objects.order_by().values_list('id', flat=True).first() or 0
+
+
+def hot_queries():
+    """!
+    Función que obtiene las consultas más usadas del censo, con los mismos
+    filtros de las vistas, los reportes y las estadísticas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna una lista de tuplas con el nombre y el queryset
+    """
+
+    communal_council_id = first_id(CommunalCouncil)
+    street_leader_id = first_id(StreetLeader)
+    family_group_id = first_id(FamilyGroup)
+    condominium_id = first_id(Condominium)
+    return [
+        ('Personas de un consejo comunal', Person.objects.filter(**{
+            'family_group__street_leader__community_leader__'
+            'communal_council_id': communal_council_id
+        }).order_by()),
+        ('Personas de un líder de calle', Person.objects.filter(
+            family_group__street_leader_id=street_leader_id
+        ).order_by()),
+        ('Personas de un bloque', Person.objects.filter(
+            family_group__department__building__bridge__block_id=first_id(
+                Block
+            )
+        ).order_by()),
+        ('Jefes familiares de un grupo familiar', Person.objects.filter(
+            family_group_id=family_group_id, family_head=True
+        ).order_by()),
+        ('Personas por género y edad', Person.objects.age_between(
+            7, 12
+        ).filter(gender__id=first_id(Gender)).order_by()),
+        ('Personas por cédula', prefix_filter(
+            Person.objects.order_by(), '1234'
+        )),
+        ('Grupos familiares de un líder de calle', FamilyGroup.objects.filter(
+            street_leader_id=street_leader_id, department__isnull=False
+        ).order_by()),
+        ('Departamentos de un edificio', Department.objects.filter(
+            building_id=first_id(Building)
+        )),
+        ('Condominios de un líder de comunidad', Condominium.objects.filter(
+            user_id=first_id(User)
+        )),
+        ('Cobros de un condominio por líder de calle', Payment.objects.filter(
+            condominium_id=condominium_id
+        ).order_by().values('user').annotate(departments=Count('id'))),
+        ('Estado de los cobros de un pago', FamilyHead.objects.filter(
+            payment_id=first_id(Payment), paid=True, exonerated=False
+        ).order_by()),
+        ('Página de personas ordenadas por ubicación', Person.objects.all()[
+            :20
+        ]),
+        ('Página de pagos de un condominio', Payment.objects.filter(
+            condominium_id=condominium_id
+        )[:20]),
+        ('Reportes pendientes', ReportJob.objects.filter(
+            status=ReportJob.PENDING
+        )),
+    ]
+
+
+class Command(BaseCommand):
+    """!
+    Clase que muestra el plan de ejecución de las consultas más usadas del
+    censo y señala las que recorren tablas completas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    help = 'Ejecuta EXPLAIN en las consultas más usadas del censo y ' \
+        'señala los recorridos completos de tablas'
+
+    def add_arguments(self, parser):
+        """!
+        Función que agrega los argumentos del comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param parser <b>{object}</b> Objeto que procesa los argumentos
+        """
+
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Ejecuta las consultas con EXPLAIN ANALYZE (solo '
+            'PostgreSQL)'
+        )
+        parser.add_argument(
+            '--plans', action='store_true',
+            help='Muestra el plan completo de cada consulta'
+        )
+        parser.add_argument(
+            '--fail', action='store_true',
+            help='Termina con error si alguna consulta recorre una tabla '
+            'completa'
+        )
+
+    def handle(self, *args, **options):
+        """!
+        Función que ejecuta el comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **options <b>{dict}</b> Opciones del comando
+        """
+
+        seq_scan = SEQ_SCAN_RE.get(connection.vendor)
+        if seq_scan is None:
+            raise CommandError(
+                'Base de datos no soportada: %s' % connection.vendor
+            )
+        explain = {}
+        if options['analyze']:
+            if connection.vendor != 'postgresql':
+                raise CommandError('--analyze solo se usa con PostgreSQL')
+            explain['analyze'] = True
+        small_tables = {model._meta.db_table for model in SMALL_MODELS}
+        flagged = 0
+        for name, queryset in hot_queries():
+            plan = queryset.explain(**explain)
+            tables = sorted({
+                table for line in plan.splitlines()
+                for table in seq_scan.findall(line.strip())
+                if table not in small_tables
+            })
+            if tables:
+                flagged = flagged + 1
+                self.stdout.write(self.style.WARNING(
+                    '%s: recorre %s' % (name, ', '.join(tables))
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS('%s: usa índices' % (
+                    name
+                )))
+            if options['plans']:
+                self.stdout.write(plan + '\n')
+        if flagged and options['fail']:
+            raise CommandError(
+                'Consultas con recorridos completos: %s' % flagged
+            )
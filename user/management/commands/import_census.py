@@ -0,0 +1,100 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from user.census_import import (
+    ERROR_COLUMNS,
+    CensusImport,
+    read_checkpoint,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    """!
+    Clase que importa grupos familiares desde un archivo CSV o XLSX, por
+    lotes y con un archivo de control para continuar una importación
+    interrumpida
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    help = 'Importa grupos familiares desde un archivo CSV o XLSX'
+
+    def add_arguments(self, parser):
+        """!
+        Función que agrega los argumentos del comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param parser <b>{object}</b> Objeto que procesa los argumentos
+        """
+
+        parser.add_argument('path', help='Archivo CSV o XLSX')
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help='Grupos familiares registrados en cada transacción'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Archivo de control con la última fila importada. Por '
+            'defecto <archivo>.checkpoint'
+        )
+        parser.add_argument(
+            '--errors',
+            help='Reporte CSV de las filas con errores. Por defecto '
+            '<archivo>.errors.csv'
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Continúa desde la última fila del archivo de control'
+        )
+
+    def handle(self, *args, **options):
+        """!
+        Función que ejecuta el comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **options <b>{dict}</b> Opciones del comando
+        """
+
+        path = options['path']
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size debe ser mayor a 0')
+        checkpoint = options['checkpoint'] or path + '.checkpoint'
+        errors_path = options['errors'] or path + '.errors.csv'
+        start = read_checkpoint(checkpoint) if options['resume'] else 0
+        # Al continuar se agregan los errores al reporte anterior
+        append = start > 0 and os.path.exists(errors_path)
+        try:
+            with open(path, 'rb') as file, open(
+                errors_path, 'a' if append else 'w', newline=''
+            ) as errors:
+                if not append:
+                    csv.writer(errors).writerow(ERROR_COLUMNS)
+                census_import = CensusImport(
+                    options['chunk_size'], checkpoint, errors
+                )
+                created = census_import.run(read_rows(file, path), start)
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        if start:
+            self.stdout.write('Importación continuada desde la fila %s' % (
+                start
+            ))
+        self.stdout.write(self.style.SUCCESS(
+            'Grupos familiares: %(family_groups)s, personas: %(people)s'
+            % created
+        ))
+        if census_import.error_list:
+            self.stdout.write(self.style.WARNING(
+                'Filas con errores: %s, ver %s' % (
+                    len({error[0] for error in census_import.error_list}),
+                    errors_path
+                )
+            ))
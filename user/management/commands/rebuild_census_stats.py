@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from base.demographics import rebuild_census_stats
+from user.models import CensusStats
+
+
+class Command(BaseCommand):
+    """!
+    Clase que recalcula los totales del censo de todos los bloques y consejos
+    comunales
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    help = 'Recalcula los totales del censo por bloque y consejo comunal'
+
+    def handle(self, *args, **options):
+        """!
+        Función que ejecuta el comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **options <b>{dict}</b> Opciones del comando
+        """
+
+        rebuild_census_stats()
+        self.stdout.write(self.style.SUCCESS(
+            'Totales recalculados: %s' % CensusStats.objects.count()
+        ))
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+
+from user.models import (
+    Condominium,
+    FamilyHead,
+    condominium_totals,
+    ledger_counts,
+)
+
+
+class Command(BaseCommand):
+    """!
+    Clase que compara los totales guardados de cada condominio con los
+    calculados a partir de sus jefes familiares, y opcionalmente los corrige
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    help = 'Compara y corrige los totales guardados de los condominios'
+
+    def add_arguments(self, parser):
+        """!
+        Función que agrega los argumentos del comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param parser <b>{object}</b> Objeto que procesa los argumentos
+        """
+
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Guarda los totales calculados de los condominios con '
+            'diferencias'
+        )
+
+    def handle(self, *args, **options):
+        """!
+        Función que ejecuta el comando
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **options <b>{dict}</b> Opciones del comando
+        """
+
+        # Totales de todos los condominios con una sola consulta agrupada
+        counts = {
+            row.pop('payment__condominium'): condominium_totals(row)
+            for row in FamilyHead.objects.order_by().values(
+                'payment__condominium'
+            ).annotate(**ledger_counts())
+        }
+        empty = condominium_totals({
+            'paid_total': None, 'paid_count': 0, 'unpaid_count': 0,
+            'exonerated_count': 0,
+        })
+        drift = 0
+        for condominium in Condominium.objects.all():
+            totals = counts.get(condominium.id, empty)
+            changed = {
+                field: value for field, value in totals.items()
+                if getattr(condominium, field) != value
+            }
+            if not changed:
+                continue
+            drift = drift + 1
+            self.stdout.write(self.style.WARNING('%s: %s' % (
+                condominium, ', '.join(
+                    '%s %s -> %s' % (field, getattr(condominium, field), value)
+                    for field, value in changed.items()
+                )
+            )))
+            if options['fix']:
+                Condominium.objects.filter(pk=condominium.pk).update(
+                    **changed
+                )
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('Totales sin diferencias'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(
+                'Condominios corregidos: %s' % drift
+            ))
+        else:
+            self.stdout.write(
+                'Condominios con diferencias: %s, use --fix para corregirlos'
+                % drift
+            )
@@ -0,0 +1,41 @@
+from django.utils.functional import SimpleLazyObject
+
+from .roles import get_census_role
+
+
+class CensusRoleMiddleware:
+    """!
+    Clase que agrega a cada petición el rol del usuario en
+    request.census_role. El rol se resuelve solo si la vista lo usa y se
+    guarda en la sesión
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def __init__(self, get_response):
+        """!
+        Función que inicializa el middleware
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param get_response <b>{object}</b> Función que procesa la petición
+        """
+
+        self.get_response = get_response
+
+    def __call__(self, request):
+        """!
+        Función que procesa la petición
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param request <b>{object}</b> Objeto que contiene la petición
+        @return Retorna la respuesta de la vista
+        """
+
+        request.census_role = SimpleLazyObject(
+            lambda: get_census_role(request)
+        )
+        return self.get_response(request)
@@ -1,12 +1,25 @@
 import datetime
+import math
+from collections import namedtuple
 
 from dateutil.relativedelta import relativedelta
 from decimal import Decimal
 from django.contrib.auth.models import User
 from django.core import validators
 from django.db import models
+from django.db.models import (
+    Count,
+    F,
+    Func,
+    IntegerField,
+    Q,
+    Sum,
+    Value,
+)
+from django.db.models.functions import Coalesce
 
 from base.models import (
+    Block,
     Bridge,
     CommunalCouncil,
     Department,
@@ -17,6 +30,20 @@ from base.models import (
 )
 
 
+def calculate_age(birthdate):
+    """!
+    Función que calcula la edad a partir de la fecha de nacimiento
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param birthdate <b>{object}</b> Fecha de nacimiento
+    @return Retorna un número entero que representa la edad
+    """
+
+    if birthdate:
+        return int((datetime.date.today() - birthdate).days / 365.25)
+    return 0
+
+
 class Profile(models.Model):
     """!
     Clase que contiene los datos del perfil de usuario
@@ -231,6 +258,12 @@ class FamilyGroup(models.Model):
         null=True
     )
 
+    # Posición del departamento en la división territorial, copiada de
+    # Department.sort_key para ordenar sin consultar la ubicación
+    location_key = models.PositiveIntegerField(
+        'ubicación', default=0, editable=False
+    )
+
     def __str__(self):
         """!
         Función para representar la clase de forma amigable
@@ -251,11 +284,153 @@ class FamilyGroup(models.Model):
 
         verbose_name = 'Grupo Familiar'
         verbose_name_plural = 'Grupos Familiares'
-        ordering= [
-            'department__building__bridge__block__name',
-            'department__building__name',
-            'department__name'
+        indexes = [
+            # Grupos familiares de un líder de calle con su departamento
+            models.Index(
+                fields=['street_leader', 'department'],
+                name='familygroup_leader_dept_idx'
+            ),
+            # Grupos familiares de un líder de calle ordenados por ubicación
+            models.Index(
+                fields=['street_leader', 'location_key', 'id'],
+                name='familygroup_leader_loc_idx'
+            ),
+            models.Index(
+                fields=['location_key', 'id'], name='familygroup_location_idx'
+            ),
         ]
+        ordering = ['location_key', 'id']
+
+
+def birthdate_limit(years):
+    """!
+    Función que calcula la fecha de nacimiento a partir de la cual una
+    persona cumple una edad, con el mismo criterio de calculate_age
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param years <b>{int}</b> Edad en años
+    @return Retorna la fecha de nacimiento límite
+    """
+
+    return datetime.date.today() - datetime.timedelta(
+        days=math.ceil(years * 365.25)
+    )
+
+
+def age_q(age1=None, age2=None):
+    """!
+    Función que construye la condición de personas con edad entre dos valores,
+    incluidos. Las personas sin fecha de nacimiento tienen edad 0
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param age1 <b>{int}</b> Edad mínima, None para no limitarla
+    @param age2 <b>{int}</b> Edad máxima, None para no limitarla
+    @return Retorna un objeto Q sobre la fecha de nacimiento
+    """
+
+    condition = Q()
+    if age1 is not None and age1 > 0:
+        condition &= Q(birthdate__lte=birthdate_limit(age1))
+    if age2 is not None:
+        if age2 < 0:
+            return Q(pk__in=[])
+        condition &= (
+            Q(birthdate__gt=birthdate_limit(age2 + 1)) |
+            Q(birthdate__isnull=True)
+        )
+    return condition
+
+
+class DaysBetween(Func):
+    """!
+    Clase que calcula en la base de datos los días entre dos fechas, la
+    primera menos la segunda
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    arity = 2
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+    output_field = IntegerField()
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        """!
+        Método que resta las fechas como días julianos, ya que SQLite guarda
+        las fechas como texto
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param compiler <b>{object}</b> Compilador de la consulta
+        @param connection <b>{object}</b> Conexión con la base de datos
+        @param **extra_context <b>{dict}</b> Datos adicionales de la plantilla
+        @return Retorna una tupla con el sql y sus parámetros
+        """
+
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(', **extra_context
+        )
+
+
+class PersonQuerySet(models.QuerySet):
+    """!
+    Clase que filtra las personas por edad en la base de datos, convirtiendo
+    los límites de edad en rangos de fecha de nacimiento
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def with_age(self):
+        """!
+        Método que agrega la edad en años cumplidos como el campo age_years,
+        calculada con los días desde la fecha de nacimiento como en
+        calculate_age, para que coincida con Person.age() y con age_q. Las
+        personas sin fecha de nacimiento tienen edad 0
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna el queryset con la edad calculada
+        """
+
+        # int(días / 365.25) es la división entera de 4 * días entre 1461,
+        # que la base de datos hace sin decimales
+        days = DaysBetween(Value(datetime.date.today()), F('birthdate'))
+        return self.annotate(age_years=Coalesce(
+            days * 4 / 1461, Value(0), output_field=IntegerField()
+        ))
+
+    def age_at_least(self, age):
+        """!
+        Método que filtra las personas con edad mayor o igual a la indicada
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param age <b>{int}</b> Edad mínima
+        @return Retorna el queryset filtrado
+        """
+
+        return self.filter(age_q(age1=age))
+
+    def age_between(self, age1, age2):
+        """!
+        Método que filtra las personas con edad entre dos valores, incluidos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param age1 <b>{int}</b> Edad mínima
+        @param age2 <b>{int}</b> Edad máxima
+        @return Retorna el queryset filtrado
+        """
+
+        if age1 > age2:
+            return self.none()
+        return self.filter(age_q(age1, age2))
 
 
 class Person(models.Model):
@@ -324,6 +499,14 @@ class Person(models.Model):
         FamilyGroup, on_delete=models.CASCADE, verbose_name='grupo familiar'
     )
 
+    # Posición del departamento en la división territorial, copiada de
+    # FamilyGroup.location_key para ordenar sin consultar la ubicación
+    location_key = models.PositiveIntegerField(
+        'ubicación', default=0, editable=False
+    )
+
+    objects = PersonQuerySet.as_manager()
+
     def age(self):
         """!
         Método que calcula la edad de la persona
@@ -333,9 +516,7 @@ class Person(models.Model):
         @return Retorna un número entero que representa la edad
         """
 
-        if self.birthdate:
-            return int((datetime.date.today() - self.birthdate).days / 365.25)
-        return 0
+        return calculate_age(self.birthdate)
 
     def living(self):
         """!
@@ -371,11 +552,27 @@ class Person(models.Model):
 
         verbose_name = 'Persona'
         verbose_name_plural = 'Personas'
-        ordering = [
-            'family_group__department__building__bridge__block__name',
-            'family_group__department__building__name',
-            'family_group__department__name'
+        indexes = [
+            # Jefes familiares de un grupo familiar
+            models.Index(
+                fields=['family_group', 'family_head'],
+                name='person_group_head_idx'
+            ),
+            # Personas por género y rango de edad
+            models.Index(
+                fields=['gender', 'birthdate'],
+                name='person_gender_birthdate_idx'
+            ),
+            # Personas por rango de edad
+            models.Index(
+                fields=['birthdate'], name='person_birthdate_idx'
+            ),
+            # Personas ordenadas por ubicación
+            models.Index(
+                fields=['location_key', 'id'], name='person_location_idx'
+            ),
         ]
+        ordering = ['location_key', 'id']
 
 
 class Admonition(models.Model):
@@ -484,6 +681,70 @@ class MoveOut(models.Model):
         verbose_name_plural = 'Mudanzas'
 
 
+# Totales del cobro de un condominio: monto pagado en bs, jefes familiares
+# pagados, no pagados y exonerados, y departamentos
+LedgerTotals = namedtuple(
+    'LedgerTotals', [
+        'paid_total', 'paid_count', 'unpaid_count', 'exonerated_count',
+        'departments',
+    ],
+    defaults=[0, 0, 0, 0, 0]
+)
+
+
+def bs_amount(value):
+    """!
+    Función que redondea a dos decimales una suma de montos en bs, ya que
+    algunas bases de datos no conservan los decimales al sumar
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param value <b>{object}</b> Suma de montos o None si no hay montos
+    @return Retorna un número Decimal o 0
+    """
+
+    if value is None:
+        return 0
+    return value.quantize(Decimal('0.01'))
+
+
+def ledger_counts(prefix=''):
+    """!
+    Función que construye las sumas y conteos condicionales de los cobros de
+    los jefes familiares. Un cobro exonerado no se cuenta como pagado
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param prefix <b>{string}</b> Ruta desde el modelo consultado hasta
+        FamilyHead
+    @return Retorna un diccionario de expresiones Sum y Count
+    """
+
+    paid = Q(**{prefix + 'paid': True, prefix + 'exonerated': False})
+    unpaid = Q(**{prefix + 'paid': False, prefix + 'exonerated': False})
+    exonerated = Q(**{prefix + 'exonerated': True})
+    return {
+        'paid_total': Sum(prefix + 'amount', filter=paid),
+        'paid_count': Count(prefix + 'id', filter=paid),
+        'unpaid_count': Count(prefix + 'id', filter=unpaid),
+        'exonerated_count': Count(prefix + 'id', filter=exonerated),
+    }
+
+
+def condominium_totals(counts):
+    """!
+    Función que convierte los conteos de ledger_counts en los valores de los
+    totales guardados en Condominium
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param counts <b>{dict}</b> Conteos de ledger_counts
+    @return Retorna un diccionario de totales por campo
+    """
+
+    return {
+        **counts,
+        'paid_total': bs_amount(counts['paid_total']) or Decimal('0.00'),
+    }
+
+
 class Condominium(models.Model):
     """!
     Clase que contiene pagos del condominio
@@ -518,6 +779,84 @@ class Condominium(models.Model):
         db_comment='Relación con el modelo usuario'
     )
 
+    # Monto pagado en bs, sin los cobros exonerados
+    paid_total = models.DecimalField(
+        'total pagado', max_digits=12, decimal_places=2,
+        default=Decimal('0.00'), db_comment='Monto pagado en bs'
+    )
+
+    # Total de cobros pagados
+    paid_count = models.IntegerField(
+        'pagados', default=0, db_comment='Total de cobros pagados'
+    )
+
+    # Total de cobros no pagados
+    unpaid_count = models.IntegerField(
+        'no pagados', default=0, db_comment='Total de cobros no pagados'
+    )
+
+    # Total de cobros exonerados
+    exonerated_count = models.IntegerField(
+        'exonerados', default=0, db_comment='Total de cobros exonerados'
+    )
+
+    def ledger(self, users=None):
+        """!
+        Método que calcula los totales de los cobros del condominio por
+        líder de calle con una sola consulta agrupada
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param users <b>{object}</b> Usuarios de los líderes de calle, None
+            para incluirlos a todos
+        @return Retorna una tupla con un diccionario de LedgerTotals por
+            usuario del líder de calle y el LedgerTotals de todos ellos
+        """
+
+        payments = self.payment_set.all()
+        if users is not None:
+            payments = payments.filter(user__in=users)
+        totals = {
+            row.pop('user'): LedgerTotals(**{
+                **row, 'paid_total': bs_amount(row['paid_total'])
+            })
+            for row in payments.order_by().values('user').annotate(
+                departments=Count('id', distinct=True),
+                **ledger_counts('familyhead__')
+            )
+        }
+        return totals, LedgerTotals(*(
+            sum(values) for values in zip(LedgerTotals(), *totals.values())
+        ))
+
+    def count_totals(self):
+        """!
+        Método que calcula los totales de los cobros del condominio a partir
+        de sus jefes familiares, con los nombres de los campos guardados
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un diccionario de totales por campo
+        """
+
+        return condominium_totals(FamilyHead.objects.filter(
+            payment__condominium=self
+        ).aggregate(**ledger_counts()))
+
+    def refresh_totals(self):
+        """!
+        Método que recalcula y guarda los totales de los cobros del
+        condominio
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        totals = self.count_totals()
+        Condominium.objects.filter(pk=self.pk).update(**totals)
+        for field, value in totals.items():
+            setattr(self, field, value)
+
     def total_amount_bs(self):
         """!
         Método que calcula la suma de todos los pagos del conominio por departamento en bs
@@ -527,12 +866,7 @@ class Condominium(models.Model):
         @return Retorna un número entero que representa el total de pagos de condominios
         """
 
-        sum = 0
-        for payment in self.payment_set.all():
-            for family_head in payment.familyhead_set.all():
-                if family_head.paid and not family_head.exonerated:
-                    sum = sum + family_head.amount
-        return sum
+        return self.paid_total or 0
     
     def total_amount_usd(self):
         """!
@@ -565,6 +899,12 @@ class Condominium(models.Model):
 
         verbose_name = 'Condominio'
         verbose_name_plural = 'Condominios'
+        indexes = [
+            # Condominios de un líder de comunidad, los más recientes primero
+            models.Index(
+                fields=['user', '-date'], name='condominium_user_date_idx'
+            ),
+        ]
         ordering = ['-date']
 
 
@@ -595,6 +935,13 @@ class Payment(models.Model):
         db_comment='Relación con el modelo usuario',
     )
 
+    # Posición del departamento en la división territorial, copiada de
+    # Department.sort_key para ordenar sin consultar la ubicación
+    location_key = models.PositiveIntegerField(
+        'ubicación', default=0, editable=False,
+        db_comment='Posición del departamento en la división territorial',
+    )
+
     def __str__(self):
         """!
         Función para representar la clase de forma amigable
@@ -613,14 +960,21 @@ class Payment(models.Model):
         @author William Páez (paez.william8 at gmail.com)
         """
 
-        ordering = [
-            'department__building__bridge__block__name',
-            'department__building__bridge__name',
-            'department__building__name',
-            'department__name',
-        ]
+        ordering = ['location_key', 'id']
         verbose_name = 'Pago'
         verbose_name_plural = 'Pagos'
+        indexes = [
+            # Pagos de un condominio agrupados por líder de calle
+            models.Index(
+                fields=['condominium', 'user'],
+                name='payment_condominium_user_idx'
+            ),
+            # Pagos de un condominio ordenados por ubicación
+            models.Index(
+                fields=['condominium', 'location_key', 'id'],
+                name='payment_condominium_loc_idx'
+            ),
+        ]
 
 
 class FamilyHead(models.Model):
@@ -670,6 +1024,13 @@ class FamilyHead(models.Model):
         db_comment='Relación con el modelo pago',
     )
 
+    # Posición del departamento del pago en la división territorial, copiada
+    # de Payment.location_key para ordenar sin consultar la ubicación
+    location_key = models.PositiveIntegerField(
+        'ubicación', default=0, editable=False,
+        db_comment='Posición del departamento en la división territorial',
+    )
+
     def __str__(self):
         """!
         Función para representar la clase de forma amigable
@@ -688,11 +1049,168 @@ class FamilyHead(models.Model):
         @author William Páez (paez.william8 at gmail.com)
         """
 
-        ordering = [
-            'payment__department__building__bridge__block__name',
-            'payment__department__building__bridge__name',
-            'payment__department__building__name',
-            'payment__department__name',
-        ]
+        ordering = ['location_key', 'id']
         verbose_name = 'Jefe de familia'
         verbose_name_plural = 'Jefes de familia'
+        indexes = [
+            # Cobros de un pago por estado
+            models.Index(
+                fields=['payment', 'paid', 'exonerated'],
+                name='familyhead_payment_state_idx'
+            ),
+            # Jefes familiares ordenados por ubicación
+            models.Index(
+                fields=['location_key', 'id'], name='familyhead_location_idx'
+            ),
+        ]
+
+
+class CensusStats(models.Model):
+    """!
+    Clase que contiene los totales del censo por bloque y por consejo comunal.
+    Los registros sin bloque contienen los totales del consejo comunal
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    # Relación con el modelo CommunalCouncil
+    communal_council = models.ForeignKey(
+        CommunalCouncil, on_delete=models.CASCADE,
+        verbose_name='consejo comunal',
+        db_comment='Relación con el modelo consejo comunal'
+    )
+
+    # Relación con el modelo Block
+    block = models.ForeignKey(
+        Block, on_delete=models.CASCADE, verbose_name='bloque', null=True,
+        db_comment='Relación con el modelo bloque'
+    )
+
+    # Fecha con la que se calcularon las edades
+    date = models.DateField(
+        'fecha', db_comment='Fecha con la que se calcularon las edades'
+    )
+
+    # Total de familias
+    families = models.PositiveIntegerField(
+        'familias', default=0, db_comment='Total de familias'
+    )
+
+    # Total de personas
+    people = models.PositiveIntegerField(
+        'personas', default=0, db_comment='Total de personas'
+    )
+
+    # Total de viviendas
+    departments = models.PositiveIntegerField(
+        'viviendas', default=0, db_comment='Total de viviendas'
+    )
+
+    # Total de hembras mayores a 15 años
+    females_gt_15 = models.PositiveIntegerField(
+        'hembras mayores a 15 años', default=0,
+        db_comment='Total de hembras mayores a 15 años'
+    )
+
+    # Total de hembras menores a 15 años
+    females_lt_15 = models.PositiveIntegerField(
+        'hembras menores a 15 años', default=0,
+        db_comment='Total de hembras menores a 15 años'
+    )
+
+    # Total de varones mayores a 15 años
+    males_gt_15 = models.PositiveIntegerField(
+        'varones mayores a 15 años', default=0,
+        db_comment='Total de varones mayores a 15 años'
+    )
+
+    # Total de varones menores a 15 años
+    males_lt_15 = models.PositiveIntegerField(
+        'varones menores a 15 años', default=0,
+        db_comment='Total de varones menores a 15 años'
+    )
+
+    # Total de niños
+    male_children = models.PositiveIntegerField(
+        'niños', default=0, db_comment='Total de niños'
+    )
+
+    # Total de adolescentes varones
+    male_teen = models.PositiveIntegerField(
+        'adolescentes varones', default=0,
+        db_comment='Total de adolescentes varones'
+    )
+
+    # Total de hombres mayores o iguales a 18 años
+    male_gte_18 = models.PositiveIntegerField(
+        'hombres mayores o iguales a 18 años', default=0,
+        db_comment='Total de hombres mayores o iguales a 18 años'
+    )
+
+    # Total de adulto mayor hombres
+    male_elderly = models.PositiveIntegerField(
+        'adulto mayor hombres', default=0,
+        db_comment='Total de adulto mayor hombres'
+    )
+
+    # Total de niñas
+    female_children = models.PositiveIntegerField(
+        'niñas', default=0, db_comment='Total de niñas'
+    )
+
+    # Total de adolescentes hembras
+    female_teen = models.PositiveIntegerField(
+        'adolescentes hembras', default=0,
+        db_comment='Total de adolescentes hembras'
+    )
+
+    # Total de mujeres mayores o iguales a 18 años
+    female_gte_18 = models.PositiveIntegerField(
+        'mujeres mayores o iguales a 18 años', default=0,
+        db_comment='Total de mujeres mayores o iguales a 18 años'
+    )
+
+    # Total de adulto mayor hembras
+    female_elderly = models.PositiveIntegerField(
+        'adulto mayor hembras', default=0,
+        db_comment='Total de adulto mayor hembras'
+    )
+
+    def __str__(self):
+        """!
+        Función para representar la clase de forma amigable
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return string <b>{object}</b> Objeto con el bloque o el consejo
+            comunal
+        """
+
+        if self.block:
+            return str(self.block)
+        return str(self.communal_council)
+
+    class Meta:
+        """!
+        Meta clase del modelo que establece algunas propiedades
+
+        @author William Páez (paez.william8 at gmail.com)
+        """
+
+        constraints = [
+            models.UniqueConstraint(
+                fields=['communal_council', 'block'],
+                name='censusstats_council_block_uniq'
+            ),
+            # Un solo registro por consejo comunal. PostgreSQL no compara
+            # los nulos en la restricción anterior
+            models.UniqueConstraint(
+                fields=['communal_council'],
+                condition=Q(block__isnull=True),
+                name='censusstats_council_uniq'
+            ),
+        ]
+        verbose_name = 'Estadística del censo'
+        verbose_name_plural = 'Estadísticas del censo'
@@ -0,0 +1,120 @@
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from base.models import Department
+
+from .models import FamilyGroup, FamilyHead, Payment, Person
+
+# Modelos que se ordenan por ubicación: campo que los relaciona con el
+# objeto del que copian la posición, modelo de ese objeto y campo con la
+# posición. Cada modelo copia la posición de un modelo anterior de la lista
+LOCATION_KEYS = (
+    (FamilyGroup, 'department', Department, 'sort_key'),
+    (Person, 'family_group', FamilyGroup, 'location_key'),
+    (Payment, 'department', Department, 'sort_key'),
+    (FamilyHead, 'payment', Payment, 'location_key'),
+)
+
+# Campo y modelo de los objetos que copian la posición de cada modelo
+LOCATION_CHILDREN = {
+    FamilyGroup: ('family_group', Person),
+    Payment: ('payment', FamilyHead),
+}
+
+# Relación de cada modelo con el departamento del que depende su posición
+LOCATION_DEPARTMENTS = {
+    FamilyGroup: 'department',
+    Person: 'family_group__department',
+    Payment: 'department',
+    FamilyHead: 'payment__department',
+}
+
+# Departamentos que se filtran por consulta al copiar las posiciones
+DEPARTMENT_BATCH = 500
+
+# Relación de cada modelo con el objeto del que copia la posición
+LOCATION_PARENTS = {
+    model: (field, parent, key) for model, field, parent, key in LOCATION_KEYS
+}
+
+
+def location_key(instance):
+    """!
+    Función que obtiene la posición en la división territorial que le
+    corresponde a un objeto. Si el objeto relacionado ya está cargado no se
+    hace ninguna consulta
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param instance <b>{object}</b> Objeto de un modelo de LOCATION_KEYS
+    @return Retorna un número entero, 0 si el objeto no tiene ubicación
+    """
+
+    field, parent, key = LOCATION_PARENTS[instance.__class__]
+    parent_id = getattr(instance, field + '_id')
+    if parent_id is None:
+        return 0
+    if instance.__class__._meta.get_field(field).is_cached(instance):
+        return getattr(getattr(instance, field), key)
+    return parent.objects.filter(pk=parent_id).values_list(
+        key, flat=True
+    ).first() or 0
+
+
+def update_children_keys(instance):
+    """!
+    Función que copia la posición de un grupo familiar o un pago a sus
+    personas o jefes familiares, con una sola consulta que solo escribe los
+    que cambiaron
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param instance <b>{object}</b> Objeto FamilyGroup o Payment
+    @return Retorna la cantidad de objetos actualizados
+    """
+
+    field, model = LOCATION_CHILDREN[instance.__class__]
+    return model.objects.filter(**{field: instance}).exclude(
+        location_key=instance.location_key
+    ).update(location_key=instance.location_key)
+
+
+def refresh_location_keys(department_ids=None):
+    """!
+    Función que vuelve a copiar la posición de los departamentos en los
+    modelos de LOCATION_KEYS, en orden, con una consulta por modelo que solo
+    escribe los objetos que cambiaron. Si se indican departamentos solo se
+    consultan los objetos que dependen de ellos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param department_ids <b>{list}</b> Identificadores de los departamentos
+        cuya posición cambió, por defecto todos
+    @return Retorna la cantidad de objetos actualizados
+    """
+
+    if department_ids is None:
+        batches = [None]
+    else:
+        department_ids = list(department_ids)
+        batches = [
+            department_ids[start:start + DEPARTMENT_BATCH]
+            for start in range(0, len(department_ids), DEPARTMENT_BATCH)
+        ]
+    updated = 0
+    with transaction.atomic():
+        for model, field, parent, key in LOCATION_KEYS:
+            value = Coalesce(
+                Subquery(parent.objects.filter(
+                    pk=OuterRef(field + '_id')
+                ).order_by().values(key)[:1]),
+                Value(0),
+            )
+            for batch in batches:
+                queryset = model.objects.all()
+                if batch is not None:
+                    queryset = queryset.filter(**{
+                        LOCATION_DEPARTMENTS[model] + '__in': batch
+                    })
+                updated = updated + queryset.exclude(
+                    location_key=value
+                ).update(location_key=value)
+    return updated
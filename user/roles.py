@@ -0,0 +1,331 @@
+from django.contrib.auth.models import Group
+from django.shortcuts import redirect
+from django.utils.functional import cached_property
+
+from base.functions import ROLES_DATA, data_version
+from base.models import CommunalCouncil
+
+from .models import (
+    CommunityLeader,
+    FamilyGroup,
+    StreetLeader,
+    UbchLevel,
+)
+
+# Llave de la sesión donde se guarda el rol del usuario
+SESSION_KEY = 'census_role'
+
+# Identificadores de los grupos por nombre, compartidos por todo el proceso.
+# Se vacía cuando cambia un grupo o la versión de los roles
+_group_ids = {'version': None, 'ids': {}}
+
+
+def clear_group_ids(version=None):
+    """!
+    Función que vacía los identificadores de los grupos guardados en memoria
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param version <b>{int}</b> Versión de los roles con la que se vacía
+    """
+
+    _group_ids['version'] = version
+    _group_ids['ids'] = {}
+
+
+def group_id(name):
+    """!
+    Función que obtiene el identificador de un grupo por su nombre sin
+    consultar la base de datos si ya se consultó antes
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre del grupo
+    @return Retorna el identificador del grupo
+    """
+
+    ids = _group_ids['ids']
+    if name not in ids:
+        ids.update(Group.objects.values_list('name', 'id'))
+        if name not in ids:
+            raise Group.DoesNotExist(
+                'Group matching query does not exist.'
+            )
+    return ids[name]
+
+
+def user_groups(user):
+    """!
+    Función que obtiene los nombres de los grupos de un usuario. Se consultan
+    una sola vez por petición y se guardan en el objeto del usuario
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param user <b>{object}</b> Usuario de la petición
+    @return Retorna un conjunto con los nombres de los grupos
+    """
+
+    if not hasattr(user, '_census_groups'):
+        user._census_groups = frozenset(
+            user.groups.values_list('name', flat=True)
+        )
+    return user._census_groups
+
+
+class CensusRole:
+    """!
+    Clase que contiene los grupos del usuario y los identificadores de los
+    objetos que definen su alcance en el censo. Los objetos se consultan solo
+    cuando se usan
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def __init__(
+        self, user_id=None, groups=(), ubch_level_id=None,
+        community_leader_id=None, street_leader_id=None,
+        family_group_id=None, communal_council_id=None, version=None
+    ):
+        """!
+        Función que inicializa el rol con los datos guardados en la sesión
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param user_id <b>{int}</b> Identificador del usuario
+        @param groups <b>{list}</b> Nombres de los grupos del usuario
+        @param ubch_level_id <b>{int}</b> Identificador del nivel ubch
+        @param community_leader_id <b>{int}</b> Identificador del líder de
+            comunidad
+        @param street_leader_id <b>{int}</b> Identificador del líder de calle
+        @param family_group_id <b>{int}</b> Identificador del grupo familiar
+        @param communal_council_id <b>{int}</b> Identificador del consejo
+            comunal
+        @param version <b>{int}</b> Versión de los roles con la que se
+            resolvió
+        """
+
+        self.user_id = user_id
+        self.groups = frozenset(groups)
+        self.ubch_level_id = ubch_level_id
+        self.community_leader_id = community_leader_id
+        self.street_leader_id = street_leader_id
+        self.family_group_id = family_group_id
+        self.communal_council_id = communal_council_id
+        self.version = version
+
+    @classmethod
+    def resolve(cls, user, version=None):
+        """!
+        Función que consulta los grupos y el alcance de un usuario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param cls <b>{object}</b> Clase CensusRole
+        @param user <b>{object}</b> Usuario autenticado
+        @param version <b>{int}</b> Versión actual de los roles
+        @return Retorna un objeto CensusRole
+        """
+
+        role = cls(
+            user_id=user.pk,
+            groups=user_groups(user),
+            version=version,
+        )
+        ubch_level = UbchLevel.objects.filter(
+            profile__user=user
+        ).values_list('id', flat=True).first()
+        community_leader = CommunityLeader.objects.filter(
+            profile__user=user
+        ).values('id', 'communal_council').first()
+        street_leader = StreetLeader.objects.filter(
+            profile__user=user
+        ).values('id', 'community_leader__communal_council').first()
+        family_group = FamilyGroup.objects.filter(
+            profile__user=user
+        ).values_list('id', flat=True).first()
+        role.ubch_level_id = ubch_level
+        role.family_group_id = family_group
+        if community_leader:
+            role.community_leader_id = community_leader['id']
+            role.communal_council_id = community_leader['communal_council']
+        if street_leader:
+            role.street_leader_id = street_leader['id']
+            role.communal_council_id = role.communal_council_id or \
+                street_leader['community_leader__communal_council']
+        return role
+
+    def to_session(self):
+        """!
+        Función que convierte el rol en un diccionario para la sesión
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un diccionario serializable en json
+        """
+
+        return {
+            'user_id': self.user_id,
+            'groups': sorted(self.groups),
+            'ubch_level_id': self.ubch_level_id,
+            'community_leader_id': self.community_leader_id,
+            'street_leader_id': self.street_leader_id,
+            'family_group_id': self.family_group_id,
+            'communal_council_id': self.communal_council_id,
+            'version': self.version,
+        }
+
+    def has_group(self, *names):
+        """!
+        Función que indica si el usuario pertenece a alguno de los grupos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param *names <b>{tuple}</b> Nombres de los grupos
+        @return Retorna verdadero si pertenece a alguno de los grupos
+        """
+
+        return not self.groups.isdisjoint(names)
+
+    @cached_property
+    def ubch_level(self):
+        """!
+        Función que consulta el nivel ubch del usuario la primera vez
+        que se usa
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un objeto UbchLevel o None
+        """
+
+        if self.ubch_level_id:
+            return UbchLevel.objects.get(pk=self.ubch_level_id)
+        return None
+
+    @cached_property
+    def community_leader(self):
+        """!
+        Función que consulta el líder de comunidad del usuario la primera vez
+        que se usa
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un objeto CommunityLeader o None
+        """
+
+        if self.community_leader_id:
+            return CommunityLeader.objects.get(pk=self.community_leader_id)
+        return None
+
+    @cached_property
+    def street_leader(self):
+        """!
+        Función que consulta el líder de calle del usuario la primera vez
+        que se usa
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un objeto StreetLeader o None
+        """
+
+        if self.street_leader_id:
+            return StreetLeader.objects.get(pk=self.street_leader_id)
+        return None
+
+    @cached_property
+    def family_group(self):
+        """!
+        Función que consulta el grupo familiar del usuario la primera vez
+        que se usa
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un objeto FamilyGroup o None
+        """
+
+        if self.family_group_id:
+            return FamilyGroup.objects.get(pk=self.family_group_id)
+        return None
+
+    @cached_property
+    def communal_council(self):
+        """!
+        Función que consulta el consejo comunal del usuario la primera vez
+        que se usa
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un objeto CommunalCouncil o None
+        """
+
+        if self.communal_council_id:
+            return CommunalCouncil.objects.get(pk=self.communal_council_id)
+        return None
+
+
+def get_census_role(request):
+    """!
+    Función que obtiene el rol del usuario desde la sesión, o lo resuelve si
+    no existe o si los roles cambiaron desde que se guardó
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param request <b>{object}</b> Objeto que contiene la petición
+    @return Retorna un objeto CensusRole
+    """
+
+    user = request.user
+    if not user.is_authenticated:
+        return CensusRole()
+    version = data_version(ROLES_DATA)
+    if _group_ids['version'] != version:
+        clear_group_ids(version)
+    data = request.session.get(SESSION_KEY)
+    if data and data['user_id'] == user.pk and data['version'] == version:
+        role = CensusRole(**data)
+        user._census_groups = role.groups
+        return role
+    role = CensusRole.resolve(user, version)
+    request.session[SESSION_KEY] = role.to_session()
+    return role
+
+
+class RoleRequiredMixin:
+    """!
+    Clase que valida si el usuario del sistema pertenece a alguno de los
+    grupos de allowed_groups antes de entrar a la vista
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    # Grupos que pueden entrar a la vista
+    allowed_groups = []
+
+    def has_permission(self):
+        """!
+        Función que valida condiciones adicionales al grupo del usuario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna verdadero si el usuario puede entrar a la vista
+        """
+
+        return True
+
+    def dispatch(self, request, *args, **kwargs):
+        """!
+        Función que valida si el usuario del sistema tiene permisos para entrar
+        a esta vista
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param request <b>{object}</b> Objeto que contiene los datos de la
+            petición
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
+        @return super <b>{object}</b> Entra a la vista correspondiente
+            sino redirecciona hacia la vista de error de permisos
+        """
+
+        role = request.census_role
+        if role.has_group(*self.allowed_groups) and self.has_permission():
+            return super().dispatch(request, *args, **kwargs)
+        return redirect('base:error_403')
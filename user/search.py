@@ -0,0 +1,428 @@
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.db.models import (
+    CharField,
+    Case,
+    F,
+    Func,
+    IntegerField,
+    Q,
+    Value,
+    When,
+)
+from django.db.models.functions import Concat, Greatest, Lower
+
+from base.functions import PEOPLE_DATA, data_version
+
+from .models import Person
+
+# Personas por página en la búsqueda
+SEARCH_PAGE_SIZE = 20
+
+# Una búsqueda con solo dígitos y guiones se hace por cédula
+ID_NUMBER_RE = re.compile(r'^\d[\d-]*$')
+
+# Función de PostgreSQL que quita los acentos. unaccent no se puede usar en
+# un índice porque no es inmutable, por eso se crea esta función que la
+# llama con un diccionario fijo
+UNACCENT_FUNCTION = 'census_unaccent'
+
+# Índices de trigramas de PostgreSQL para buscar por nombres y apellidos,
+# sobre los nombres en minúsculas y sin acentos
+TRIGRAM_INDEXES = (
+    ('user_person_first_name_search_trgm', 'first_name'),
+    ('user_person_last_name_search_trgm', 'last_name'),
+)
+
+# Índices de trigramas anteriores, sobre los nombres sin normalizar
+LEGACY_TRIGRAM_INDEXES = (
+    'user_person_first_name_trgm', 'user_person_last_name_trgm',
+)
+
+# Si cambia más de esta fracción de las personas, el índice de nombres en
+# memoria se construye de nuevo en lugar de actualizarse
+NAME_INDEX_REBUILD_RATIO = 0.1
+
+# Conexiones con la extensión pg_trgm y la función UNACCENT_FUNCTION
+# disponibles, consultadas una sola vez por proceso
+_trigram = {}
+
+# Índice de nombres en memoria: versión de los nombres, lista ordenada de
+# tuplas (palabra, id), nombre normalizado y nombres actuales de cada
+# persona
+NameIndex = namedtuple('NameIndex', ['version', 'tokens', 'names', 'rows'])
+
+# Índice de nombres construido por este proceso para las bases de datos sin
+# pg_trgm. Se actualiza cuando cambia la versión de los nombres de las
+# personas
+_name_index = {'current': None}
+
+
+def normalize_name(value):
+    """!
+    Función que separa un nombre en palabras sin acentos y en minúsculas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param value <b>{string}</b> Nombre
+    @return Retorna una lista de palabras
+    """
+
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(char for char in value if not unicodedata.combining(char))
+    return value.casefold().split()
+
+
+def search_name(field):
+    """!
+    Función que obtiene la expresión de un nombre en minúsculas y sin
+    acentos, la misma de los índices de TRIGRAM_INDEXES
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param field <b>{string}</b> Nombre del campo
+    @return Retorna una expresión de Django
+    """
+
+    return Lower(Func(
+        F(field), function=UNACCENT_FUNCTION, output_field=CharField()
+    ))
+
+
+def scoped_people(role):
+    """!
+    Función que obtiene las personas que puede consultar un líder de
+    comunidad o de calle
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param role <b>{object}</b> Rol del usuario de la petición
+    @return Retorna un queryset de Person
+    """
+
+    if role.community_leader_id:
+        return Person.objects.filter(**{
+            'family_group__street_leader__community_leader__'
+            'communal_council_id': role.communal_council_id
+        })
+    if role.street_leader_id:
+        return Person.objects.filter(
+            family_group__street_leader_id=role.street_leader_id
+        )
+    return Person.objects.none()
+
+
+def has_trigram(using=DEFAULT_DB_ALIAS):
+    """!
+    Función que indica si la base de datos tiene la extensión pg_trgm y la
+    función UNACCENT_FUNCTION de los índices de trigramas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param using <b>{string}</b> Alias de la conexión
+    @return Retorna True si se puede usar la similitud de trigramas
+    """
+
+    if using not in _trigram:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm' "
+                    "AND EXISTS (SELECT 1 FROM pg_proc WHERE proname = %s)",
+                    [UNACCENT_FUNCTION]
+                )
+                available = cursor.fetchone() is not None
+        _trigram[using] = available
+    return _trigram[using]
+
+
+def create_search_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    """!
+    Función que crea en PostgreSQL las extensiones pg_trgm y unaccent, la
+    función UNACCENT_FUNCTION y los índices de trigramas de los nombres y
+    apellidos sin acentos, después de aplicar las migraciones. Si el usuario
+    de la base de datos no puede crear las extensiones se sigue usando el
+    índice en memoria
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param using <b>{string}</b> Alias de la conexión
+    @param **kwargs <b>{dict}</b> Argumentos de la señal post_migrate
+    """
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+            cursor.execute(
+                "SELECT extnamespace::regnamespace::text FROM pg_extension "
+                "WHERE extname = 'unaccent'"
+            )
+            schema = cursor.fetchone()[0]
+            cursor.execute(
+                "CREATE OR REPLACE FUNCTION %s(text) RETURNS text AS "
+                "$$ SELECT %s.unaccent('%s.unaccent'::regdictionary, $1) $$ "
+                "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT" % (
+                    UNACCENT_FUNCTION, schema, schema
+                )
+            )
+            for name in LEGACY_TRIGRAM_INDEXES:
+                cursor.execute(
+                    'DROP INDEX IF EXISTS %s' % connection.ops.quote_name(name)
+                )
+            for name, column in TRIGRAM_INDEXES:
+                cursor.execute(
+                    'CREATE INDEX IF NOT EXISTS %s ON %s USING gin '
+                    '((lower(%s(%s))) gin_trgm_ops)' % (
+                        connection.ops.quote_name(name),
+                        connection.ops.quote_name(Person._meta.db_table),
+                        UNACCENT_FUNCTION,
+                        connection.ops.quote_name(column),
+                    )
+                )
+    except DatabaseError:
+        pass
+    _trigram.pop(using, None)
+
+
+def prefix_filter(queryset, prefix):
+    """!
+    Función que filtra las personas cuya cédula empieza por un prefijo. En
+    PostgreSQL se usa LIKE, que aprovecha el índice varchar_pattern_ops que
+    Django crea para los campos únicos; en las demás bases de datos se usa
+    un rango, que aprovecha el índice de la cédula
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param queryset <b>{object}</b> Personas donde se busca
+    @param prefix <b>{string}</b> Inicio de la cédula
+    @return Retorna el queryset filtrado
+    """
+
+    if connections[queryset.db].vendor == 'postgresql':
+        return queryset.filter(id_number__startswith=prefix)
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return queryset.filter(id_number__gte=prefix, id_number__lt=upper)
+
+
+def build_name_index(rows, index=None):
+    """!
+    Función que construye el índice de nombres en memoria, o lo actualiza
+    solo con las personas registradas, cambiadas o eliminadas desde el
+    índice anterior
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param rows <b>{dict}</b> Nombres y apellidos actuales de cada persona
+    @param index <b>{object}</b> Objeto NameIndex anterior, por defecto se
+        construye completo
+    @return Retorna una tupla con la lista ordenada de tuplas (palabra, id)
+        y el nombre completo normalizado de cada persona
+    """
+
+    if index is not None:
+        changed = [pk for pk, row in rows.items() if index.rows.get(pk) != row]
+        removed = [pk for pk in index.rows if pk not in rows]
+        if len(changed) + len(removed) <= len(rows) * NAME_INDEX_REBUILD_RATIO:
+            # Se trabaja sobre copias porque otros hilos pueden estar
+            # usando el índice anterior
+            tokens, names = list(index.tokens), dict(index.names)
+            for pk in changed + removed:
+                for word in set(names.pop(pk, '').split()):
+                    del tokens[bisect_left(tokens, (word, pk))]
+            for pk in changed:
+                words = normalize_name(' '.join(rows[pk]))
+                names[pk] = ' '.join(words)
+                for word in set(words):
+                    insort(tokens, (word, pk))
+            return tokens, names
+    tokens, names = [], {}
+    for pk, row in rows.items():
+        words = normalize_name(' '.join(row))
+        names[pk] = ' '.join(words)
+        tokens.extend((word, pk) for word in set(words))
+    tokens.sort()
+    return tokens, names
+
+
+def name_index():
+    """!
+    Función que obtiene el índice de nombres en memoria: una lista ordenada
+    de tuplas (palabra, id) y el nombre completo normalizado de cada
+    persona. Cuando cambia la versión de los nombres se consultan los
+    nombres actuales y solo se actualizan las personas que cambiaron
+
+    @author William Páez (paez.william8 at gmail.com)
+    @return Retorna un objeto NameIndex
+    """
+
+    version = data_version(PEOPLE_DATA)
+    current = _name_index['current']
+    if current is not None and current.version == version:
+        return current
+    rows = {
+        pk: (first_name, last_name)
+        for pk, first_name, last_name in Person.objects.order_by(
+        ).values_list('id', 'first_name', 'last_name').iterator(
+            chunk_size=5000
+        )
+    }
+    tokens, names = build_name_index(rows, current)
+    current = NameIndex(
+        version=version, tokens=tokens, names=names, rows=rows
+    )
+    _name_index['current'] = current
+    return current
+
+
+def match_name_index(words):
+    """!
+    Función que busca en el índice de nombres en memoria las personas con
+    todas las palabras indicadas al inicio de alguno de sus nombres o
+    apellidos. Las coincidencias exactas pesan más que las de prefijo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param words <b>{list}</b> Palabras normalizadas de la búsqueda
+    @return Retorna un diccionario con la clave de orden de cada id, por
+        parecido y nombre
+    """
+
+    index = name_index()
+    tokens = index.tokens
+    scores = None
+    for word in words:
+        matches = {}
+        position = bisect_left(tokens, (word,))
+        while position < len(tokens) and tokens[position][0].startswith(word):
+            token, pk = tokens[position]
+            score = 2 if token == word else 1
+            matches[pk] = max(matches.get(pk, 0), score)
+            position = position + 1
+        if scores is None:
+            scores = matches
+        else:
+            scores = {
+                pk: scores[pk] + score for pk, score in matches.items()
+                if pk in scores
+            }
+        if not scores:
+            return {}
+    return {
+        pk: (-score, index.names[pk], pk) for pk, score in scores.items()
+    }
+
+
+def scope_ids(queryset, ids):
+    """!
+    Función que obtiene cuáles de unos ids pertenecen a un queryset, con
+    consultas de tantos ids como admita la base de datos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param queryset <b>{object}</b> Personas donde se busca
+    @param ids <b>{list}</b> Lista de ids
+    @return Retorna un conjunto de ids
+    """
+
+    ids = list(ids)
+    size = connections[queryset.db].features.max_query_params or len(ids)
+    allowed = set()
+    for start in range(0, len(ids), size):
+        allowed.update(queryset.filter(
+            id__in=ids[start:start + size]
+        ).values_list('id', flat=True))
+    return allowed
+
+
+def search_filter(queryset, query):
+    """!
+    Función que filtra las personas por cédula o por nombres y apellidos,
+    sin ordenar el resultado. Los nombres se comparan en minúsculas y sin
+    acentos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param queryset <b>{object}</b> Personas donde se busca
+    @param query <b>{string}</b> Texto de la búsqueda
+    @return Retorna el queryset filtrado
+    """
+
+    query = query.strip()
+    if ID_NUMBER_RE.match(query):
+        return prefix_filter(queryset, query)
+    words = normalize_name(query)
+    if not words:
+        return queryset.none()
+    if has_trigram(queryset.db):
+        # LIKE '%palabra%' sobre la misma expresión de TRIGRAM_INDEXES usa
+        # los índices gin_trgm_ops
+        queryset = queryset.alias(
+            search_first_name=search_name('first_name'),
+            search_last_name=search_name('last_name'),
+        )
+        for word in words:
+            queryset = queryset.filter(
+                Q(search_first_name__contains=word) |
+                Q(search_last_name__contains=word)
+            )
+        return queryset
+    ids = list(match_name_index(words))
+    limit = connections[queryset.db].features.max_query_params
+    if limit is None or len(ids) <= limit:
+        return queryset.filter(id__in=ids)
+    # Si hay más coincidencias de las que admite una consulta se filtra en
+    # la base de datos, sin el índice en memoria
+    for word in query.split():
+        queryset = queryset.filter(
+            Q(first_name__icontains=word) | Q(last_name__icontains=word)
+        )
+    return queryset
+
+
+def search_people(queryset, query, page=1):
+    """!
+    Función que busca personas por cédula o por nombres y apellidos, y
+    retorna una página del resultado ordenado por parecido. La cédula
+    exacta va primero y luego las que empiezan igual. Los nombres se ordenan
+    por similitud de trigramas en PostgreSQL, o con el índice en memoria en
+    otras bases de datos. En ambos casos solo se ordenan las personas del
+    queryset
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param queryset <b>{object}</b> Personas donde se busca
+    @param query <b>{string}</b> Texto de la búsqueda
+    @param page <b>{string}</b> Número de la página
+    @return Retorna un objeto Page con la lista de personas
+    """
+
+    query = query.strip()
+    queryset = queryset.select_related('family_group__department')
+    if ID_NUMBER_RE.match(query):
+        people = prefix_filter(queryset, query).annotate(
+            rank=Case(
+                When(id_number=query, then=Value(0)),
+                default=Value(1), output_field=IntegerField()
+            )
+        ).order_by('rank', 'id_number')
+        return Paginator(people, SEARCH_PAGE_SIZE).get_page(page)
+    words = normalize_name(query)
+    if words and has_trigram(queryset.db):
+        text = ' '.join(words)
+        people = search_filter(queryset, query).annotate(rank=Greatest(
+            TrigramSimilarity('search_first_name', text),
+            TrigramSimilarity('search_last_name', text),
+            TrigramSimilarity(Concat(
+                'search_first_name', Value(' '), 'search_last_name'
+            ), text),
+        )).order_by('-rank', 'last_name', 'first_name', 'id')
+        return Paginator(people, SEARCH_PAGE_SIZE).get_page(page)
+    matches = match_name_index(words) if words else {}
+    # Primero se quitan las personas fuera del alcance del usuario y luego
+    # se ordenan las demás, solo se consultan los datos de la página
+    ids = sorted(scope_ids(queryset, matches), key=matches.__getitem__)
+    page = Paginator(ids, SEARCH_PAGE_SIZE).get_page(page)
+    people = queryset.in_bulk(page.object_list)
+    page.object_list = [people[pk] for pk in page.object_list]
+    return page
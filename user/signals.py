@@ -0,0 +1,355 @@
+import threading
+
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from base.demographics import refresh_census_stats
+from base.functions import (
+    CENSUS_DATA,
+    PEOPLE_DATA,
+    REFERENCE_DATA,
+    ROLES_DATA,
+    TERRITORY_DATA,
+    bump_data_version,
+)
+from base.models import (
+    Block,
+    Bridge,
+    Building,
+    CommunalCouncil,
+    Country,
+    Department,
+    Estate,
+    Gender,
+    Municipality,
+    Parish,
+    Relationship,
+    Ubch,
+    VoteType,
+)
+from base.territory import refresh_locations
+
+from .models import (
+    CommunityLeader,
+    FamilyGroup,
+    FamilyHead,
+    Payment,
+    Person,
+    Profile,
+    StreetLeader,
+    UbchLevel,
+)
+from .ordering import (
+    LOCATION_PARENTS,
+    location_key,
+    refresh_location_keys,
+    update_children_keys,
+)
+from .roles import clear_group_ids
+
+# Cambios pendientes de aplicar al confirmar la transacción actual
+_pending = threading.local()
+
+# Modelos de los que dependen los reportes guardados en caché
+CENSUS_MODELS = (
+    Person, FamilyGroup, StreetLeader, CommunityLeader, Profile,
+    CommunalCouncil, Block, Bridge, Building, Department,
+)
+
+# Modelos de los que depende el rol guardado en la sesión de cada usuario
+ROLE_MODELS = (UbchLevel, CommunityLeader, StreetLeader, FamilyGroup, Group)
+
+# Modelos de las listas de referencia de los formularios
+REFERENCE_MODELS = (VoteType, Relationship, Gender, Department)
+
+# Modelos de la división territorial de los campos dependientes
+TERRITORY_MODELS = (
+    Country, Estate, Municipality, Parish, Ubch, CommunalCouncil, Block,
+    Bridge, Building, Department,
+)
+
+# Ruta desde cada modelo hasta el bloque donde vive
+BLOCK_PATHS = {
+    Person: 'family_group__department__building__bridge__block',
+    FamilyGroup: 'department__building__bridge__block',
+}
+
+
+def apply_pending_changes():
+    """!
+    Función que recalcula los totales de los bloques pendientes, actualiza
+    las direcciones y las posiciones de orden si cambió la división
+    territorial y aumenta la versión de los conjuntos de datos que cambiaron
+
+    @author William Páez (paez.william8 at gmail.com)
+    """
+
+    block_ids = getattr(_pending, 'block_ids', set())
+    names = getattr(_pending, 'names', set())
+    _pending.block_ids = set()
+    _pending.names = set()
+    if block_ids:
+        refresh_census_stats(list(block_ids))
+    if TERRITORY_DATA in names:
+        # Solo se vuelve a copiar la posición de los objetos de los
+        # departamentos cuya posición cambió
+        department_ids = refresh_locations().get('departments')
+        if department_ids:
+            refresh_location_keys(department_ids)
+    for name in sorted(names):
+        bump_data_version(name)
+
+
+def mark_changed(name=CENSUS_DATA):
+    """!
+    Función que marca un conjunto de datos como cambiado para invalidar lo
+    guardado en caché al confirmar la transacción
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param name <b>{string}</b> Nombre del conjunto de datos
+    """
+
+    if not hasattr(_pending, 'names'):
+        _pending.names = set()
+    _pending.names.add(name)
+    transaction.on_commit(apply_pending_changes)
+
+
+def mark_roles_changed(sender, **kwargs):
+    """!
+    Función que marca los roles como cambiados para que cada usuario vuelva a
+    consultar su rol al confirmar la transacción
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo del objeto guardado o eliminado
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    mark_changed(ROLES_DATA)
+
+
+def current_block(sender, instance):
+    """!
+    Función que consulta el bloque donde vive una persona o grupo familiar
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo Person o FamilyGroup
+    @param instance <b>{object}</b> Objeto guardado o eliminado
+    @return Retorna el identificador del bloque o None
+    """
+
+    if instance.pk is None:
+        return None
+    return sender.objects.filter(pk=instance.pk).values_list(
+        BLOCK_PATHS[sender], flat=True
+    ).first()
+
+
+def mark_block(block_id):
+    """!
+    Función que marca un bloque para recalcular sus totales al confirmar la
+    transacción
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param block_id <b>{int}</b> Identificador del bloque
+    """
+
+    if block_id is None:
+        return
+    if not hasattr(_pending, 'block_ids'):
+        _pending.block_ids = set()
+    _pending.block_ids.add(block_id)
+    transaction.on_commit(apply_pending_changes)
+
+
+@receiver(pre_save, sender=Person)
+@receiver(pre_save, sender=FamilyGroup)
+@receiver(pre_delete, sender=Person)
+@receiver(pre_delete, sender=FamilyGroup)
+def save_previous_block(sender, instance, **kwargs):
+    """!
+    Función que guarda el bloque donde vivía la persona o el grupo familiar
+    antes de guardarlo o eliminarlo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo Person o FamilyGroup
+    @param instance <b>{object}</b> Objeto guardado o eliminado
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    instance._previous_block_id = current_block(sender, instance)
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_save, sender=FamilyGroup)
+def mark_saved_blocks(sender, instance, **kwargs):
+    """!
+    Función que marca el bloque anterior y el actual de la persona o el
+    grupo familiar guardado
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo Person o FamilyGroup
+    @param instance <b>{object}</b> Objeto guardado
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    mark_block(getattr(instance, '_previous_block_id', None))
+    mark_block(current_block(sender, instance))
+
+
+@receiver(post_delete, sender=Person)
+@receiver(post_delete, sender=FamilyGroup)
+def mark_deleted_block(sender, instance, **kwargs):
+    """!
+    Función que marca el bloque de la persona o el grupo familiar eliminado
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo Person o FamilyGroup
+    @param instance <b>{object}</b> Objeto eliminado
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    mark_block(getattr(instance, '_previous_block_id', None))
+
+
+def mark_census_changed(sender, **kwargs):
+    """!
+    Función que marca los datos del censo como cambiados cuando se guarda o
+    elimina un objeto de CENSUS_MODELS
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo del objeto guardado o eliminado
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    mark_changed()
+
+
+for model in CENSUS_MODELS:
+    post_save.connect(mark_census_changed, sender=model)
+    post_delete.connect(mark_census_changed, sender=model)
+
+
+@receiver(post_save, sender=Person)
+@receiver(post_delete, sender=Person)
+def mark_people_changed(sender, **kwargs):
+    """!
+    Función que marca los nombres de las personas como cambiados cuando se
+    guarda o elimina una persona
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo Person
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    mark_changed(PEOPLE_DATA)
+
+
+def mark_reference_changed(sender, **kwargs):
+    """!
+    Función que marca las listas de referencia como cambiadas cuando se
+    guarda o elimina un objeto de REFERENCE_MODELS
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo del objeto guardado o eliminado
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    mark_changed(REFERENCE_DATA)
+
+
+def mark_territory_changed(sender, **kwargs):
+    """!
+    Función que marca la división territorial como cambiada cuando se
+    guarda o elimina un objeto de TERRITORY_MODELS
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo del objeto guardado o eliminado
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    mark_changed(TERRITORY_DATA)
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(mark_reference_changed, sender=model)
+    post_delete.connect(mark_reference_changed, sender=model)
+for model in TERRITORY_MODELS:
+    post_save.connect(mark_territory_changed, sender=model)
+    post_delete.connect(mark_territory_changed, sender=model)
+for model in ROLE_MODELS:
+    post_save.connect(mark_roles_changed, sender=model)
+    post_delete.connect(mark_roles_changed, sender=model)
+m2m_changed.connect(mark_roles_changed, sender=User.groups.through)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def clear_saved_group_ids(sender, **kwargs):
+    """!
+    Función que vacía los identificadores de los grupos guardados en memoria
+    cuando se guarda o elimina un grupo
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo Group
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    clear_group_ids()
+
+
+@receiver(pre_save, sender=FamilyGroup)
+@receiver(pre_save, sender=Person)
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=FamilyHead)
+def set_location_key(sender, instance, raw=False, update_fields=None,
+                     **kwargs):
+    """!
+    Función que copia en el objeto guardado la posición de su departamento
+    en la división territorial, que se usa para ordenarlo. Si solo se
+    guardan algunos campos y no está su relación, la posición no cambia
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo del objeto guardado
+    @param instance <b>{object}</b> Objeto guardado
+    @param raw <b>{boolean}</b> Indica si el objeto se carga de un fixture
+    @param update_fields <b>{set}</b> Campos que se guardan
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    if raw or update_fields is not None and (
+        LOCATION_PARENTS[sender][0] not in update_fields
+    ):
+        return
+    instance.location_key = location_key(instance)
+
+
+@receiver(post_save, sender=FamilyGroup)
+@receiver(post_save, sender=Payment)
+def save_children_keys(sender, instance, raw=False, update_fields=None,
+                       **kwargs):
+    """!
+    Función que copia la posición del grupo familiar o el pago guardado a
+    sus personas o jefes familiares
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param sender <b>{object}</b> Modelo FamilyGroup o Payment
+    @param instance <b>{object}</b> Objeto guardado
+    @param raw <b>{boolean}</b> Indica si el objeto se carga de un fixture
+    @param update_fields <b>{set}</b> Campos que se guardan
+    @param **kwargs <b>{dict}</b> Diccionario de datos de la señal
+    """
+
+    if raw or update_fields is not None and (
+        LOCATION_PARENTS[sender][0] not in update_fields
+    ):
+        return
+    update_children_keys(instance)
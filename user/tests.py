@@ -1 +1,1179 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from base.factories import (
+    CENSUS_FIXTURES,
+    create_family_group,
+    create_leaders,
+)
+from base.models import Department, OutgoingEmail
+
+from .census_import import COLUMNS, CensusImport, read_checkpoint
+from .condominiums import create_payments, save_family_head
+from .models import (
+    Condominium,
+    FamilyGroup,
+    FamilyHead,
+    Payment,
+    Person,
+    age_q,
+    calculate_age,
+)
+from .ordering import refresh_location_keys
+from .roles import SESSION_KEY, get_census_role, group_id, user_groups
+from .search import _name_index, search_filter
+from .signals import apply_pending_changes
+
+
+def household(*people):
+    """!
+    Función que arma los datos de las personas de un grupo familiar
+
+    @author William Páez (paez.william8 at gmail.com)
+    @param *people <b>{tuple}</b> Tuplas con nombres, apellidos, cédula y si
+        es jefe familiar
+    @return Retorna una lista de diccionarios para create_family_group
+    """
+
+    return [
+        {
+            'first_name': first_name, 'last_name': last_name,
+            'id_number': id_number, 'family_head': family_head,
+        } for first_name, last_name, id_number, family_head in people
+    ]
+
+
+class CensusTestCase(TestCase):
+    """!
+    Clase base de las pruebas con un líder de comunidad, dos líderes de
+    calle y sus grupos familiares. Los dos primeros grupos familiares viven
+    en el mismo departamento y el último tiene dos jefes familiares
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    fixtures = CENSUS_FIXTURES
+
+    @classmethod
+    def setUpTestData(cls):
+        """!
+        Función que registra los datos de las pruebas
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param cls <b>{object}</b> Clase de la prueba
+        """
+
+        community_leader, cls.street_leaders = create_leaders(2)
+        cls.community_user = community_leader.profile.user
+        cls.departments = [
+            Department.objects.filter(
+                building__bridge=street_leader.bridge
+            ).order_by('id').first() for street_leader in cls.street_leaders
+        ]
+        create_family_group(
+            cls.street_leaders[0], cls.departments[0], household(
+                ('José', 'Pérez', '11111111', True),
+                ('Ana', 'Pérez', '11111112', False),
+            )
+        )
+        create_family_group(
+            cls.street_leaders[0], cls.departments[0], household(
+                ('María', 'Gómez', '22222222', True),
+            )
+        )
+        cls.repeated_head = create_family_group(
+            cls.street_leaders[1], cls.departments[1], household(
+                ('Josefina', 'Núñez', '33333333', True),
+                ('Luis', 'Núñez', '33333334', True),
+            )
+        ).person_set.get(id_number='33333333')
+        # Los cambios marcados por las señales se aplican al confirmar la
+        # transacción, que en las pruebas no se confirma
+        apply_pending_changes()
+
+    def family_group_record(self, department, people):
+        """!
+        Función que arma los datos del formulario de un grupo familiar
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param department <b>{object}</b> Departamento del grupo familiar
+        @param people <b>{list}</b> Lista de tuplas con nombres, apellidos,
+            cédula y si es jefe familiar, con el id de la persona como
+            quinto valor opcional. Las personas sin cédula la tienen vacía
+        @return Retorna un diccionario con los datos
+        """
+
+        records = []
+        for first_name, last_name, id_number, family_head, *pk in people:
+            record = {
+                'first_name': first_name, 'last_name': last_name,
+                'has_id_number': 'y' if id_number else 'n',
+                'id_number': id_number, 'email': '', 'phone': '',
+                'birthdate': '1980-01-01', 'admission_date': '2020-01-01',
+                'gender_id': 1, 'vote_type_id': 1, 'relationship_id': 1,
+                'family_head': family_head,
+            }
+            if pk:
+                record['id'] = pk[0]
+            records.append(record)
+        return {
+            'building_id': department.building_id,
+            'department_id': department.id,
+            'people': records,
+        }
+
+    def save_family_group(self, street_leader, username, people):
+        """!
+        Función que registra un grupo familiar desde el formulario, como su
+        líder de calle, en el primer departamento de su puente
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param street_leader <b>{object}</b> Líder de calle de la petición
+        @param username <b>{string}</b> Usuario del grupo familiar
+        @param people <b>{list}</b> Personas para family_group_record
+        @return Retorna la respuesta de la petición
+        """
+
+        department = self.departments[self.street_leaders.index(
+            street_leader
+        )]
+        self.client.force_login(street_leader.profile.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                reverse('user:family_group_save'), json.dumps({
+                    'username': username,
+                    'email': '%s@example.com' % username,
+                    **self.family_group_record(department, people),
+                }), content_type='application/json'
+            )
+
+    def create_condominium(self):
+        """!
+        Función que registra un condominio de 2,50 por 10 y genera sus
+        cobros
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna una tupla con el condominio y los jefes familiares
+            de los grupos con más de un jefe
+        """
+
+        condominium = Condominium.objects.create(
+            date=datetime.date.today(), rate=Decimal('2.50'), amount=10,
+            user=self.community_user,
+        )
+        repeated = create_payments(condominium, self.community_user)
+        condominium.refresh_from_db()
+        return condominium, repeated
+
+
+class CondominiumBillingTest(CensusTestCase):
+    """!
+    Clase que prueba la generación de los cobros de un condominio
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def test_one_payment_per_department(self):
+        """!
+        Función que prueba que se genera un cobro por departamento, a
+        nombre del líder de calle de sus grupos familiares
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        condominium, repeated = self.create_condominium()
+        self.assertEqual(
+            set(Payment.objects.filter(condominium=condominium).values_list(
+                'department', 'user'
+            )),
+            {
+                (department.id, street_leader.profile.user_id)
+                for department, street_leader in zip(
+                    self.departments, self.street_leaders
+                )
+            }
+        )
+
+    def test_amount_split_between_family_groups(self):
+        """!
+        Función que prueba que el monto de un departamento se reparte entre
+        sus grupos familiares, cobrando solo al primer jefe familiar
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        condominium, repeated = self.create_condominium()
+        self.assertEqual(
+            dict(FamilyHead.objects.filter(
+                payment__condominium=condominium
+            ).values_list('id_number', 'amount')),
+            {
+                '11111111': Decimal('12.50'),
+                '22222222': Decimal('12.50'),
+                '33333333': Decimal('25.00'),
+            }
+        )
+
+    def test_repeated_family_heads(self):
+        """!
+        Función que prueba que se retornan los jefes familiares de los
+        grupos con más de un jefe, para advertirlo al usuario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        condominium, repeated = self.create_condominium()
+        self.assertEqual(repeated, [self.repeated_head])
+
+
+class CondominiumTotalsTest(CensusTestCase):
+    """!
+    Clase que prueba los totales guardados en el condominio al generar los
+    cobros y al cambiar su estado
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def totals(self, condominium):
+        """!
+        Función que obtiene los totales guardados en el condominio
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param condominium <b>{object}</b> Condominio
+        @return Retorna una tupla con el monto pagado y las cantidades de
+            cobros pagados, no pagados y exonerados
+        """
+
+        condominium.refresh_from_db()
+        return (
+            condominium.paid_total, condominium.paid_count,
+            condominium.unpaid_count, condominium.exonerated_count,
+        )
+
+    def test_initial_totals(self):
+        """!
+        Función que prueba que los cobros empiezan pagados, como indica el
+        valor por defecto de FamilyHead.paid
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        condominium, repeated = self.create_condominium()
+        self.assertEqual(self.totals(condominium), (50, 3, 0, 0))
+
+    def test_state_changes(self):
+        """!
+        Función que prueba que cada cambio de estado de un cobro se refleja
+        en los totales y que estos coinciden con los recalculados
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        condominium, repeated = self.create_condominium()
+        heads = {
+            family_head.id_number: family_head
+            for family_head in FamilyHead.objects.filter(
+                payment__condominium=condominium
+            )
+        }
+        save_family_head(heads['33333333'], paid=False)
+        self.assertEqual(self.totals(condominium), (25, 2, 1, 0))
+        save_family_head(heads['11111111'], paid=False)
+        self.assertEqual(self.totals(condominium), (Decimal('12.5'), 1, 2, 0))
+        # Exonerar un cobro pagado lo descuenta del monto pagado
+        save_family_head(heads['22222222'], exonerated=True, paid=False)
+        self.assertEqual(self.totals(condominium), (0, 0, 2, 1))
+        # Volver a guardar el mismo estado no cambia los totales
+        save_family_head(heads['33333333'], paid=False)
+        self.assertEqual(self.totals(condominium), (0, 0, 2, 1))
+        save_family_head(heads['33333333'], paid=True)
+        stored = self.totals(condominium)
+        self.assertEqual(stored, (25, 1, 1, 1))
+        condominium.refresh_totals()
+        self.assertEqual(self.totals(condominium), stored)
+
+
+class CondominiumPaymentUpdateTest(CensusTestCase):
+    """!
+    Clase que prueba el cambio de estado de varios cobros en una petición,
+    limitado a los cobros de los líderes de calle del usuario
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def setUp(self):
+        """!
+        Función que genera los cobros de un condominio
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.condominium, repeated = self.create_condominium()
+        self.heads = dict(FamilyHead.objects.filter(
+            payment__condominium=self.condominium
+        ).values_list('id_number', 'id'))
+
+    def post(self, user, updates):
+        """!
+        Función que envía los cambios de estado como un usuario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param user <b>{object}</b> Usuario de la petición
+        @param updates <b>{list}</b> Lista de cambios de estado
+        @return Retorna la respuesta de la petición
+        """
+
+        self.client.force_login(user)
+        return self.client.post(
+            reverse(
+                'user:condominium_payment_update', args=[self.condominium.pk]
+            ),
+            json.dumps({'updates': updates}), content_type='application/json'
+        )
+
+    def paid(self):
+        """!
+        Función que obtiene las cédulas de los cobros pagados
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un conjunto de cédulas
+        """
+
+        return set(FamilyHead.objects.filter(
+            payment__condominium=self.condominium, paid=True
+        ).values_list('id_number', flat=True))
+
+    def test_street_leader_updates_own_payments(self):
+        """!
+        Función que prueba que un líder de calle cambia sus cobros y recibe
+        los totales actualizados
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        response = self.post(self.street_leaders[0].profile.user, [
+            {'ids': [self.heads['11111111']], 'paid': False},
+            {'ids': [self.heads['22222222']], 'exonerated': True},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.paid(), {'33333333'})
+        self.assertEqual(response.json()['condominium'], {
+            'paid_total': '25.00', 'paid_count': 1, 'unpaid_count': 1,
+            'exonerated_count': 1,
+        })
+
+    def test_street_leader_rejected_for_other_payments(self):
+        """!
+        Función que prueba que si un cobro es de otro líder de calle se
+        rechaza toda la petición sin cambiar ningún cobro
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        response = self.post(self.street_leaders[0].profile.user, [{
+            'ids': [self.heads['11111111'], self.heads['33333333']],
+            'paid': False,
+        }])
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(
+            response.json()['errors'], {'ids': [self.heads['33333333']]}
+        )
+        self.assertEqual(self.paid(), set(self.heads))
+
+    def test_community_leader_updates_all_street_leaders(self):
+        """!
+        Función que prueba que un líder de comunidad cambia los cobros de
+        todos sus líderes de calle
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        response = self.post(self.community_user, [
+            {'ids': list(self.heads.values()), 'paid': False},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.paid(), set())
+
+    def test_closed_condominium(self):
+        """!
+        Función que prueba que no se cambian los cobros de un condominio
+        cerrado
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        Condominium.objects.filter(pk=self.condominium.pk).update(
+            closing=True
+        )
+        response = self.post(self.community_user, [
+            {'ids': list(self.heads.values()), 'paid': False},
+        ])
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.paid(), set(self.heads))
+
+
+class PersonSearchTest(CensusTestCase):
+    """!
+    Clase que prueba la búsqueda de personas limitada a las personas de los
+    líderes de calle del usuario
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def setUp(self):
+        """!
+        Función que descarta el índice de nombres en memoria, porque la
+        versión de los nombres se repite entre pruebas al revertir cada
+        transacción
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        _name_index['current'] = None
+
+    def search(self, user, query):
+        """!
+        Función que busca personas como un usuario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param user <b>{object}</b> Usuario de la petición
+        @param query <b>{string}</b> Texto de la búsqueda
+        @return Retorna una lista con las cédulas encontradas
+        """
+
+        self.client.force_login(user)
+        response = self.client.get(
+            reverse('user:search_people'), {'q': query}
+        )
+        self.assertEqual(response.status_code, 200)
+        return [person['id_number'] for person in response.json()['list']]
+
+    def test_street_leader_scope(self):
+        """!
+        Función que prueba que un líder de calle solo encuentra a sus
+        personas
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.assertEqual(
+            self.search(self.street_leaders[1].profile.user, 'jose'),
+            ['33333333']
+        )
+        self.assertEqual(
+            self.search(self.street_leaders[1].profile.user, '1111'), []
+        )
+
+    def test_community_leader_scope(self):
+        """!
+        Función que prueba que un líder de comunidad encuentra a las
+        personas de todos sus líderes de calle, primero las coincidencias
+        exactas
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.assertEqual(
+            self.search(self.community_user, 'jose'),
+            ['11111111', '33333333']
+        )
+        self.assertEqual(
+            self.search(self.community_user, '1111'),
+            ['11111111', '11111112']
+        )
+
+    def test_accents_and_case_ignored(self):
+        """!
+        Función que prueba que los nombres se comparan sin acentos y sin
+        distinguir mayúsculas
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.assertEqual(
+            sorted(self.search(self.community_user, 'NUÑEZ')),
+            ['33333333', '33333334']
+        )
+        self.assertEqual(
+            set(search_filter(Person.objects.all(), 'perez').values_list(
+                'id_number', flat=True
+            )),
+            {'11111111', '11111112'}
+        )
+
+    def test_name_index_follows_changes(self):
+        """!
+        Función que prueba que la búsqueda encuentra los nombres cambiados
+        después de construir el índice de nombres
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.assertEqual(self.search(self.community_user, 'maria'), [
+            '22222222'
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            Person.objects.filter(id_number='22222222').get().delete()
+            person = Person.objects.get(id_number='11111112')
+            person.first_name = 'Mariana'
+            person.save()
+        self.assertEqual(self.search(self.community_user, 'maria'), [
+            '11111112'
+        ])
+
+    def test_registered_family_group_found(self):
+        """!
+        Función que prueba que la búsqueda encuentra a las personas de un
+        grupo familiar registrado después de construir el índice de nombres
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.assertEqual(self.search(self.community_user, 'zacarias'), [])
+        response = self.save_family_group(self.street_leaders[1], 'zacarias', [
+            ('Zacarías', 'Rojas', '44444444', True),
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search(self.community_user, 'zacarias'), [
+            '44444444'
+        ])
+
+
+class PersonAgeTest(CensusTestCase):
+    """!
+    Clase que prueba la edad calculada en la base de datos
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def test_with_age_matches_calculate_age(self):
+        """!
+        Función que prueba que with_age y age_q coinciden con calculate_age
+        alrededor de cada cumpleaños, y que sin fecha de nacimiento la edad
+        es 0
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        today = datetime.date.today()
+        person = Person.objects.get(id_number='11111111')
+        people = Person.objects.filter(pk=person.pk)
+        for years in (0, 1, 4, 17, 18, 59, 60, 99):
+            for offset in (-1, 0, 1):
+                birthdate = today - datetime.timedelta(
+                    days=int(years * 365.25) + offset
+                )
+                people.update(birthdate=birthdate)
+                age = calculate_age(birthdate)
+                with self.subTest(birthdate=birthdate):
+                    self.assertEqual(
+                        people.with_age().get().age_years, age
+                    )
+                    self.assertTrue(people.filter(age_q(age, age)).exists())
+        people.update(birthdate=None)
+        self.assertEqual(people.with_age().get().age_years, 0)
+
+
+class CensusRoleTest(CensusTestCase):
+    """!
+    Clase que prueba el rol del usuario guardado en la sesión y los grupos
+    guardados en memoria
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def request(self, user, session):
+        """!
+        Función que arma una petición de un usuario con una sesión
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param user <b>{object}</b> Usuario de la petición
+        @param session <b>{dict}</b> Datos de la sesión
+        @return Retorna el objeto de la petición
+        """
+
+        request = RequestFactory().get('/')
+        request.user = user
+        request.session = session
+        return request
+
+    def test_role_kept_in_session(self):
+        """!
+        Función que prueba que el rol se resuelve una vez y las siguientes
+        peticiones solo consultan la versión de los roles
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        street_leader = self.street_leaders[0]
+        user = street_leader.profile.user
+        session = {}
+        role = get_census_role(self.request(user, session))
+        self.assertEqual(role.street_leader_id, street_leader.id)
+        self.assertEqual(role.communal_council_id, 1)
+        self.assertEqual(session[SESSION_KEY], role.to_session())
+        with self.assertNumQueries(1):
+            role = get_census_role(self.request(user, session))
+        self.assertEqual(role.street_leader_id, street_leader.id)
+        self.assertEqual(role.groups, {'Líder de Calle'})
+
+    def test_role_resolved_again_when_roles_change(self):
+        """!
+        Función que prueba que el rol de la sesión se descarta cuando cambian
+        los roles y cuando la sesión es de otro usuario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        user = self.street_leaders[0].profile.user
+        session = {}
+        get_census_role(self.request(user, session))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.street_leaders[0].delete()
+        role = get_census_role(self.request(user, session))
+        self.assertIsNone(role.street_leader_id)
+        role = get_census_role(self.request(self.community_user, session))
+        self.assertEqual(role.user_id, self.community_user.id)
+        self.assertIsNotNone(role.community_leader_id)
+
+    def test_removed_role_denied(self):
+        """!
+        Función que prueba que un usuario que deja de ser líder de calle ya
+        no entra a las vistas de los líderes, aunque tenga la sesión abierta
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        user = self.street_leaders[1].profile.user
+        self.client.force_login(user)
+        url = reverse('user:search_people')
+        self.assertEqual(self.client.get(url, {'q': 'x'}).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            user.groups.clear()
+        self.assertRedirects(
+            self.client.get(url, {'q': 'x'}), reverse('base:error_403'),
+            fetch_redirect_response=False
+        )
+
+    def test_group_ids_cleared_when_groups_change(self):
+        """!
+        Función que prueba que los identificadores de los grupos guardados
+        en memoria se descartan al cambiar un grupo
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        group = Group.objects.get(name='Grupo Familiar')
+        self.assertEqual(group_id('Grupo Familiar'), group.id)
+        with self.assertNumQueries(0):
+            group_id('Grupo Familiar')
+        with self.captureOnCommitCallbacks(execute=True):
+            group.name = 'Familia'
+            group.save()
+        self.assertEqual(group_id('Familia'), group.id)
+        with self.assertRaises(Group.DoesNotExist):
+            group_id('Grupo Familiar')
+
+    def test_user_groups_queried_once(self):
+        """!
+        Función que prueba que los grupos de un usuario se consultan una sola
+        vez por objeto de usuario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        user = self.street_leaders[0].profile.user
+        with self.assertNumQueries(1):
+            self.assertEqual(user_groups(user), {'Líder de Calle'})
+            self.assertEqual(user_groups(user), {'Líder de Calle'})
+
+
+class FamilyGroupSaveTest(CensusTestCase):
+    """!
+    Clase que prueba el registro de un grupo familiar desde el formulario
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def test_people_saved_with_one_insert(self):
+        """!
+        Función que prueba que las personas se registran con una sola
+        consulta, que las personas sin cédula usan la del jefe familiar y
+        que el correo de bienvenida no lleva la contraseña
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.save_family_group(
+                self.street_leaders[0], 'rojas', [
+                    ('Zacarías', 'Rojas', '44444444', True),
+                    ('Rosa', 'Rojas', '', False),
+                    ('Pedro', 'Rojas', '', False),
+                ]
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len([
+            query for query in queries
+            if query['sql'].startswith('INSERT INTO "user_person"')
+        ]), 1)
+        family_group = FamilyGroup.objects.get(profile__user__username='rojas')
+        self.assertEqual(family_group.street_leader, self.street_leaders[0])
+        self.assertEqual(
+            list(family_group.person_set.order_by('id').values_list(
+                'id_number', 'family_head', 'location_key'
+            )),
+            [
+                ('44444444', True, family_group.location_key),
+                ('44444444-1', False, family_group.location_key),
+                ('44444444-2', False, family_group.location_key),
+            ]
+        )
+        self.assertFalse(family_group.profile.user.is_active)
+        email = OutgoingEmail.objects.get(to='rojas@example.com')
+        self.assertIn('/user/reset/', email.body)
+        self.assertNotIn('contraseña:', email.body)
+
+    def test_family_head_without_id_number(self):
+        """!
+        Función que prueba que un jefe familiar sin cédula rechaza el
+        registro sin guardar el usuario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        response = self.save_family_group(self.street_leaders[0], 'rojas', [
+            ('Zacarías', 'Rojas', '', True),
+        ])
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(response.json()['errors']['general_error'], [
+            'El jefe familiar debe tener cédula'
+        ])
+        self.assertFalse(User.objects.filter(username='rojas').exists())
+
+
+class FamilyGroupUpdateTest(CensusTestCase):
+    """!
+    Clase que prueba la actualización de un grupo familiar guardando solo
+    las diferencias con las personas registradas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def setUp(self):
+        """!
+        Función que obtiene el grupo familiar de José Pérez y sus personas
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.family_group = FamilyGroup.objects.get(
+            person__id_number='11111111'
+        )
+        self.ids = dict(self.family_group.person_set.values_list(
+            'id_number', 'id'
+        ))
+
+    def update(self, people):
+        """!
+        Función que envía los datos del grupo familiar como su líder de calle
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param people <b>{list}</b> Personas para family_group_record
+        @return Retorna una tupla con los cambios de la respuesta y las
+            consultas de la petición
+        """
+
+        self.client.force_login(self.street_leaders[0].profile.user)
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.put(
+                    reverse(
+                        'user:family_group_update',
+                        args=[self.family_group.pk]
+                    ),
+                    json.dumps(self.family_group_record(
+                        self.family_group.department, people
+                    )), content_type='application/json'
+                )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['changes'], [
+            query['sql'] for query in queries
+            if '"user_person"' in query['sql'].split(' WHERE ')[0]
+            and not query['sql'].startswith('SELECT')
+        ]
+
+    def members(self):
+        """!
+        Función que obtiene las personas del grupo familiar
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna una lista de tuplas con nombre y cédula
+        """
+
+        return list(self.family_group.person_set.order_by('id').values_list(
+            'first_name', 'id_number'
+        ))
+
+    def test_unchanged_people_not_written(self):
+        """!
+        Función que prueba que enviar las mismas personas no modifica la
+        tabla de personas
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        changes, writes = self.update([
+            ('José', 'Pérez', '11111111', True, self.ids['11111111']),
+            ('Ana', 'Pérez', '11111112', False, self.ids['11111112']),
+        ])
+        self.assertEqual(
+            changes, {'created': [], 'updated': {}, 'deleted': []}
+        )
+        self.assertEqual(writes, [])
+
+    def test_only_differences_saved(self):
+        """!
+        Función que prueba que se actualizan las personas cambiadas, se
+        reconocen por cédula las personas enviadas sin id, y se registran y
+        eliminan las demás con una consulta cada una
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        changes, writes = self.update([
+            ('Josué', 'Pérez', '11111111', True, self.ids['11111111']),
+            ('Ana', 'Pérez', '11111112', False),
+            ('Pedro', 'Pérez', '', False),
+        ])
+        self.assertEqual(changes, {
+            'created': ['11111111-1'],
+            'updated': {'11111111': ['first_name']},
+            'deleted': [],
+        })
+        self.assertEqual(len(writes), 2)
+        changes, writes = self.update([
+            ('Josué', 'Pérez', '11111111', True, self.ids['11111111']),
+        ])
+        self.assertEqual(
+            sorted(changes['deleted']), ['11111111-1', '11111112']
+        )
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(self.members(), [('Josué', '11111111')])
+
+    def test_person_moved_from_other_group(self):
+        """!
+        Función que prueba que una persona con cédula registrada en otro
+        grupo familiar se muda al grupo actualizado en lugar de repetirse
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        other = FamilyGroup.objects.get(person__id_number='22222222')
+        people = Person.objects.count()
+        changes, writes = self.update([
+            ('José', 'Pérez', '11111111', True, self.ids['11111111']),
+            ('Ana', 'Pérez', '11111112', False, self.ids['11111112']),
+            ('María', 'Gómez', '22222222', False),
+        ])
+        self.assertEqual(changes['created'], [])
+        self.assertEqual(
+            changes['updated'], {'22222222': ['family_head', 'family_group']}
+        )
+        self.assertEqual(Person.objects.count(), people)
+        self.assertEqual(self.members(), [
+            ('José', '11111111'), ('Ana', '11111112'), ('María', '22222222'),
+        ])
+        self.assertFalse(other.person_set.exists())
+        self.assertEqual(
+            Person.objects.get(id_number='22222222').location_key,
+            self.family_group.location_key
+        )
+
+
+class CensusImportTest(CensusTestCase):
+    """!
+    Clase que prueba la importación de grupos familiares desde un archivo
+    CSV, con el reporte de errores y el archivo de control
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def setUp(self):
+        """!
+        Función que crea el directorio temporal de los archivos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'census.csv')
+
+    def row(self, username, first_name, id_number, family_head, **values):
+        """!
+        Función que arma una fila del archivo en el primer departamento del
+        primer líder de calle
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param username <b>{string}</b> Usuario del grupo familiar
+        @param first_name <b>{string}</b> Nombres de la persona
+        @param id_number <b>{string}</b> Cédula de la persona
+        @param family_head <b>{bool}</b> Si es jefe familiar
+        @param **values <b>{dict}</b> Valores que reemplazan a los demás
+        @return Retorna un diccionario de valores por columna
+        """
+
+        department = self.departments[0]
+        return {
+            'username': username, 'email': username + '@example.com',
+            'block': department.building.bridge.block.name,
+            'bridge': department.building.bridge.name,
+            'building': department.building.name,
+            'department': department.name,
+            'first_name': first_name, 'last_name': 'Importado',
+            'has_id_number': '', 'id_number': id_number, 'person_email': '',
+            'phone': '', 'birthdate': '1980-01-01',
+            'admission_date': '2020-01-01', 'gender': 'masculino',
+            'vote_type': 'Duro', 'relationship': 'Madre',
+            'family_head': 'sí' if family_head else '', **values,
+        }
+
+    def write(self, rows):
+        """!
+        Función que escribe las filas en el archivo CSV
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param rows <b>{list}</b> Filas de row
+        """
+
+        with open(self.path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def errors(self):
+        """!
+        Función que lee el reporte de errores
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna una lista de tuplas con la fila, el usuario y la
+            columna de cada error
+        """
+
+        with open(self.path + '.errors.csv', newline='') as file:
+            return [
+                (row['row'], row['username'], row['field'])
+                for row in csv.DictReader(file)
+            ]
+
+    def test_invalid_family_groups_reported(self):
+        """!
+        Función que prueba que los grupos familiares con errores se reportan
+        con su fila y columna, sin impedir el registro de los válidos
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.write([
+            self.row('valid', 'Carlos', '44444444', True),
+            self.row('valid', 'Rosa', '', False, relationship='Padre'),
+            self.row('nowhere', 'Elena', '55555555', True, building='Otro'),
+            self.row('gender', 'Pablo', '66666666', True, gender='Otro'),
+            self.row('heads', 'Luisa', '77777777', True),
+            self.row('heads', 'Mario', '77777778', True),
+            self.row('registered', 'Pedro', '11111111', True),
+        ])
+        call_command('import_census', self.path, stdout=io.StringIO())
+        self.assertEqual(self.errors(), [
+            ('4', 'nowhere', 'department'),
+            ('5', 'gender', 'gender_id'),
+            ('6', 'heads', 'family_head'),
+            ('8', 'registered', 'id_number'),
+        ])
+        family_group = FamilyGroup.objects.get(profile__user__username='valid')
+        self.assertEqual(
+            sorted(family_group.person_set.values_list(
+                'id_number', 'family_head', 'relationship__name'
+            )), [('44444444', True, 'Madre'), ('44444444-1', False, 'Padre')]
+        )
+        self.assertFalse(family_group.profile.user.is_active)
+        self.assertEqual(
+            family_group.street_leader_id, self.street_leaders[0].id
+        )
+        self.assertFalse(User.objects.filter(username__in=[
+            'nowhere', 'gender', 'heads', 'registered'
+        ]).exists())
+
+    def test_resume_from_checkpoint(self):
+        """!
+        Función que prueba que una importación interrumpida continúa desde
+        la última fila guardada en el archivo de control, sin registrar de
+        nuevo los lotes anteriores
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        self.write([
+            self.row('first', 'Carlos', '44444444', True),
+            self.row('first', 'Rosa', '44444445', False),
+            self.row('second', 'Elena', '55555555', True),
+            self.row('third', 'Pablo', '66666666', True),
+        ])
+        save = CensusImport.save
+        calls = []
+
+        def interrupted_save(census_import, households, last_row):
+            calls.append(last_row)
+            if len(calls) == 2:
+                raise OSError('Importación interrumpida')
+            save(census_import, households, last_row)
+
+        with mock.patch.object(CensusImport, 'save', interrupted_save):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'import_census', self.path, '--chunk-size', '1',
+                    stdout=io.StringIO()
+                )
+        self.assertEqual(read_checkpoint(self.path + '.checkpoint'), 3)
+        self.assertEqual(list(User.objects.filter(
+            username__in=['first', 'second', 'third']
+        ).values_list('username', flat=True)), ['first'])
+
+        stdout = io.StringIO()
+        call_command(
+            'import_census', self.path, '--chunk-size', '1', '--resume',
+            stdout=stdout
+        )
+        self.assertIn('continuada desde la fila 3', stdout.getvalue())
+        self.assertIn('Grupos familiares: 2, personas: 2', stdout.getvalue())
+        self.assertEqual(read_checkpoint(self.path + '.checkpoint'), 5)
+        self.assertEqual(self.errors(), [])
+        self.assertEqual(Person.objects.filter(
+            last_name='Importado'
+        ).count(), 4)
+
+
+class LocationKeyTest(CensusTestCase):
+    """!
+    Clase que prueba la copia de la posición de los departamentos en los
+    grupos familiares y sus personas
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    def keys(self, department):
+        """!
+        Función que obtiene las posiciones guardadas de un departamento
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param department <b>{object}</b> Departamento
+        @return Retorna un conjunto con las posiciones de sus grupos
+            familiares y sus personas
+        """
+
+        return set(FamilyGroup.objects.filter(
+            department=department
+        ).values_list('location_key', flat=True)) | set(Person.objects.filter(
+            family_group__department=department
+        ).values_list('location_key', flat=True))
+
+    def test_only_given_departments_refreshed(self):
+        """!
+        Función que prueba que solo se copian las posiciones de los
+        departamentos indicados, y de todos si no se indican
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        """
+
+        for key, department in enumerate(self.departments, 1001):
+            Department.objects.filter(id=department.id).update(sort_key=key)
+        self.assertEqual(refresh_location_keys([self.departments[0].id]), 5)
+        self.assertEqual(self.keys(self.departments[0]), {1001})
+        self.assertNotIn(1002, self.keys(self.departments[1]))
+        self.assertEqual(refresh_location_keys([self.departments[0].id]), 0)
+        self.assertEqual(refresh_location_keys(), 3)
+        self.assertEqual(self.keys(self.departments[1]), {1002})
+        self.assertEqual(refresh_location_keys([]), 0)
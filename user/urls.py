@@ -11,6 +11,7 @@ from .views import (
     CondominiumCreateView,
     CondominiumDetailView,
     CondominiumListView,
+    CondominiumPaymentUpdateView,
     CommunityLeaderFormView,
     CommunityLeaderListView,
     FamilyDetailView,
@@ -24,6 +25,7 @@ from .views import (
     MoveOutListView,
     MoveOutUpdateView,
     PersonDeleteView,
+    PersonSearchView,
     ProfileUpdateView,
     SearchForAgeView,
     SearchView,
@@ -165,6 +167,11 @@ urlpatterns = [
         name='census_list'
     ),
 
+    path(
+        'searches/', login_required(PersonSearchView.as_view()),
+        name='search_people'
+    ),
+
     path(
         'searches/<slug:id_number>/', login_required(SearchView.as_view()),
         name='search_id_number'
@@ -235,4 +242,10 @@ urlpatterns = [
         login_required(CondominiumDetailView.as_view()),
         name='condominium_detail'
     ),
+
+    path(
+        'condominiums/detail/<int:pk>/payments/',
+        login_required(CondominiumPaymentUpdateView.as_view()),
+        name='condominium_payment_update'
+    ),
 ]
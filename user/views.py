@@ -3,7 +3,7 @@ import logging
 
 from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth.models import Group, User
+from django.contrib.auth.models import User
 from django.contrib.sites.shortcuts import get_current_site
 from django.core.paginator import Paginator
 from django.db import transaction
@@ -22,15 +22,16 @@ from django.views.generic import (
 )
 
 from base.functions import send_email
-from base.models import (
-    CommunalCouncil,
-    Department,
-    Gender,
-    Relationship,
-    VoteType,
+from base.models import CommunalCouncil
+from user.functions import generate_password, password_url
+from user.roles import RoleRequiredMixin, group_id
+
+from .condominiums import (
+    create_payments,
+    payment_updates,
+    save_family_head,
+    update_family_heads,
 )
-from user.functions import generate_password
-
 from .forms import (
     AdmonitionForm,
     CondominiumForm,
@@ -41,20 +42,22 @@ from .forms import (
     PersonFormSet,
     ProfileUpdateForm,
     StreetLeaderForm,
+    person_lookups,
 )
+from .family_groups import create_people, find_family_head, update_people
 from .models import (
     Admonition,
     Condominium,
     CommunityLeader,
     FamilyGroup,
     FamilyHead,
+    LedgerTotals,
     MoveOut,
-    Payment,
     Person,
     Profile,
     StreetLeader,
-    UbchLevel,
 )
+from .search import scoped_people, search_people
 
 logger = logging.getLogger('user')
 
@@ -135,7 +138,7 @@ class ProfileUpdateView(UpdateView):
         return super().form_invalid(form)
 
 
-class CommunityLeaderListView(ListView):
+class CommunityLeaderListView(RoleRequiredMixin, ListView):
     """!
     Clase que permite a los usuarios del nivel ubch, listar usuarios líderes de
     comunidad
@@ -148,24 +151,7 @@ class CommunityLeaderListView(ListView):
     model = CommunityLeader
     template_name = 'user/user_list.html'
     success_url = reverse_lazy('user:community_leader_list')
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Nivel Ubch'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Nivel Ubch']
 
     def get_queryset(self):
         """!
@@ -176,10 +162,8 @@ class CommunityLeaderListView(ListView):
         @return Lista de objetos
         """
 
-        if UbchLevel.objects.filter(profile=self.request.user.profile):
-            ubch_level = UbchLevel.objects.get(
-                profile=self.request.user.profile
-            )
+        ubch_level = self.request.census_role.ubch_level
+        if ubch_level:
             queryset = CommunityLeader.objects.filter(
                 communal_council__ubch=ubch_level.ubch
             )
@@ -229,7 +213,7 @@ class CommunityLeaderListView(ListView):
         return redirect(self.success_url)
 
 
-class CommunityLeaderFormView(FormView):
+class CommunityLeaderFormView(RoleRequiredMixin, FormView):
     """!
     Clase que permite a los usuarios del nivel ubch, crear usuarios líderes de
     comunidad
@@ -243,30 +227,14 @@ class CommunityLeaderFormView(FormView):
     form_class = CommunityLeaderForm
     template_name = 'user/community_leader_create.html'
     success_url = reverse_lazy('user:community_leader_list')
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Nivel Ubch'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Nivel Ubch']
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs.update({'user': self.request.user})
         return kwargs
 
+    @transaction.atomic
     def form_valid(self, form):
         """!
         Metodo que valida si el formulario es correcto
@@ -283,11 +251,11 @@ class CommunityLeaderFormView(FormView):
         self.object.first_name = form.cleaned_data['first_name']
         self.object.last_name = form.cleaned_data['last_name']
         self.object.email = form.cleaned_data['email']
-        password = User.objects.make_random_password()
+        password = generate_password()
         self.object.set_password(password)
         self.object.is_active = True
         self.object.save()
-        self.object.groups.add(Group.objects.get(name='Líder de Comunidad'))
+        self.object.groups.add(group_id('Líder de Comunidad'))
 
         profile = Profile.objects.create(
             id_number=form.cleaned_data['id_number'],
@@ -307,7 +275,7 @@ class CommunityLeaderFormView(FormView):
             admin = settings.ADMINS[0][0]
             admin_email = settings.ADMINS[0][1]
 
-        ubch_level = UbchLevel.objects.get(profile=self.request.user.profile)
+        ubch_level = self.request.census_role.ubch_level
 
         sent = send_email(
             self.object.email, 'user/welcome.mail', 'Bienvenido a Censo',
@@ -315,7 +283,8 @@ class CommunityLeaderFormView(FormView):
                 'first_name': self.request.user.first_name,
                 'last_name': self.request.user.last_name,
                 'email': self.request.user.email, 'ubch': ubch_level.ubch,
-                'username': self.object.username, 'password': password,
+                'username': self.object.username,
+                'password_url': password_url(self.request, self.object),
                 'admin': admin, 'admin_email': admin_email,
                 'emailapp': settings.EMAIL_HOST_USER,
                 'url': get_current_site(self.request).name
@@ -333,7 +302,7 @@ class CommunityLeaderFormView(FormView):
         return super().form_invalid(form)
 
 
-class StreetLeaderListView(ListView):
+class StreetLeaderListView(RoleRequiredMixin, ListView):
     """!
     Clase que permite a los usuarios líderes de comunidad listar usuarios
     líderes de calle
@@ -346,24 +315,7 @@ class StreetLeaderListView(ListView):
     model = StreetLeader
     template_name = 'user/user_list.html'
     success_url = reverse_lazy('user:street_leader_list')
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Comunidad'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Comunidad']
 
     def get_queryset(self):
         """!
@@ -374,12 +326,10 @@ class StreetLeaderListView(ListView):
         @return Lista de objetos
         """
 
-        if CommunityLeader.objects.filter(profile=self.request.user.profile):
-            community_leader = CommunityLeader.objects.get(
-                profile=self.request.user.profile
-            )
+        community_leader_id = self.request.census_role.community_leader_id
+        if community_leader_id:
             queryset = StreetLeader.objects.filter(
-                community_leader=community_leader
+                community_leader_id=community_leader_id
             )
             return queryset
 
@@ -427,7 +377,7 @@ class StreetLeaderListView(ListView):
         return redirect(self.success_url)
 
 
-class StreetLeaderFormView(FormView):
+class StreetLeaderFormView(RoleRequiredMixin, FormView):
     """!
     Clase que permite a los usuarios del líder de comunidad, crear usuarios
     líderes de calle
@@ -441,30 +391,14 @@ class StreetLeaderFormView(FormView):
     form_class = StreetLeaderForm
     template_name = 'user/street_leader_create.html'
     success_url = reverse_lazy('user:street_leader_list')
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Comunidad'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Comunidad']
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs.update({'user': self.request.user})
         return kwargs
 
+    @transaction.atomic
     def form_valid(self, form):
         """!
         Metodo que valida si el formulario es correcto
@@ -481,20 +415,18 @@ class StreetLeaderFormView(FormView):
         self.object.first_name = form.cleaned_data['first_name']
         self.object.last_name = form.cleaned_data['last_name']
         self.object.email = form.cleaned_data['email']
-        password = User.objects.make_random_password()
+        password = generate_password()
         self.object.set_password(password)
         self.object.is_active = True
         self.object.save()
-        self.object.groups.add(Group.objects.get(name='Líder de Calle'))
+        self.object.groups.add(group_id('Líder de Calle'))
 
         profile = Profile.objects.create(
             id_number=form.cleaned_data['id_number'],
             phone=form.cleaned_data['phone'],
             user=self.object
         )
-        community_leader = CommunityLeader.objects.get(
-            profile=self.request.user.profile
-        )
+        community_leader = self.request.census_role.community_leader
         StreetLeader.objects.create(
             community_leader=community_leader,
             profile=profile,
@@ -513,7 +445,8 @@ class StreetLeaderFormView(FormView):
                 'last_name': self.request.user.last_name,
                 'email': self.request.user.email,
                 'ubch': community_leader.communal_council.ubch,
-                'username': self.object.username, 'password': password,
+                'username': self.object.username,
+                'password_url': password_url(self.request, self.object),
                 'admin': admin, 'admin_email': admin_email,
                 'emailapp': settings.EMAIL_HOST_USER,
                 'url': get_current_site(self.request).name
@@ -531,7 +464,7 @@ class StreetLeaderFormView(FormView):
         return super().form_invalid(form)
 
 
-class FamilyGroupListView(ListView):
+class FamilyGroupListView(RoleRequiredMixin, ListView):
     """!
     Clase que permite a los usuarios líderes de calle, listar usuarios grupo
     familiar
@@ -545,24 +478,7 @@ class FamilyGroupListView(ListView):
     template_name = 'user/family_group_list.html'
     success_url = reverse_lazy('user:family_group_list')
     paginate_by = 10
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Calle'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Calle']
 
     def get_queryset(self):
         """!
@@ -573,13 +489,13 @@ class FamilyGroupListView(ListView):
         @return Lista de objetos
         """
 
-        if StreetLeader.objects.filter(profile=self.request.user.profile):
-            street_leader = StreetLeader.objects.get(
-                profile=self.request.user.profile
-            )
+        street_leader_id = self.request.census_role.street_leader_id
+        if street_leader_id:
             return FamilyGroup.objects.filter(
-                street_leader=street_leader
-            ).select_related('profile__user').prefetch_related('person_set')
+                street_leader_id=street_leader_id
+            ).select_related(
+                'profile__user', 'department'
+            ).prefetch_related('person_set')
         return FamilyGroup.objects.none()
 
     def post(self, *args, **kwargs):
@@ -626,7 +542,7 @@ class FamilyGroupListView(ListView):
         return redirect(self.success_url)
 
 
-class FamilyGroupCreateTemplateView(TemplateView):
+class FamilyGroupCreateTemplateView(RoleRequiredMixin, TemplateView):
     """!
     Clase que permite a los usuarios del líder de calle, crear usuarios grupos
     familiares
@@ -637,26 +553,10 @@ class FamilyGroupCreateTemplateView(TemplateView):
     """
 
     template_name = 'user/family_group_create.html'
-
-    def dispatch(self, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Calle'):
-            return super().dispatch(*args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Calle']
 
 
-class FamilyGroupSaveView(View):
+class FamilyGroupSaveView(RoleRequiredMixin, View):
     """!
     Clase que permite a los usuarios del líder de calle crear usuarios grupos
     familiares
@@ -666,23 +566,7 @@ class FamilyGroupSaveView(View):
         GNU Public License versión 2 (GPLv2)</a>
     """
 
-    def dispatch(self, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Calle'):
-            return super().dispatch(*args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Calle']
 
     def post(self, request, *args, **kwargs):
         record = json.loads(request.body.decode('utf-8'))
@@ -707,7 +591,9 @@ class FamilyGroupSaveView(View):
             i = i + 1
         data['form-TOTAL_FORMS'] = i
         data['form-INITIAL_FORMS'] = 0
-        personformset = PersonFormSet(data)
+        personformset = PersonFormSet(
+            data, form_kwargs={'lookups': person_lookups()}
+        )
         if not personformset.is_valid():
             return JsonResponse(
                 {
@@ -720,93 +606,64 @@ class FamilyGroupSaveView(View):
                 },
                 status=422
             )
+        people = [form.cleaned_data for form in personformset.forms]
+        if find_family_head(people) is None:
+            return JsonResponse(
+                {
+                    'status': False,
+                    'message': 'Error en los campos',
+                    'errors': {
+                        'people': [{}],
+                        'general_error': [
+                            'El jefe familiar debe tener cédula'
+                        ]
+                    }
+                },
+                status=422
+            )
         password = generate_password()
-        user = User.objects.create_user(
-            record['username'],
-            record['email'],
-            password,
-        )
-        # user.first_name = record['first_name']
-        # user.last_name = record['last_name']
-        user.is_active = False
-        user.save()
-        user.groups.add(Group.objects.get(name='Grupo Familiar'))
-        profile = Profile.objects.create(
-            # phone=record['phone'],
-            user=user
-        )
-        street_leader = StreetLeader.objects.get(
-            profile=self.request.user.profile
-        )
-        department = Department.objects.get(pk=record['department_id'])
-        family_group = FamilyGroup.objects.create(
-            street_leader=street_leader,
-            profile=profile,
-            department=department,
-        )
-        c = 1
-        for person in record['people']:
-            gender = Gender.objects.get(pk=person['gender_id'])
-            vote_type = VoteType.objects.get(pk=person['vote_type_id'])
-            relationship = Relationship.objects.get(
-                pk=person['relationship_id']
+        street_leader = self.request.census_role.street_leader
+        with transaction.atomic():
+            user = User.objects.create_user(
+                record['username'],
+                record['email'],
+                password,
+                is_active=False,
+            )
+            user.groups.add(group_id('Grupo Familiar'))
+            profile = Profile.objects.create(
+                # phone=record['phone'],
+                user=user
+            )
+            family_group = FamilyGroup.objects.create(
+                street_leader=street_leader,
+                profile=profile,
+                department=family_group_form.cleaned_data['department_id'],
+            )
+            create_people(family_group, people)
+
+            admin, admin_email = '', ''
+            if settings.ADMINS:
+                admin = settings.ADMINS[0][0]
+                admin_email = settings.ADMINS[0][1]
+            ubch = street_leader.community_leader.communal_council.ubch
+
+            # El correo queda en la bandeja de salida solo si el registro
+            # se guardó
+            send_email(
+                user.email, 'user/welcome.mail', 'Bienvenido a Censo',
+                {
+                    'first_name': self.request.user.first_name,
+                    'last_name': self.request.user.last_name,
+                    'email': self.request.user.email,
+                    'ubch': ubch,
+                    'username': user.username,
+                    'password_url': password_url(self.request, user),
+                    'admin': admin, 'admin_email': admin_email,
+                    'emailapp': settings.EMAIL_HOST_USER,
+                    'url': get_current_site(self.request).name
+                }
             )
-            if person['has_id_number'] == 'y':
-                if person['family_head']:
-                    value = True
-                else:
-                    value = False
-                Person.objects.create(
-                    first_name=person['first_name'],
-                    last_name=person['last_name'],
-                    id_number=person['id_number'],
-                    email=person['email'],
-                    phone=person['phone'],
-                    birthdate=person['birthdate'],
-                    admission_date=person['admission_date'],
-                    gender=gender,
-                    vote_type=vote_type,
-                    relationship=relationship,
-                    family_head=value,
-                    family_group=family_group
-                )
-            else:
-                p = Person.objects.get(
-                    family_group=family_group, family_head=True
-                )
-                Person.objects.create(
-                    first_name=person['first_name'],
-                    last_name=person['last_name'],
-                    id_number=p.id_number + '-' + str(c),
-                    email=person['email'],
-                    phone=person['phone'],
-                    birthdate=person['birthdate'],
-                    admission_date=person['admission_date'],
-                    gender=gender,
-                    vote_type=vote_type,
-                    relationship=relationship,
-                    family_head=False,
-                    family_group=family_group
-                )
-                c = c + 1
-        admin, admin_email = '', ''
-        if settings.ADMINS:
-            admin = settings.ADMINS[0][0]
-            admin_email = settings.ADMINS[0][1]
-
-        send_email(
-            user.email, 'user/welcome.mail', 'Bienvenido a Censo',
-            {
-                'first_name': self.request.user.first_name,
-                'last_name': self.request.user.last_name,
-                'email': self.request.user.email,
-                'ubch': street_leader.community_leader.communal_council.ubch,
-                'username': user.username, 'password': password,
-                'admin': admin, 'admin_email': admin_email,
-                'emailapp': settings.EMAIL_HOST_USER,
-                'url': get_current_site(self.request).name
-            }
-        )
         return JsonResponse(
             {
                 'status': True,
@@ -823,7 +680,7 @@ class FamilyGroupSaveView(View):
         return super().form_invalid(form)
 
 
-class FamilyGroupEditTemplateView(TemplateView):
+class FamilyGroupEditTemplateView(RoleRequiredMixin, TemplateView):
     """!
     Clase que permite a los usuarios del líder de calle, actualizar usuarios
     grupos familiares
@@ -834,29 +691,21 @@ class FamilyGroupEditTemplateView(TemplateView):
     """
 
     template_name = 'user/family_group_create.html'
+    allowed_groups = ['Líder de Calle']
 
-    def dispatch(self, request, *args, **kwargs):
+    def has_permission(self):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Metodo que valida si el grupo familiar pertenece al líder de calle
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @return Retorna verdadero si el usuario puede entrar a la vista
         """
 
-        street_leader = StreetLeader.objects.get(
-            profile=self.request.user.profile
-        )
-        if self.request.user.groups.filter(name='Líder de Calle')\
-                and FamilyGroup.objects.filter(
-                    id=kwargs['pk'], street_leader=street_leader):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        return FamilyGroup.objects.filter(
+            id=self.kwargs['pk'],
+            street_leader_id=self.request.census_role.street_leader_id
+        ).exists()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -868,7 +717,7 @@ class FamilyGroupEditTemplateView(TemplateView):
         return context
 
 
-class FamilyGroupUpdateView(View):
+class FamilyGroupUpdateView(RoleRequiredMixin, View):
     """!
     Clase que permite a los usuarios del líder de calle, actualizar usuarios
     grupos familiares
@@ -878,28 +727,21 @@ class FamilyGroupUpdateView(View):
         GNU Public License versión 2 (GPLv2)</a>
     """
 
-    def dispatch(self, request, *args, **kwargs):
+    allowed_groups = ['Líder de Calle']
+
+    def has_permission(self):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Metodo que valida si el grupo familiar pertenece al líder de calle
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @return Retorna verdadero si el usuario puede entrar a la vista
         """
 
-        street_leader = StreetLeader.objects.get(
-            profile=self.request.user.profile
-        )
-        if self.request.user.groups.filter(name='Líder de Calle') \
-                and FamilyGroup.objects.filter(
-                    id=kwargs['pk'], street_leader=street_leader):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        return FamilyGroup.objects.filter(
+            id=self.kwargs['pk'],
+            street_leader_id=self.request.census_role.street_leader_id
+        ).exists()
 
     def put(self, *args, **kwargs):
         family_group_id = kwargs['pk']
@@ -916,7 +758,9 @@ class FamilyGroupUpdateView(View):
             i = i + 1
         data['form-TOTAL_FORMS'] = i
         data['form-INITIAL_FORMS'] = 0
-        personformset = PersonFormSet(data)
+        personformset = PersonFormSet(
+            data, form_kwargs={'lookups': person_lookups()}
+        )
         if not personformset.is_valid():
             return JsonResponse(
                 {
@@ -940,69 +784,39 @@ class FamilyGroupUpdateView(View):
                 },
                 status=422
             )
-        department = Department.objects.get(pk=record['department_id'])
-        family_group.department = department
-        family_group.save()
-        c = Person.objects.filter(
-            family_group=family_group, id_number__contains='-'
-        ).count() + 1
-        for person in record['people']:
-            gender = Gender.objects.get(pk=person['gender_id'])
-            vote_type = VoteType.objects.get(pk=person['vote_type_id'])
-            relationship = Relationship.objects.get(
-                pk=person['relationship_id']
-            )
-            if person['has_id_number'] == 'y':
-                Person.objects.update_or_create(
-                    id_number=person['id_number'],
-                    defaults={
-                        'first_name': person['first_name'],
-                        'last_name': person['last_name'],
-                        'id_number': person['id_number'],
-                        'email': person['email'],
-                        'phone': person['phone'],
-                        'birthdate': person['birthdate'],
-                        'admission_date': person['admission_date'],
-                        'gender': gender,
-                        'vote_type': vote_type,
-                        'relationship': relationship,
-                        'family_head': person['family_head'],
-                        'family_group': family_group
-                    }
-                )
-            elif person['has_id_number'] == 'n':
-                p = Person.objects.get(
-                    family_group=family_group, family_head=True
-                )
-                Person.objects.update_or_create(
-                    id_number=person['id_number'],
-                    defaults={
-                        'first_name': person['first_name'],
-                        'last_name': person['last_name'],
-                        'id_number': p.id_number + '-' + str(c),
-                        'email': person['email'],
-                        'phone': person['phone'],
-                        'birthdate': person['birthdate'],
-                        'admission_date': person['admission_date'],
-                        'gender': gender,
-                        'vote_type': vote_type,
-                        'relationship': relationship,
-                        'family_head': person['family_head'],
-                        'family_group': family_group
+        people = [form.cleaned_data for form in personformset.forms]
+        if find_family_head(people) is None:
+            return JsonResponse(
+                {
+                    'status': False,
+                    'message': 'Error en los campos',
+                    'errors': {
+                        'people': [{}],
+                        'general_error': [
+                            'El jefe familiar debe tener cédula'
+                        ]
                     }
-                )
-                c = c + 1
+                },
+                status=422
+            )
+        with transaction.atomic():
+            department = family_group_form.cleaned_data['department_id']
+            if family_group.department_id != department.id:
+                family_group.department = department
+                family_group.save()
+            changes = update_people(family_group, record['people'], people)
         return JsonResponse(
             {
                 'status': True,
                 'message': 'Datos actualizados con éxito',
                 'redirect': '/user/family-group/list/',
+                'changes': changes,
             },
             status=200
         )
 
 
-class FamilyDetailView(DetailView):
+class FamilyDetailView(RoleRequiredMixin, DetailView):
     """!
     Clase que permite a los usuarios del líder de comunidad ver detalles de
     grupos familiares
@@ -1014,33 +828,25 @@ class FamilyDetailView(DetailView):
 
     model = FamilyGroup
     template_name = 'user/family_detail.html'
+    allowed_groups = ['Líder de Comunidad', 'Grupo Familiar']
 
-    def dispatch(self, request, *args, **kwargs):
+    def has_permission(self):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Metodo que valida si el grupo familiar es del usuario, salvo para el
+        líder de comunidad
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @return Retorna verdadero si el usuario puede entrar a la vista
         """
 
-        group1 = self.request.user.groups.filter(name='Líder de Comunidad')
-        group2 = self.request.user.groups.filter(name='Grupo Familiar')
-        family_group_id = kwargs['pk']
-        family_group = FamilyGroup.objects.filter(
-            id=family_group_id, profile__user=self.request.user
-        )
-        if group1 or (group2 and family_group):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        role = self.request.census_role
+        if role.has_group('Líder de Comunidad'):
+            return True
+        return role.family_group_id == self.kwargs['pk']
 
 
-class FamilyGroupDetailView(View):
+class FamilyGroupDetailView(RoleRequiredMixin, View):
     """!
     Clase que permite a los usuarios del líder de calle, ver detalles de
     usuarios grupos familiares
@@ -1050,29 +856,21 @@ class FamilyGroupDetailView(View):
         GNU Public License versión 2 (GPLv2)</a>
     """
 
-    def dispatch(self, request, *args, **kwargs):
+    allowed_groups = ['Líder de Calle']
+
+    def has_permission(self):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Metodo que valida si el grupo familiar pertenece al líder de calle
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @return Retorna verdadero si el usuario puede entrar a la vista
         """
 
-        street_leader = StreetLeader.objects.get(
-            profile=self.request.user.profile
-        )
-        if self.request.user.groups.filter(name='Líder de Calle') \
-                and FamilyGroup.objects.filter(
-                    id=kwargs['pk'], street_leader=street_leader
-                ):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        return FamilyGroup.objects.filter(
+            id=self.kwargs['pk'],
+            street_leader_id=self.request.census_role.street_leader_id
+        ).exists()
 
     def get(self, request, *args, **kwargs):
         family_group_id = kwargs['pk']
@@ -1102,7 +900,7 @@ class FamilyGroupDetailView(View):
         return JsonResponse({'status': True, 'record': record}, status=200)
 
 
-class PersonDeleteView(View):
+class PersonDeleteView(RoleRequiredMixin, View):
     """!
     Clase que permite a los usuarios del líder de calle, eliminar integrantes
     del grupo familiar (En desarrollo)
@@ -1112,31 +910,24 @@ class PersonDeleteView(View):
         GNU Public License versión 2 (GPLv2)</a>
     """
 
-    def dispatch(self, request, *args, **kwargs):
+    allowed_groups = ['Líder de Calle']
+
+    def has_permission(self):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Metodo que valida si la persona pertenece a un grupo familiar del
+        líder de calle
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @return Retorna verdadero si el usuario puede entrar a la vista
         """
 
-        street_leader = StreetLeader.objects.get(
-            profile=self.request.user.profile
-        )
-        person_id = kwargs['pk']
-        person = Person.objects.filter(
-            id=person_id, family_group__street_leader=street_leader
-        )
-        group = self.request.user.groups.filter(name='Líder de Calle')
-        if group and person:
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        return Person.objects.filter(
+            id=self.kwargs['pk'],
+            family_group__street_leader_id=(
+                self.request.census_role.street_leader_id
+            )
+        ).exists()
 
     def get(self, request, *args, **kwargs):
         person_id = kwargs['pk']
@@ -1147,7 +938,7 @@ class PersonDeleteView(View):
         )
 
 
-class CensusListView(ListView):
+class CensusListView(RoleRequiredMixin, ListView):
     """!
     Clase que permite a los usuarios líderes de comunidad ver todos los
     datos de la residencia
@@ -1159,24 +950,7 @@ class CensusListView(ListView):
 
     model = StreetLeader
     template_name = 'user/census_list.html'
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Comunidad'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Comunidad']
 
     def get_queryset(self):
         """!
@@ -1187,19 +961,17 @@ class CensusListView(ListView):
         @return Lista de objetos
         """
 
-        if CommunityLeader.objects.filter(profile=self.request.user.profile):
-            community_leader = CommunityLeader.objects.get(
-                profile=self.request.user.profile
-            )
+        communal_council_id = self.request.census_role.communal_council_id
+        if self.request.census_role.community_leader_id:
             return StreetLeader.objects.filter(
-                community_leader__communal_council=community_leader.communal_council
+                community_leader__communal_council_id=communal_council_id
             ).prefetch_related(
                 'familygroup_set__person_set'  # Optimiza las consultas
             )
         return StreetLeader.objects.none()
 
 
-class SearchView(View):
+class SearchView(RoleRequiredMixin, View):
     """!
     Clase que retorna un json con los datos
 
@@ -1208,46 +980,25 @@ class SearchView(View):
         GNU Public License versión 2 (GPLv2)</a>
     """
 
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        group1 = self.request.user.groups.filter(name='Líder de Comunidad')
-        group2 = self.request.user.groups.filter(name='Líder de Calle')
-        if group1 or group2:
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Comunidad', 'Líder de Calle']
 
     def get(self, request, *args, **kwargs):
-        id_number = kwargs['id_number']
-        if CommunityLeader.objects.filter(profile__user=self.request.user):
-            community_leader = CommunityLeader.objects.get(profile__user=self.request.user)
-            communal_council = community_leader.communal_council
-            person = Person.objects.filter(
-                id_number=id_number,
-                family_group__street_leader__community_leader__communal_council=communal_council
-            )
-        elif StreetLeader.objects.filter(profile__user=self.request.user):
-            street_leader = StreetLeader.objects.get(profile__user=self.request.user)
-            person = Person.objects.filter(id_number=id_number, family_group__street_leader=street_leader)
-        # person = Person.objects.filter(id_number=id_number)
-        if not person:
+        # Una sola consulta filtrada por el alcance del usuario con el grupo
+        # familiar, su usuario y su departamento
+        person = scoped_people(self.request.census_role).filter(
+            id_number=kwargs['id_number']
+        ).select_related(
+            'family_group__profile__user',
+            'family_group__department',
+        ).first()
+        if person is None:
             return JsonResponse(
                 {'record': {}, 'error': 'Persona no encontrada.'}, status=200
             )
-        person = Person.objects.get(id_number=id_number)
         family_group = person.family_group
-        people = family_group.person_set.all()
+        people = family_group.person_set.select_related(
+            'vote_type', 'relationship', 'gender'
+        )
         person_list = []
         for person in people:
             relationship = person.relationship
@@ -1274,64 +1025,101 @@ class SearchView(View):
         )
 
 
-class SearchForAgeView(View):
+class PersonSearchView(RoleRequiredMixin, View):
     """!
-    Clase que retorna un json con datos filtrados por edad
+    Clase que retorna un json con una página de las personas que coinciden
+    con una cédula o con parte de sus nombres y apellidos
 
     @author William Páez (paez.william8 at gmail.com)
     @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
         GNU Public License versión 2 (GPLv2)</a>
     """
 
-    def dispatch(self, request, *args, **kwargs):
+    allowed_groups = ['Líder de Comunidad', 'Líder de Calle']
+
+    def get(self, request, *args, **kwargs):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Función que busca las personas del alcance del usuario
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
         @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @param *args <b>{tuple}</b> Tupla de valores, inicialmente vacia
+        @param **kwargs <b>{dict}</b> Diccionario de datos
+        @return Retorna un objeto JsonResponse con una página de personas
         """
 
-        group1 = self.request.user.groups.filter(name='Líder de Comunidad')
-        group2 = self.request.user.groups.filter(name='Líder de Calle')
-        if group1 or group2:
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        query = request.GET.get('q', '').strip()
+        if not query:
+            return JsonResponse(
+                {'status': False, 'message': 'Debe indicar la búsqueda'},
+                status=422
+            )
+        page = search_people(
+            scoped_people(self.request.census_role), query,
+            request.GET.get('page')
+        )
+        person_list = []
+        for person in page.object_list:
+            person_list.append({
+                'id': person.id,
+                'first_name': person.first_name,
+                'last_name': person.last_name,
+                'id_number': person.id_number,
+                'family_head': person.family_head,
+                'family_group': person.family_group_id,
+                'department': (
+                    person.family_group.department.name
+                    if person.family_group.department else ''
+                ),
+            })
+        return JsonResponse({
+            'status': True, 'list': person_list, 'page': page.number,
+            'num_pages': page.paginator.num_pages,
+            'count': page.paginator.count,
+        }, status=200)
+
+
+class SearchForAgeView(RoleRequiredMixin, View):
+    """!
+    Clase que retorna un json con datos filtrados por edad
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    allowed_groups = ['Líder de Comunidad', 'Líder de Calle']
 
     def get(self, request, *args, **kwargs):
         age = kwargs['age']
-        if CommunityLeader.objects.filter(profile__user=self.request.user):
-            community_leader = CommunityLeader.objects.get(profile__user=self.request.user)
-            communal_council = community_leader.communal_council
-            people = Person.objects.filter(
-                family_group__street_leader__community_leader__communal_council=communal_council
-            )
-        elif StreetLeader.objects.filter(profile__user=self.request.user):
-            street_leader = StreetLeader.objects.get(profile__user=self.request.user)
+        role = self.request.census_role
+        if role.community_leader_id:
+            people = Person.objects.filter(**{
+                'family_group__street_leader__community_leader__'
+                'communal_council_id': role.communal_council_id
+            })
+        elif role.street_leader_id:
             people = Person.objects.filter(
-                family_group__street_leader=street_leader
+                family_group__street_leader_id=role.street_leader_id
             )
         # people = Person.objects.all()
         person_list = []
         counter = 0
-        for person in people:
-            if person.age() == age:
-                person_list.append({
-                    'first_name': person.first_name,
-                    'last_name': person.last_name,
-                    'id_number': person.id_number,
-                    'birthdate': person.birthdate,
-                    'admission_date': person.admission_date,
-                    'gender': person.gender.name if person.gender else '',
-                    'age': person.age(),
-                    'department': str(person.family_group.department),
-                })
-                counter = counter + 1
+        for person in people.age_between(age, age).select_related(
+            'gender', 'family_group__department'
+        ):
+            person_list.append({
+                'first_name': person.first_name,
+                'last_name': person.last_name,
+                'id_number': person.id_number,
+                'birthdate': person.birthdate,
+                'admission_date': person.admission_date,
+                'gender': person.gender.name if person.gender else '',
+                'age': person.age(),
+                'department': str(person.family_group.department),
+            })
+            counter = counter + 1
         record = {
             'total_children': counter,
             'people': person_list
@@ -1341,7 +1129,7 @@ class SearchForAgeView(View):
         )
 
 
-class AdmonitionListView(ListView):
+class AdmonitionListView(RoleRequiredMixin, ListView):
     """!
     Clase que lista las amonestaciones
 
@@ -1352,27 +1140,10 @@ class AdmonitionListView(ListView):
 
     model = Admonition
     template_name = 'user/admonition_list.html'
+    allowed_groups = ['Líder de Comunidad']
 
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
 
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Comunidad'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
-
-
-class AdmonitionCreateView(CreateView):
+class AdmonitionCreateView(RoleRequiredMixin, CreateView):
     """!
     Clase que permite a un usuario registrar amonestaciones
 
@@ -1385,24 +1156,7 @@ class AdmonitionCreateView(CreateView):
     form_class = AdmonitionForm
     template_name = 'user/admonition_create.html'
     success_url = reverse_lazy('user:admonition_list')
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Comunidad'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Comunidad']
 
     def get_form_kwargs(self):
         """!
@@ -1433,7 +1187,7 @@ class AdmonitionCreateView(CreateView):
         return super().form_valid(form)
 
 
-class AdmonitionUpdateView(UpdateView):
+class AdmonitionUpdateView(RoleRequiredMixin, UpdateView):
     """!
     Clase que permite a un usuario actualizar amonestaciones
 
@@ -1446,28 +1200,20 @@ class AdmonitionUpdateView(UpdateView):
     form_class = AdmonitionForm
     template_name = 'user/admonition_create.html'
     success_url = reverse_lazy('user:admonition_list')
+    allowed_groups = ['Líder de Comunidad']
 
-    def dispatch(self, request, *args, **kwargs):
+    def has_permission(self):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Metodo que valida si la amonestación fue registrada por el usuario
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @return Retorna verdadero si el usuario puede entrar a la vista
         """
 
-        admonition_id = self.kwargs['pk']
-        group = self.request.user.groups.filter(name='Líder de Comunidad')
-        if Admonition.objects.filter(
-            pk=admonition_id, user=self.request.user
-        ).exists() and group:
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        return Admonition.objects.filter(
+            pk=self.kwargs['pk'], user=self.request.user
+        ).exists()
 
     def get_form_kwargs(self):
         """!
@@ -1483,7 +1229,7 @@ class AdmonitionUpdateView(UpdateView):
         return kwargs
 
 
-class AdmonitionDeleteView(DeleteView):
+class AdmonitionDeleteView(RoleRequiredMixin, DeleteView):
     """!
     Clase que permite a un usuario eliminar los datos de una amonestación
 
@@ -1495,28 +1241,20 @@ class AdmonitionDeleteView(DeleteView):
     model = Admonition
     template_name = 'user/admonition_delete.html'
     success_url = reverse_lazy('user:admonition_list')
+    allowed_groups = ['Líder de Comunidad']
 
-    def dispatch(self, request, *args, **kwargs):
+    def has_permission(self):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Metodo que valida si la amonestación fue registrada por el usuario
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @return Retorna verdadero si el usuario puede entrar a la vista
         """
 
-        admonition_id = self.kwargs['pk']
-        group = self.request.user.groups.filter(name='Líder de Comunidad')
-        if Admonition.objects.filter(
-            pk=admonition_id, user=self.request.user
-        ).exists() and group:
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        return Admonition.objects.filter(
+            pk=self.kwargs['pk'], user=self.request.user
+        ).exists()
 
     def delete(self, request, *args, **kwargs):
         """!
@@ -1536,7 +1274,7 @@ class AdmonitionDeleteView(DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
-class MoveOutListView(ListView):
+class MoveOutListView(RoleRequiredMixin, ListView):
     """!
     Clase que lista las mudanzas
 
@@ -1547,24 +1285,7 @@ class MoveOutListView(ListView):
 
     model = MoveOut
     template_name = 'user/move_out_list.html'
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Calle'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Calle']
     
     def get_queryset(self):
         """!
@@ -1575,11 +1296,13 @@ class MoveOutListView(ListView):
         @return queryset <b>{object}</b> lista de mudanzas asociadas al usuario
         """
 
-        queryset = MoveOut.objects.filter(user=self.request.user)
+        queryset = MoveOut.objects.filter(
+            user=self.request.user
+        ).select_related('department')
         return queryset
 
 
-class MoveOutCreateView(CreateView):
+class MoveOutCreateView(RoleRequiredMixin, CreateView):
     """!
     Clase que permite a un usuario registrar solicitudes de mudanzas
 
@@ -1592,24 +1315,7 @@ class MoveOutCreateView(CreateView):
     form_class = MoveOutForm
     template_name = 'user/move_out_create.html'
     success_url = reverse_lazy('user:move_out_list')
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        if self.request.user.groups.filter(name='Líder de Calle'):
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = ['Líder de Calle']
 
     def get_form_kwargs(self):
         """!
@@ -1645,7 +1351,7 @@ class MoveOutCreateView(CreateView):
         return super().form_valid(form)
 
 
-class MoveOutUpdateView(UpdateView):
+class MoveOutUpdateView(RoleRequiredMixin, UpdateView):
     """!
     Clase que permite a un usuario actualizar las mudanzas
 
@@ -1658,31 +1364,21 @@ class MoveOutUpdateView(UpdateView):
     form_class = MoveOutForm
     template_name = 'user/move_out_create.html'
     success_url = reverse_lazy('user:move_out_list')
+    allowed_groups = ['Líder de Calle']
 
-    def dispatch(self, request, *args, **kwargs):
+    def has_permission(self):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Metodo que valida si la mudanza fue registrada por el usuario y aún no
+        está aprobada
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @return Retorna verdadero si el usuario puede entrar a la vista
         """
 
-        move_out_id = self.kwargs['pk']
-        group = self.request.user.groups.filter(name='Líder de Calle')
-        if not MoveOut.objects.filter(
-            pk=move_out_id, user=self.request.user
-        ).exists():
-            return redirect('base:error_403')
-        move_out = MoveOut.objects.get(pk=move_out_id)
-        if move_out and not move_out.approved and group:
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        return MoveOut.objects.filter(
+            pk=self.kwargs['pk'], user=self.request.user, approved=False
+        ).exists()
 
     def get_form_kwargs(self):
         """!
@@ -1737,7 +1433,7 @@ class MoveOutUpdateView(UpdateView):
         return super().form_valid(form)
 
 
-class CondominiumListView(ListView):
+class CondominiumListView(RoleRequiredMixin, ListView):
     """!
     Clase que lista los cobros del condominio
 
@@ -1750,27 +1446,9 @@ class CondominiumListView(ListView):
     template_name = 'user/condominium_list.html'
     success_url = reverse_lazy('user:condominium_list')
     paginate_by = 10
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        group1 = self.request.user.groups.filter(name='Líder de Comunidad')
-        group2 = self.request.user.groups.filter(name='Líder de Calle')
-        group3 = self.request.user.groups.filter(name='Grupo Familiar')
-        if group1 or group2 or group3:
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = [
+        'Líder de Comunidad', 'Líder de Calle', 'Grupo Familiar'
+    ]
     
     def get_queryset(self):
         """!
@@ -1781,19 +1459,18 @@ class CondominiumListView(ListView):
         @return queryset <b>{object}</b> lista de mudanzas asociadas al usuario
         """
 
-        if StreetLeader.objects.filter(profile=self.request.user.profile):
-            street_leader = StreetLeader.objects.get(
-                profile=self.request.user.profile
-            )
-            queryset = Condominium.objects.filter(user=street_leader.community_leader.profile.user)
+        role = self.request.census_role
+        if role.street_leader_id:
+            queryset = Condominium.objects.filter(**{
+                'user__profile__communityleader__streetleader':
+                role.street_leader_id
+            })
             return queryset
-        elif FamilyGroup.objects.filter(profile__user=self.request.user):
-            family_group = FamilyGroup.objects.get(
-                profile__user=self.request.user
-            )
-            queryset = Condominium.objects.filter(
-                user=family_group.street_leader.community_leader.profile.user
-            )
+        elif role.family_group_id:
+            queryset = Condominium.objects.filter(**{
+                'user__profile__communityleader__streetleader__familygroup':
+                role.family_group_id
+            })
             return queryset
 
         queryset = Condominium.objects.filter(user=self.request.user)
@@ -1842,7 +1519,7 @@ class CondominiumListView(ListView):
         return redirect(self.success_url)
 
 
-class CondominiumCreateView(CreateView):
+class CondominiumCreateView(RoleRequiredMixin, CreateView):
     """!
     Clase que permite a un usuario registrar pagos de condominium
 
@@ -1855,26 +1532,20 @@ class CondominiumCreateView(CreateView):
     form_class = CondominiumForm
     template_name = 'user/condominium_create.html'
     success_url = reverse_lazy('user:condominium_list')
+    allowed_groups = ['Líder de Comunidad']
 
-    def dispatch(self, request, *args, **kwargs):
+    def has_permission(self):
         """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
+        Metodo que valida si el usuario es el líder de comunidad que registra
+        los condominios
 
         @author William Páez (paez.william8 at gmail.com)
         @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
+        @return Retorna verdadero si el usuario puede entrar a la vista
         """
 
         # usuario comunidad
-        user_id = self.request.user.id
-        if self.request.user.groups.filter(name='Líder de Comunidad') and user_id == 3:
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+        return self.request.user.id == 3
 
     def form_valid(self, form):
         """!
@@ -1886,40 +1557,11 @@ class CondominiumCreateView(CreateView):
         @return super <b>{object}</b> Formulario validado
         """
 
-        family_heads = []
         with transaction.atomic():
             self.object = form.save(commit=False)
             self.object.user = self.request.user
             self.object.save()
-            for department in Department.objects.all():
-                family_groups = department.familygroup_set.filter(
-                    street_leader__community_leader__profile__user=self.request.user
-                )
-                if family_groups:
-                    payment = Payment.objects.create(
-                        department=department,
-                        condominium=self.object,
-                        user=family_groups[0].street_leader.profile.user
-                    )
-                    total_family_group = family_groups.count()
-                    for family_group in family_groups:
-                        if family_group.person_set.filter(family_head=True).exists():
-                            people = family_group.person_set.filter(family_head=True)
-                            if people.count() > 1:
-                                family_heads.append(people.first())
-                                FamilyHead.objects.create(
-                                    payer='{} {}'.format(people.first().first_name, people.first().last_name),
-                                    id_number=people.first().id_number,
-                                    amount=(self.object.rate * self.object.amount) / total_family_group,
-                                    payment=payment
-                                )
-                            else:
-                                FamilyHead.objects.create(
-                                    payer='{} {}'.format(people.first().first_name, people.first().last_name),
-                                    id_number=people.first().id_number,
-                                    amount=(self.object.rate * self.object.amount) / total_family_group,
-                                    payment=payment
-                                )
+            family_heads = create_payments(self.object, self.request.user)
         if family_heads:
             messages.warning(
                 self.request, 'Jefe Familiar repetido: %s' % (family_heads)
@@ -1927,7 +1569,7 @@ class CondominiumCreateView(CreateView):
         return super().form_valid(form)
 
 
-class CondominiumDetailView(DetailView):
+class CondominiumDetailView(RoleRequiredMixin, DetailView):
     """!
     Clase que permite a un usuario registrar pagos de condominium
 
@@ -1939,27 +1581,9 @@ class CondominiumDetailView(DetailView):
     model = Condominium
     template_name = 'user/condominium_detail.html'
     paginate_by = 10
-
-    def dispatch(self, request, *args, **kwargs):
-        """!
-        Metodo que valida si el usuario del sistema tiene permisos para entrar
-        a esta vista
-
-        @author William Páez (paez.william8 at gmail.com)
-        @param self <b>{object}</b> Objeto que instancia la clase
-        @param request <b>{object}</b> Objeto que contiene la petición
-        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
-        @param **kwargs <b>{dict}</b> Diccionario de datos, inicialmente vacio
-        @return Redirecciona al usuario a la página de error de permisos si no
-            es su perfil
-        """
-
-        group1 = self.request.user.groups.filter(name='Líder de Comunidad')
-        group2 = self.request.user.groups.filter(name='Líder de Calle')
-        group3 = self.request.user.groups.filter(name='Grupo Familiar')
-        if group1 or group2 or group3:
-            return super().dispatch(request, *args, **kwargs)
-        return redirect('base:error_403')
+    allowed_groups = [
+        'Líder de Comunidad', 'Líder de Calle', 'Grupo Familiar'
+    ]
 
     def post(self, *args, **kwargs):
         """!
@@ -1980,30 +1604,25 @@ class CondominiumDetailView(DetailView):
 
         if activate_paid is not None:
             family_head = FamilyHead.objects.get(pk=activate_paid)
-            family_head.paid = True
-            family_head.save()
+            save_family_head(family_head, paid=True)
             messages.success(
                 self.request, 'Pagado: %s' % (str(family_head))
             )
         elif deactivate_paid is not None:
             family_head = FamilyHead.objects.get(pk=deactivate_paid)
-            family_head.paid = False
-            family_head.save()
+            save_family_head(family_head, paid=False)
             messages.warning(
                 self.request, 'No Pagado: %s' % (str(family_head))
             )
         elif activate_exonerated is not None:
             family_head = FamilyHead.objects.get(pk=activate_exonerated)
-            family_head.exonerated = True
-            family_head.paid = False
-            family_head.save()
+            save_family_head(family_head, exonerated=True, paid=False)
             messages.success(
                 self.request, 'Exonerado: %s' % (str(family_head))
             )
         elif deactivate_exonerated is not None:
             family_head = FamilyHead.objects.get(pk=deactivate_exonerated)
-            family_head.exonerated = False
-            family_head.save()
+            save_family_head(family_head, exonerated=False)
             messages.warning(
                 self.request, 'No Exonerado: %s' % (str(family_head))
             )
@@ -2024,60 +1643,155 @@ class CondominiumDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        street_leaders = StreetLeader()
-        user = self.request.user
-        if StreetLeader.objects.filter(community_leader__profile__user=user):
+        street_leaders = StreetLeader.objects.none()
+        role = self.request.census_role
+        if role.community_leader_id:
             street_leaders = StreetLeader.objects.filter(
-                community_leader__profile__user=user
+                community_leader_id=role.community_leader_id
             )
-        elif StreetLeader.objects.filter(profile__user=user):
+        elif role.street_leader_id:
             street_leaders = StreetLeader.objects.filter(
-                profile__user=user
+                id=role.street_leader_id
             )
-        elif FamilyGroup.objects.filter(profile__user=user):
-            family_group = FamilyGroup.objects.get(profile__user=user)
+        elif role.family_group_id:
+            family_group = role.family_group
             street_leaders = StreetLeader.objects.filter(
-                profile=family_group.street_leader.profile
+                id=family_group.street_leader_id
             )
             context['person'] = family_group.person_set.get(family_head=True)
+        # Totales de todos los líderes de calle con una sola consulta
+        users = list(street_leaders.values_list(
+            'profile__user', 'profile__user__username'
+        ))
+        totals, total = self.object.ledger([user_id for user_id, _ in users])
         amount_street_leaders = {}
-        total_sum = 0
-        for street_leader in street_leaders:
-            payments = self.object.payment_set.filter(user=street_leader.profile.user)
-            total_exonerated = 0
-            total_paid = 0
-            total_unpaid = 0
-            sum = 0
-            total_departments = 0
-            for payment in payments:
-                for family_head in payment.familyhead_set.all():
-                    if family_head.paid and not family_head.exonerated:
-                        sum = sum + family_head.amount
-                        total_sum = total_sum + family_head.amount
-                        total_paid = total_paid + 1
-                    elif family_head.exonerated:
-                        total_exonerated = total_exonerated + 1
-                    elif not family_head.paid:
-                        total_unpaid = total_unpaid + 1
-                total_departments = total_departments + 1
-            amount_street_leaders[
-                str(street_leader.profile.user)
-            ] = (
-                sum,
-                sum/self.object.rate,
-                total_paid,
-                total_unpaid,
-                total_paid + total_unpaid,
-                total_exonerated,
-                total_departments,
+        for user_id, username in users:
+            ledger = totals.get(user_id, LedgerTotals())
+            amount_street_leaders[username] = (
+                ledger.paid_total,
+                ledger.paid_total/self.object.rate,
+                ledger.paid_count,
+                ledger.unpaid_count,
+                ledger.paid_count + ledger.unpaid_count,
+                ledger.exonerated_count,
+                ledger.departments,
             )
         context['amount_street_leaders'] = amount_street_leaders
-        context['total_sum'] = (total_sum, total_sum/self.object.rate)
+        context['total_sum'] = (
+            total.paid_total, total.paid_total/self.object.rate
+        )
 
         # Paginación de los pagos
-        payment_list = self.object.payment_set.all()
+        payment_list = self.object.payment_set.select_related('department')
         paginator = Paginator(payment_list, self.paginate_by)
         page_number = self.request.GET.get('page')
         page_obj = paginator.get_page(page_number)
         context['page_obj'] = page_obj
         return context
+
+
+class CondominiumPaymentUpdateView(RoleRequiredMixin, View):
+    """!
+    Clase que permite a los líderes de calle y de comunidad cambiar el
+    estado de varios cobros de un condominio en una sola petición json
+
+    @author William Páez (paez.william8 at gmail.com)
+    @copyright <a href='http://www.gnu.org/licenses/gpl-2.0.html'>
+        GNU Public License versión 2 (GPLv2)</a>
+    """
+
+    allowed_groups = ['Líder de Comunidad', 'Líder de Calle']
+
+    def street_leaders(self):
+        """!
+        Función que obtiene los líderes de calle del usuario
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @return Retorna un queryset de líderes de calle
+        """
+
+        role = self.request.census_role
+        if role.street_leader_id:
+            return StreetLeader.objects.filter(id=role.street_leader_id)
+        return StreetLeader.objects.filter(
+            community_leader_id=role.community_leader_id
+        )
+
+    def post(self, request, *args, **kwargs):
+        """!
+        Función que cambia el estado de los cobros y retorna los totales
+        actualizados del condominio
+
+        @author William Páez (paez.william8 at gmail.com)
+        @param self <b>{object}</b> Objeto que instancia la clase
+        @param request <b>{object}</b> Objeto que contiene la petición
+        @param *args <b>{tupla}</b> Tupla de valores, inicialmente vacia
+        @param **kwargs <b>{dict}</b> Diccionario de datos con el id
+        @return Retorna un objeto JsonResponse
+        """
+
+        condominium = get_object_or_404(Condominium, pk=self.kwargs['pk'])
+        if condominium.closing:
+            return JsonResponse(
+                {'status': False, 'message': 'El condominio está cerrado'},
+                status=422
+            )
+        try:
+            record = json.loads(request.body.decode('utf-8'))
+        except ValueError:
+            return JsonResponse(
+                {'status': False, 'message': 'Datos json inválidos'},
+                status=422
+            )
+        try:
+            updates = payment_updates(record)
+        except ValueError as e:
+            return JsonResponse(
+                {'status': False, 'message': str(e)}, status=422
+            )
+        users = dict(self.street_leaders().values_list(
+            'profile__user', 'profile__user__username'
+        ))
+        family_heads = FamilyHead.objects.filter(
+            payment__condominium=condominium, payment__user__in=list(users)
+        )
+        ids = {pk for update_ids, values in updates for pk in update_ids}
+        missing = ids - set(
+            family_heads.filter(id__in=ids).values_list('id', flat=True)
+        )
+        if missing:
+            return JsonResponse(
+                {
+                    'status': False,
+                    'message': 'Jefes familiares inexistentes o de otro '
+                    'líder de calle',
+                    'errors': {'ids': sorted(missing)},
+                },
+                status=422
+            )
+        updated = 0
+        with transaction.atomic():
+            for update_ids, values in updates:
+                updated = updated + update_family_heads(
+                    family_heads, update_ids, **values
+                )
+        condominium.refresh_from_db()
+        totals, _ = condominium.ledger(list(users))
+        return JsonResponse(
+            {
+                'status': True,
+                'message': 'Cobros actualizados: %s' % updated,
+                'condominium': {
+                    'paid_total': condominium.paid_total,
+                    'paid_count': condominium.paid_count,
+                    'unpaid_count': condominium.unpaid_count,
+                    'exonerated_count': condominium.exonerated_count,
+                },
+                'street_leaders': {
+                    users[user_id]: ledger._asdict()
+                    for user_id, ledger in totals.items()
+                },
+            },
+            status=200
+        )